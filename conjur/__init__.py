@@ -25,7 +25,22 @@ Your choices:
  $ pip install Conjur
 """)
 
-#pylint: disable=wrong-import-position
-from .client import Client
-#pylint: disable=wrong-import-position
-from .cli import Cli
+# Client and Cli are only imported when they are first accessed so that
+# starting the CLI does not load the SDK dependencies that the invoked
+# command does not need
+if sys.version_info < (3, 7):
+    #pylint: disable=wrong-import-position
+    from .client import Client
+    #pylint: disable=wrong-import-position
+    from .cli import Cli
+else:
+    def __getattr__(name):
+        # pylint: disable=import-outside-toplevel
+        if name == 'Client':
+            from .client import Client as client_class
+            return client_class
+        if name == 'Cli':
+            from .cli import Cli as cli_class
+            return cli_class
+
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
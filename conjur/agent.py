@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+"""
+Agent module
+
+This module holds the long-lived agent that keeps one authenticated Client,
+with its pooled connections and optional secret cache, behind a local Unix
+domain socket, and the client that the CLI uses to forward requests to it
+"""
+
+# Builtins
+import base64
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+# Internals
+from conjur.constants import DEFAULT_AGENT_SOCKET
+from conjur.errors import AgentRequestException, InvalidOperationException, \
+    PartialBatchFailureException
+from conjur.secret_file import open_secret_output
+
+
+def is_agent_supported():
+    """
+    Method that returns whether the platform supports Unix domain sockets
+    """
+    return hasattr(socket, 'AF_UNIX')
+
+
+def _connect(socket_path):
+    """
+    Method that returns a socket connected to the agent or None if no
+    agent is listening on the path
+    """
+    if not is_agent_supported() or not os.path.exists(socket_path):
+        return None
+
+    # pylint: disable=no-member
+    agent_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        agent_socket.connect(socket_path)
+    except OSError:
+        agent_socket.close()
+        return None
+
+    return agent_socket
+
+
+class _ChunkWriter:
+    """
+    Binary file object that sends what is written to it as chunk responses
+    """
+    def __init__(self, write_response):
+        self._write_response = write_response
+
+    def write(self, data):
+        """
+        Method that sends the data, base64 encoded since it is raw bytes
+        """
+        self._write_response({'chunk': base64.b64encode(data).decode('ascii')})
+        return len(data)
+
+
+class AgentRequestHandler(socketserver.StreamRequestHandler):
+    """
+    AgentRequestHandler
+
+    This class executes the newline-delimited JSON requests sent over
+    a connection and writes back one JSON response per request. Streamed
+    values are written as chunk responses that precede the response.
+    """
+    def handle(self):
+        for line in self.rfile:
+            response = self.server.execute(json.loads(line.decode('utf-8')),
+                                           self.write_response)
+            self.write_response(response)
+
+    def write_response(self, response):
+        """
+        Method that writes a JSON response line
+        """
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+# pylint: disable=no-member
+class AgentServer(socketserver.ThreadingUnixStreamServer if is_agent_supported() else object):
+    """
+    AgentServer
+
+    This class serves the requests of the CLI with a single Client so that
+    the configuration, the credentials, the API token and the connections
+    are loaded once instead of on every invocation. The socket can only be
+    connected to by its owner.
+
+    The identity is returned by ping so that the CLI only forwards requests
+    to an agent that serves the server, account and login it is configured
+    with, and that verifies the server certificate the same way.
+    """
+    daemon_threads = True
+
+    def __init__(self, client, socket_path=DEFAULT_AGENT_SOCKET, identity=None):
+        if not is_agent_supported():
+            raise InvalidOperationException(
+                "Error: The Conjur agent is not supported on this platform")
+
+        self.client = client
+        self.socket_path = socket_path
+        self.identity = identity
+
+        agent_socket = _connect(socket_path)
+        if agent_socket is not None:
+            agent_socket.close()
+            raise RuntimeError(f"Error: A Conjur agent is already running on '{socket_path}'")
+
+        # The socket was left behind by an agent that did not shut down cleanly
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, AgentRequestHandler)
+        finally:
+            os.umask(previous_umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def execute(self, request, write_response=None):
+        """
+        Method that executes a request and returns its response. Streamed
+        values are sent with write_response before the response is returned.
+        """
+        try:
+            return {'result': self._execute(request, write_response)}
+        # pylint: disable=broad-except
+        except Exception as error:
+            # pylint: disable=logging-fstring-interpolation
+            logging.debug(f"Agent request failed: {error}")
+            # requests is always loaded here since the client depends on it
+            requests = sys.modules.get('requests')
+            return {
+                'error': str(error),
+                'is_http_error': requests is not None and
+                                 isinstance(error, requests.exceptions.HTTPError),
+            }
+
+    # pylint: disable=too-many-return-statements
+    def _execute(self, request, write_response=None):
+        operation = request.get('operation')
+        if operation == 'get':
+            variable_value = self.client.get(request['variable_id'], request.get('version'))
+            # Variable values are raw bytes so they are sent base64 encoded
+            return base64.b64encode(variable_value).decode('ascii')
+        if operation == 'stream_variable' and write_response is not None:
+            # The value is sent in chunks as it is received so that it is
+            # never held in memory as a whole
+            return self.client.stream_variable(request['variable_id'],
+                                               _ChunkWriter(write_response),
+                                               request.get('version'))
+        if operation == 'get_many':
+            return self.client.get_many(*request['variable_ids'])
+        if operation == 'set':
+            self.client.set(request['variable_id'], request['value'])
+            return None
+        if operation == 'set_many':
+            set_options = {}
+            if request.get('max_workers') is not None:
+                set_options['max_workers'] = request['max_workers']
+            if request.get('skip_unchanged'):
+                set_options['skip_unchanged'] = True
+            # The variables that failed are reported as part of the result
+            # so that the caller still learns which ones were set
+            try:
+                set_variable_ids = self.client.set_many(request['variables'], **set_options)
+                errors = {}
+            except PartialBatchFailureException as partial_failure:
+                set_variable_ids = partial_failure.results
+                errors = {variable_id: str(error)
+                          for variable_id, error in partial_failure.errors.items()}
+            return {'set': set_variable_ids, 'failed': errors}
+        if operation == 'list':
+            list_options = {name: request[name] for name in ('page_size', 'prefetch')
+                            if request.get(name) is not None}
+            return list(self.client.iter_resources(request.get('list_constraints'),
+                                                   **list_options))
+        if operation == 'stream_resources':
+            return list(self.client.stream_resources(request.get('list_constraints')))
+        if operation == 'ping':
+            return self.identity
+        if operation == 'stop':
+            # The server cannot be shut down from one of its own requests
+            # since shutting down waits for the requests to be served
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return None
+
+        raise InvalidOperationException(f"Error: Unsupported agent operation '{operation}'")
+
+
+class AgentClient:
+    """
+    AgentClient
+
+    This class forwards requests to a running agent. It implements the
+    subset of the Client interface that the agent serves so that it can
+    be used by the command logic in place of a Client.
+    """
+    def __init__(self, agent_socket):
+        self._socket = agent_socket
+        self._stream = agent_socket.makefile('rwb')
+
+    @classmethod
+    def connect(cls, socket_path=DEFAULT_AGENT_SOCKET):
+        """
+        Method that returns a client connected to the agent or None if
+        no agent is running
+        """
+        agent_socket = _connect(socket_path)
+        if agent_socket is None:
+            return None
+
+        # pylint: disable=logging-fstring-interpolation
+        logging.debug(f"Forwarding requests to the Conjur agent on '{socket_path}'...")
+        return cls(agent_socket)
+
+    def get(self, variable_id, version=None):
+        """
+        Gets a variable value based on its ID
+        """
+        variable_value = self._request('get', variable_id=variable_id, version=version)
+        return base64.b64decode(variable_value)
+
+    def stream_variable(self, variable_id, output, version=None):
+        """
+        Writes a variable value, based on its ID, to a binary file object or
+        to a path in chunks as the agent receives it. Returns the number of
+        bytes written.
+        """
+        with open_secret_output(output) as output_file:
+            self._send('stream_variable', variable_id=variable_id, version=version)
+            while True:
+                response = self._receive()
+                if 'chunk' not in response:
+                    return response['result']
+                output_file.write(base64.b64decode(response['chunk']))
+
+    def get_many(self, *variable_ids):
+        """
+        Gets multiple variable values based on their IDs
+        """
+        return self._request('get_many', variable_ids=variable_ids)
+
+    def set(self, variable_id, value):
+        """
+        Sets a variable to a specific value based on its ID
+        """
+        self._request('set', variable_id=variable_id, value=value)
+
+    def set_many(self, variables, max_workers=None, skip_unchanged=False):
+        """
+        Sets multiple variables concurrently. The variables are a dictionary
+        or an iterable of (variable_id, value) pairs.
+        """
+        if isinstance(variables, dict):
+            variables = variables.items()
+        result = self._request('set_many', variables=[list(pair) for pair in variables],
+                               max_workers=max_workers, skip_unchanged=skip_unchanged)
+        if result['failed']:
+            raise PartialBatchFailureException(result['set'], result['failed'])
+
+        return result['set']
+
+    def iter_resources(self, list_constraints=None, page_size=None, prefetch=None):
+        """
+        Iterates over all available resources
+        """
+        return iter(self._request('list', list_constraints=list_constraints,
+                                  page_size=page_size, prefetch=prefetch))
+
+    def stream_resources(self, list_constraints=None):
+        """
+        Iterates over all available resources, which the agent fetches with
+        a single request
+        """
+        return iter(self._request('stream_resources', list_constraints=list_constraints))
+
+    def ping(self):
+        """
+        Checks that the agent is serving requests and returns its identity
+        """
+        return self._request('ping')
+
+    def stop(self):
+        """
+        Stops the agent once it has answered
+        """
+        self._request('stop')
+
+    def close(self):
+        """
+        Closes the connection to the agent
+        """
+        self._stream.close()
+        self._socket.close()
+
+    def _request(self, operation, **params):
+        self._send(operation, **params)
+        return self._receive()['result']
+
+    def _send(self, operation, **params):
+        self._stream.write(json.dumps({'operation': operation, **params}).encode('utf-8') + b'\n')
+        self._stream.flush()
+
+    def _receive(self):
+        line = self._stream.readline()
+        if not line:
+            raise AgentRequestException("Error: The Conjur agent closed the connection")
+
+        response = json.loads(line.decode('utf-8'))
+        if 'error' in response:
+            raise AgentRequestException(response['error'], response.get('is_http_error', False))
+
+        return response
@@ -6,35 +6,77 @@ API module
 Provides high-level interface for programmatic API interactions
 """
 # Builtins
+import functools
 import json
 import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Third party
 from datetime import datetime, timedelta
 
 # Internals
+from conjur.base_api import BaseApi
 from conjur.endpoints import ConjurEndpoint
-from conjur.http_wrapper import HttpVerb, invoke_endpoint
+from conjur.errors import PartialBatchFailureException
+from conjur.json_stream import iter_json_array
+from conjur.http_wrapper import HttpVerb, invoke_endpoint, create_session, is_server_failure, \
+    is_unauthorized, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+from conjur.token_refresher import TokenRefresher, DEFAULT_TOKEN_REFRESH_LEAD_TIME, \
+    DEFAULT_TOKEN_REFRESH_JITTER
+from conjur.url_router import UrlRouter
 
 
 # pylint: disable=too-many-instance-attributes
 from conjur.resource import Resource
 
 
-class Api():
+def _reauthenticate_on_unauthorized(method):
+    """
+    Decorates an Api method that sends the API token so that it is retried
+    once with a new token when the server rejects the current one, e.g.
+    because it was revoked or the token cache held a stale one
+    """
+    # pylint: disable=protected-access
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except Exception as error: # pylint: disable=broad-except
+            # Without credentials there is no way to get another token
+            if not is_unauthorized(error) or not self.login_id or not self.api_key:
+                raise
+            rejected_token = getattr(self._used_api_token, 'value', self._api_token)
+
+        with self._api_token_lock:
+            # Another request may have already replaced the rejected token
+            if self._api_token == rejected_token:
+                logging.debug("API token was rejected. Authenticating again...")
+                self._fetch_api_token()
+
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class Api(BaseApi):
     """
     This module provides a high-level programmatic access to the HTTP API
     when all the needed arguments and parameters are well-known
     """
 
-    # Tokens should only be reused for 5 minutes (max lifetime is 8 minutes)
-    API_TOKEN_DURATION = 5
+    DEFAULT_BATCH_MAX_WORKERS = 4
+    # Variables are set with one request each so bulk sets keep several in
+    # flight. This stays within the default connection pool size.
+    DEFAULT_BULK_SET_MAX_WORKERS = 8
 
-    KIND_VARIABLE = 'variable'
-    SECRET_ID_FORMAT = '{account}:{kind}:{id}'
-    SECRET_ID_RETURN_PREFIX = '{account}:{kind}:'
+    DEFAULT_RESOURCES_PAGE_SIZE = 100
+    STREAM_CHUNK_SIZE = 64 * 1024
 
-    _api_token = None
+    _token_refresher = None
 
     # We explicitly want to enumerate all params needed to instantiate this
     # class but this might not be needed in the future
@@ -47,7 +89,18 @@ class Api():
                  login_id=None,
                  plugins=None,
                  ssl_verify=True,
-                 url=None):
+                 url=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 keep_alive=True,
+                 batch_max_url_length=BaseApi.DEFAULT_BATCH_MAX_URL_LENGTH,
+                 batch_max_workers=DEFAULT_BATCH_MAX_WORKERS,
+                 token_cache=None,
+                 read_urls=None,
+                 timeout=None,
+                 retry_policy=None,
+                 circuit_breaker=None,
+                 hedge_policy=None):
 
         self._url = url
         self._ca_bundle = ca_bundle
@@ -63,12 +116,48 @@ class Api():
         self.api_key = api_key
         self.login_id = login_id
 
+        self._batch_max_url_length = batch_max_url_length
+        self._batch_max_workers = batch_max_workers
+
         self.api_token_expiration = None
+        # Optional TokenCache shared with other processes
+        self._token_cache = token_cache
+
+        # Guards the token refresh so that concurrent callers that find the
+        # token expired share a single authentication request
+        self._api_token_lock = threading.Lock()
+        # The token last sent by each thread
+        self._used_api_token = threading.local()
+        self._token_refresh_stats = {
+            'refreshes': 0,
+            'coalesced_waiters': 0,
+        }
 
         self._default_params = {
             'url': url,
             'account': account
         }
+        # Reads can be served by other nodes (e.g. followers) than the leader
+        # at 'url', which handles all the other requests
+        self._router = UrlRouter(url, read_urls)
+        # Optional HedgePolicy of variable reads. Its pool is only started
+        # by the first hedged read.
+        self._hedge_policy = hedge_policy
+        self._hedge_executor = None
+        self._hedge_executor_lock = threading.Lock()
+
+        # All requests made by this instance share a single pooled session
+        # so that the TCP/TLS connection to the server is reused
+        # Without a timeout, a retry policy or a circuit breaker, requests wait
+        # forever and are always sent, as they did before these were configurable
+        session_options = {name: value for name, value in (('timeout', timeout),
+                                                           ('retry_policy', retry_policy),
+                                                           ('circuit_breaker', circuit_breaker))
+                           if value is not None}
+        self._session = create_session(pool_connections=pool_connections,
+                                       pool_maxsize=pool_maxsize,
+                                       keep_alive=keep_alive,
+                                       **session_options)
 
         # WARNING: ONLY FOR DEBUGGING - DO NOT CHECK IN LINES BELOW UNCOMMENTED
         # from .http import enable_http_logging
@@ -81,14 +170,98 @@ class Api():
     @property
     # pylint: disable=missing-docstring
     def api_token(self):
-        if not self._api_token or datetime.now() > self.api_token_expiration:
+        api_token = self._valid_api_token()
+        # Remembered so that a request whose token is rejected can tell
+        # whether the token was already replaced since
+        self._used_api_token.value = api_token
+        return api_token
+
+    def _valid_api_token(self):
+        if self._is_api_token_valid():
+            logging.debug("Using cached API token...")
+            return self._api_token
+
+        with self._api_token_lock:
+            # Another thread may have refreshed the token while we were
+            # waiting on the lock in which case we reuse its result
+            if self._is_api_token_valid():
+                logging.debug("Using API token refreshed by a concurrent request...")
+                self._token_refresh_stats['coalesced_waiters'] += 1
+                return self._api_token
+
             logging.debug("API token missing or expired. Fetching new one...")
-            self.api_token_expiration = datetime.now() + timedelta(minutes=self.API_TOKEN_DURATION)
-            self._api_token = self.authenticate()
+            return self._fetch_api_token(reuse_cached=True)
 
-            return self._api_token
+    def refresh_api_token(self):
+        """
+        This method fetches a new API token regardless of whether the
+        cached one is still valid
+        """
+        with self._api_token_lock:
+            logging.debug("Refreshing API token...")
+            return self._fetch_api_token()
+
+    def start_token_refresher(self, lead_time=DEFAULT_TOKEN_REFRESH_LEAD_TIME,
+                              jitter=DEFAULT_TOKEN_REFRESH_JITTER):
+        """
+        This method starts renewing the API token in the background lead_time
+        seconds (minus a random jitter of up to jitter seconds) before it
+        expires so that requests do not have to wait on authentication
+        """
+        if self._token_refresher is not None:
+            return
+
+        self._token_refresher = TokenRefresher(self, lead_time=lead_time, jitter=jitter)
+        self._token_refresher.start()
+
+    def stop_token_refresher(self):
+        """
+        This method stops the background API token refresh if it is running
+        """
+        if self._token_refresher is None:
+            return
+
+        self._token_refresher.stop()
+        self._token_refresher = None
+
+    @property
+    def token_refresh_stats(self):
+        """
+        Counters of how many times the API token was fetched and how many
+        concurrent callers waited on, and reused, an in-flight refresh
+        """
+        with self._api_token_lock:
+            return dict(self._token_refresh_stats)
+
+    def _fetch_api_token(self, reuse_cached=False):
+        # Callers must hold self._api_token_lock
+        if self._token_cache is None:
+            return self._authenticate_api_token()
+
+        # The token cache stays locked while authenticating so that
+        # concurrent processes share a single authentication request
+        token_cache_key = self._token_cache.key(self._url, self._account, self.login_id)
+        with self._token_cache.lock():
+            cached_token = self._token_cache.get(token_cache_key) if reuse_cached else None
+            if cached_token is not None:
+                logging.debug("Using API token from the token cache...")
+                api_token, self.api_token_expiration = cached_token
+                self._api_token = api_token
+                return self._api_token
+
+            api_token = self._authenticate_api_token()
+            self._token_cache.set(token_cache_key, api_token, self.api_token_expiration)
+            return api_token
+
+    def _authenticate_api_token(self):
+        api_token_expiration = datetime.now() + timedelta(minutes=self.API_TOKEN_DURATION)
+        api_token = self.authenticate()
+        # The expiration is set before the token is published since the
+        # token is checked without the lock and then its expiration
+        self.api_token_expiration = api_token_expiration
+        self._api_token = api_token
+        self._token_refresh_stats['refreshes'] += 1
 
-        logging.debug("Using cached API token...")
         return self._api_token
 
     def login(self, login_id=None, password=None):
@@ -105,7 +278,8 @@ class Api():
         logging.debug("Logging in to %s...", self._url)
         self.api_key = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.LOGIN,
                                        self._default_params, auth=(login_id, password),
-                                       ssl_verify=self._ssl_verify).text
+                                       ssl_verify=self._ssl_verify,
+                                       session=self._session).text
         self.login_id = login_id
 
         return self.api_key
@@ -127,30 +301,15 @@ class Api():
 
         logging.debug("Authenticating to %s...", self._url)
         return invoke_endpoint(HttpVerb.POST, ConjurEndpoint.AUTHENTICATE, params,
-                               self.api_key, ssl_verify=self._ssl_verify).text
+                               self.api_key, ssl_verify=self._ssl_verify,
+                               session=self._session).text
 
-    def resources_list(self, list_constraints=None):
+    def resources_list(self, list_constraints=None, timeout=None):
         """
         This method is used to fetch all available resources for the current
         account. Results are returned as an array of identifiers.
         """
-        params = {
-            'account': self._account
-        }
-        params.update(self._default_params)
-        if list_constraints is not None:
-            json_response = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.RESOURCES,
-                                            params,
-                                            query=list_constraints,
-                                            api_token=self.api_token,
-                                            ssl_verify=self._ssl_verify).content
-        else:
-            json_response = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.RESOURCES,
-                                params,
-                                api_token=self.api_token,
-                                ssl_verify=self._ssl_verify).content
-
-        resources = json.loads(json_response.decode('utf-8'))
+        resources = self._fetch_resources(list_constraints, **self._timeout_option(timeout))
 
         # Returns the result as a list of resource ids instead of the raw JSON only
         # when the user does not provide `inspect` as one of their filters
@@ -163,7 +322,162 @@ class Api():
         # https://docs.conjur.org/Latest/en/Content/Developer/Conjur_API_List_Resources.htm?tocpath=Developer%7CREST%C2%A0APIs%7C_____17
         return resources
 
-    def get_variable(self, variable_id, version=None):
+    def iter_resources(self, list_constraints=None, page_size=DEFAULT_RESOURCES_PAGE_SIZE,
+                       prefetch=0, timeout=None):
+        """
+        This method lazily yields the resources that resources_list would return
+        by fetching them page by page, so that only a bounded number of resources
+        are held in memory at a time. A 'limit' or 'offset' in the constraints are
+        applied to the whole listing rather than to each page.
+
+        When prefetch is set, up to that many page requests are kept in flight
+        ahead of the consumer so that the network waits overlap.
+        """
+        if page_size < 1:
+            raise ValueError("Error: Page size must be at least 1")
+
+        inspect = list_constraints is None or 'inspect' in list_constraints
+        page_constraints = dict(list_constraints or {})
+        offset = int(page_constraints.pop('offset', None) or 0)
+        remaining = page_constraints.pop('limit', None)
+        remaining = int(remaining) if remaining else None
+
+        page_bounds = self._resource_page_bounds(offset, remaining, page_size)
+        if prefetch:
+            pages = self._prefetch_resource_pages(page_constraints, page_bounds, prefetch,
+                                                  timeout)
+        else:
+            pages = self._fetch_resource_pages(page_constraints, page_bounds, timeout)
+
+        for page in pages:
+            for resource in page:
+                yield resource if inspect else resource['id']
+
+    @staticmethod
+    def _resource_page_bounds(offset, remaining, page_size):
+        """
+        Yields the (offset, limit) of consecutive pages
+        """
+        while remaining is None or remaining > 0:
+            limit = page_size if remaining is None else min(page_size, remaining)
+            yield offset, limit
+
+            offset += limit
+            if remaining is not None:
+                remaining -= limit
+
+    def _fetch_resource_pages(self, page_constraints, page_bounds, timeout=None):
+        for offset, limit in page_bounds:
+            page = self._fetch_resources({**page_constraints, 'offset': offset, 'limit': limit},
+                                         **self._timeout_option(timeout))
+            yield page
+
+            # A short page means that there are no more resources to fetch
+            if len(page) < limit:
+                return
+
+    def _prefetch_resource_pages(self, page_constraints, page_bounds, prefetch, timeout=None):
+        executor = ThreadPoolExecutor(max_workers=prefetch)
+        in_flight = deque()
+
+        def fetch_next_page():
+            for offset, limit in page_bounds:
+                future = executor.submit(self._fetch_resources,
+                                         {**page_constraints, 'offset': offset, 'limit': limit},
+                                         **self._timeout_option(timeout))
+                in_flight.append((limit, future))
+                return True
+            return False
+
+        try:
+            # Most listings fit in a single page so the first page is fetched
+            # alone and the next ones are only prefetched once it is full
+            fetch_next_page()
+
+            while in_flight:
+                limit, future = in_flight.popleft()
+                page = future.result()
+                yield page
+
+                # A short page means that there are no more resources to fetch
+                if len(page) < limit:
+                    return
+
+                while len(in_flight) < prefetch and fetch_next_page():
+                    pass
+        finally:
+            # Pages requested past the end of the listing are not needed
+            for _, future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def stream_resources(self, list_constraints=None, timeout=None):
+        """
+        This method lazily yields the resources that resources_list would return
+        from a single request, parsing them one by one from the response stream
+        so that the whole response never has to be held in memory at once.
+        """
+        response = self._open_resources_stream(list_constraints, timeout)
+
+        inspect = list_constraints is None or 'inspect' in list_constraints
+        try:
+            for resource in iter_json_array(
+                    response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE)):
+                yield resource if inspect else resource['id']
+        finally:
+            response.close()
+
+    @_reauthenticate_on_unauthorized
+    def _open_resources_stream(self, list_constraints=None, timeout=None):
+        """
+        Sends the request of stream_resources and returns its response, whose
+        body is not read yet. This is kept out of the generator so that the
+        request is sent again with a new token if the token is rejected.
+        """
+        params = {
+            'account': self._account
+        }
+        # The token is fetched from the leader before a read URL is picked
+        api_token = self.api_token
+        with self._read_params() as read_params:
+            params.update(read_params)
+            return invoke_endpoint(HttpVerb.GET, ConjurEndpoint.RESOURCES,
+                                   params,
+                                   query=list_constraints,
+                                   api_token=api_token,
+                                   ssl_verify=self._ssl_verify,
+                                   session=self._session,
+                                   stream=True,
+                                   **self._timeout_option(timeout))
+
+    @_reauthenticate_on_unauthorized
+    def _fetch_resources(self, list_constraints=None, timeout=None):
+        params = {
+            'account': self._account
+        }
+        api_token = self.api_token
+        with self._read_params() as read_params:
+            params.update(read_params)
+            if list_constraints is not None:
+                json_response = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.RESOURCES,
+                                                params,
+                                                query=list_constraints,
+                                                api_token=api_token,
+                                                ssl_verify=self._ssl_verify,
+                                                session=self._session,
+                                                **self._timeout_option(timeout)).content
+            else:
+                json_response = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.RESOURCES,
+                                    params,
+                                    api_token=api_token,
+                                    ssl_verify=self._ssl_verify,
+                                    session=self._session,
+                                    **self._timeout_option(timeout)).content
+
+        return json.loads(json_response.decode('utf-8'))
+
+    @_reauthenticate_on_unauthorized
+    def get_variable(self, variable_id, version=None, timeout=None):
         """
         This method is used to fetch a secret's (aka "variable") value from
         Conjur vault.
@@ -172,7 +486,6 @@ class Api():
             'kind': self.KIND_VARIABLE,
             'identifier': variable_id,
         }
-        params.update(self._default_params)
 
         query_params = {}
         if version is not None:
@@ -180,20 +493,81 @@ class Api():
                 'version': version
             }
 
-        # pylint: disable=no-else-return
+        api_token = self.api_token
+
+        def read(read_params):
+            # pylint: disable=no-else-return
+            if version is not None:
+                return invoke_endpoint(HttpVerb.GET, ConjurEndpoint.SECRETS,
+                                       dict(params, **read_params),
+                                       api_token=api_token, query=query_params,
+                                       ssl_verify=self._ssl_verify,
+                                       session=self._session,
+                                       **self._timeout_option(timeout)).content
+            else:
+                return invoke_endpoint(HttpVerb.GET, ConjurEndpoint.SECRETS,
+                                       dict(params, **read_params),
+                                       api_token=api_token,
+                                       ssl_verify=self._ssl_verify,
+                                       session=self._session,
+                                       **self._timeout_option(timeout)).content
+
+        return self._read(self._read_params, read, hedge=True)
+
+    @_reauthenticate_on_unauthorized
+    def stream_variable(self, variable_id, output_file, version=None, timeout=None):
+        """
+        This method is used to write a secret's (aka "variable") value to a
+        binary file object in chunks as it is received. The value is neither
+        decoded nor held in memory as a whole, so it is safe for large and
+        binary secrets. Returns the number of bytes written.
+        """
+        params = {
+            'kind': self.KIND_VARIABLE,
+            'identifier': variable_id,
+        }
+
+        query_params = None
         if version is not None:
-            return invoke_endpoint(HttpVerb.GET, ConjurEndpoint.SECRETS, params,
-                                   api_token=self.api_token, query=query_params,
-                                   ssl_verify=self._ssl_verify).content
-        else:
-            return invoke_endpoint(HttpVerb.GET, ConjurEndpoint.SECRETS, params,
-                                   api_token=self.api_token,
-                                   ssl_verify=self._ssl_verify).content
+            query_params = {
+                'version': version
+            }
 
-    def get_variables(self, *variable_ids):
+        api_token = self.api_token
+        with self._read_params() as read_params:
+            params.update(read_params)
+            response = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.SECRETS, params,
+                                       api_token=api_token, query=query_params,
+                                       ssl_verify=self._ssl_verify,
+                                       session=self._session,
+                                       stream=True,
+                                       **self._timeout_option(timeout))
+
+        written_bytes = 0
+        try:
+            for chunk in response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE):
+                output_file.write(chunk)
+                written_bytes += len(chunk)
+        finally:
+            response.close()
+
+        return written_bytes
+
+    @_reauthenticate_on_unauthorized
+    def get_variables(self, *variable_ids, timeout=None):
         """
         This method is used to fetch multiple secret's (aka "variable") values from
-        Conjur vault.
+        Conjur vault. Batches that would not fit in a single URL are split into
+        chunks that are fetched concurrently. If only some of the chunks fail,
+        PartialBatchFailureException is raised with the values that were fetched.
+        """
+        return self._get_variables(variable_ids, self._read_params, timeout, hedge=True)
+
+    def _get_variables(self, variable_ids, request_params, timeout=None, hedge=False):
+        """
+        Fetches the variables with batch requests. request_params returns a
+        context manager that yields the params of a request, including the URL
+        it is sent to. With hedge, the requests may be hedged (see _read).
         """
         assert variable_ids, 'Variable IDs must not be empty!'
 
@@ -202,30 +576,147 @@ class Api():
             full_variable_ids.append(self.SECRET_ID_FORMAT.format(account=self._account,
                                                                   kind=self.KIND_VARIABLE,
                                                                   id=variable_id))
+
+        chunks = self._chunk_variable_ids(full_variable_ids)
+        if len(chunks) == 1:
+            return self._remove_variable_id_prefix(self._get_variables_chunk(chunks[0],
+                                                                             request_params,
+                                                                             timeout=timeout,
+                                                                             hedge=hedge))
+
+        # pylint: disable=logging-fstring-interpolation
+        logging.debug(f"Fetching {len(full_variable_ids)} variables in {len(chunks)} chunks...")
+        # Make sure the token is fetched once instead of by every chunk
+        api_token = self.api_token
+
+        variable_map = {}
+        errors = {}
+        first_error = None
+        with ThreadPoolExecutor(max_workers=min(self._batch_max_workers, len(chunks))) as executor:
+            futures = [(chunk, executor.submit(self._get_variables_chunk, chunk,
+                                               request_params, api_token, timeout, hedge))
+                       for chunk in chunks]
+            for chunk, future in futures:
+                try:
+                    variable_map.update(future.result())
+                # pylint: disable=broad-except
+                except Exception as error:
+                    first_error = first_error or error
+                    for full_variable_id in chunk:
+                        errors[full_variable_id] = error
+
+        # Like a batch that fits in a single request, a batch that entirely
+        # failed raises its error as is
+        if len(errors) == len(full_variable_ids):
+            raise first_error
+
+        if errors:
+            raise PartialBatchFailureException(self._remove_variable_id_prefix(variable_map),
+                                               self._remove_variable_id_prefix(errors))
+
+        return self._remove_variable_id_prefix(variable_map)
+
+    def _get_variables_chunk(self, full_variable_ids, request_params, api_token=None,
+                             timeout=None, hedge=False):
         query_params = {
             'variable_ids': ','.join(full_variable_ids),
         }
 
-        json_response = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.BATCH_SECRETS,
-                                        self._default_params,
-                                        api_token=self.api_token,
-                                        ssl_verify=self._ssl_verify,
-                                        query=query_params,
-                                        ).content
+        api_token = api_token or self.api_token
 
-        variable_map = json.loads(json_response.decode('utf-8'))
+        def read(params):
+            return invoke_endpoint(HttpVerb.GET, ConjurEndpoint.BATCH_SECRETS,
+                                   params,
+                                   api_token=api_token,
+                                   ssl_verify=self._ssl_verify,
+                                   session=self._session,
+                                   query=query_params,
+                                   **self._timeout_option(timeout)).content
 
-        # Remove the 'account:variable:' prefix from result's variable names
-        remapped_keys_dict = {}
-        prefix_length = len(self.SECRET_ID_RETURN_PREFIX.format(account=self._account,
-                                                                kind=self.KIND_VARIABLE))
-        for variable_name, variable_value in variable_map.items():
-            new_variable_name = variable_name[prefix_length:]
-            remapped_keys_dict[new_variable_name] = variable_value
+        json_response = self._read(request_params, read, hedge)
+        return json.loads(json_response.decode('utf-8'))
 
-        return remapped_keys_dict
+    def _read(self, request_params, send, hedge=False):
+        """
+        Returns the result of send called with the params yielded by
+        request_params. With hedge, the read is hedged across the read URLs
+        instead when a hedge policy is set and there is more than one read URL.
+        """
+        if not hedge or self._hedge_policy is None or len(self._router.read_urls) < 2:
+            with request_params() as params:
+                return send(params)
+
+        return self._hedged_read(send)
 
-    def set_variable(self, variable_id, value):
+    def _hedged_read(self, send):
+        """
+        Sends the read from the hedge pool and, if it has not answered within
+        the hedge delay, sends it again to another read URL. Returns the first
+        result or raises the error of the first read if both failed.
+        """
+        hedge_policy = self._hedge_policy
+        hedge_policy.budget.deposit()
+        read_urls = []
+
+        def read(exclude=None):
+            with self._read_params(exclude) as params:
+                read_urls.append(params['url'])
+                started_at = time.monotonic()
+                result = send(params)
+            hedge_policy.record(time.monotonic() - started_at)
+            return result
+
+        executor = self._get_hedge_executor()
+        first_read = executor.submit(read)
+        done, _ = wait([first_read], timeout=hedge_policy.delay())
+        if done or not hedge_policy.budget.withdraw():
+            return first_read.result()
+
+        logging.debug("Read is slower than usual. Hedging it to another read URL...")
+        # The first read may still be waiting for a worker, in which case
+        # any other read URL will do
+        pending = {first_read, executor.submit(read, read_urls[0] if read_urls else None)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # A read that was already sent cannot be interrupted so
+                    # its result is dropped when it completes
+                    for slower_read in pending:
+                        slower_read.cancel()
+                    return future.result()
+
+        return first_read.result()
+
+    def _get_hedge_executor(self):
+        with self._hedge_executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self._hedge_policy.max_workers,
+                    thread_name_prefix='conjur-hedged-read')
+            return self._hedge_executor
+
+    @contextmanager
+    def _leader_params(self):
+        """
+        Yields the default params, which send a read to the leader
+        """
+        yield dict(self._default_params)
+
+    @staticmethod
+    def _is_server_failure(error):
+        return is_server_failure(error)
+
+    @staticmethod
+    def _timeout_option(timeout):
+        """
+        Returns the invoke_endpoint option of a per-call timeout, which is only
+        passed when set so that the session's default timeout applies otherwise
+        """
+        return {} if timeout is None else {'timeout': timeout}
+
+    @_reauthenticate_on_unauthorized
+    def set_variable(self, variable_id, value, timeout=None):
         """
         This method is used to set a secret (aka "variable") to a value of
         your choosing.
@@ -239,9 +730,111 @@ class Api():
 
         return invoke_endpoint(HttpVerb.POST, ConjurEndpoint.SECRETS, params,
                                value, api_token=self.api_token,
-                               ssl_verify=self._ssl_verify).text
+                               ssl_verify=self._ssl_verify,
+                               session=self._session,
+                               **self._timeout_option(timeout)).text
 
-    def _load_policy_file(self, policy_id, policy_file, http_verb):
+    def set_variables(self, variables, max_workers=DEFAULT_BULK_SET_MAX_WORKERS,
+                      skip_unchanged=False, timeout=None):
+        """
+        This method is used to set many secrets (aka "variables") at once. The
+        variables are a dictionary or an iterable of (variable_id, value) pairs
+        and up to max_workers of them are set concurrently. Returns the IDs of
+        the variables that were set. If only some of them could be set,
+        PartialBatchFailureException is raised with the IDs that were set and
+        the errors of the others.
+
+        With skip_unchanged, the current values are read first and variables
+        that already hold their value are not set, so that no new version is
+        created for them. They are neither in the returned IDs nor in the errors.
+        """
+        if isinstance(variables, dict):
+            variables = variables.items()
+        variables = list(variables)
+        if skip_unchanged and variables:
+            variables = self._drop_unchanged_variables(variables, **self._timeout_option(timeout))
+        if not variables:
+            return []
+
+        # pylint: disable=logging-fstring-interpolation
+        logging.debug(f"Setting {len(variables)} variables with up to {max_workers} workers...")
+        set_variable_ids = []
+        errors = {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(variables))) as executor:
+            futures = [(variable_id, executor.submit(self.set_variable, variable_id, value,
+                                                     **self._timeout_option(timeout)))
+                       for variable_id, value in variables]
+            for variable_id, future in futures:
+                try:
+                    future.result()
+                    set_variable_ids.append(variable_id)
+                # pylint: disable=broad-except
+                except Exception as error:
+                    errors[variable_id] = error
+
+        if errors:
+            raise PartialBatchFailureException(set_variable_ids, errors)
+
+        return set_variable_ids
+
+    def _drop_unchanged_variables(self, variables, timeout=None):
+        """
+        Returns the variables whose value differs from the one that is stored.
+        The stored values are read with batch requests from the leader since
+        read URLs may lag behind it. Variables whose value could not be read
+        are always set.
+        """
+        variable_ids = list(dict.fromkeys(variable_id for variable_id, _ in variables))
+        current_values = self._read_current_values(variable_ids, timeout)
+
+        changed_variables = [(variable_id, value) for variable_id, value in variables
+                             if not self._is_same_value(current_values.get(variable_id), value)]
+        # pylint: disable=logging-fstring-interpolation
+        logging.debug(f"Skipping {len(variables) - len(changed_variables)} unchanged variables...")
+        return changed_variables
+
+    def _read_current_values(self, variable_ids, timeout=None):
+        """
+        Returns the stored values of the variables. The server fails a whole
+        batch if one of its variables has no value yet, e.g. because it was
+        just added, so the variables of a batch that failed are read again in
+        halves until the variables without a value are left out. Reading
+        stops when the server itself fails.
+        """
+        try:
+            return self._get_variables(variable_ids, self._leader_params,
+                                       **self._timeout_option(timeout))
+        except PartialBatchFailureException as partial_failure:
+            current_values = dict(partial_failure.results)
+            errors = partial_failure.errors
+        # pylint: disable=broad-except
+        except Exception as error:
+            current_values = {}
+            errors = dict.fromkeys(variable_ids, error)
+
+        unread_variable_ids = list(errors)
+        if len(unread_variable_ids) < 2 or \
+                any(self._is_server_failure(error) for error in errors.values()):
+            # pylint: disable=logging-fstring-interpolation
+            logging.debug(f"Failed to read the current values of {len(errors)} variables")
+            return current_values
+
+        middle = len(unread_variable_ids) // 2
+        for half in (unread_variable_ids[:middle], unread_variable_ids[middle:]):
+            current_values.update(self._read_current_values(half, timeout))
+        return current_values
+
+    @staticmethod
+    def _is_same_value(current_value, value):
+        # Batch reads return the values decoded from UTF-8
+        if current_value is None:
+            return False
+        if isinstance(value, bytes):
+            return current_value.encode('utf-8') == value
+        return current_value == value
+
+    @_reauthenticate_on_unauthorized
+    def _load_policy_file(self, policy_id, policy_file, http_verb, timeout=None):
         """
         This method is used to load, replace or update a file-based policy into the desired
         name.
@@ -258,36 +851,39 @@ class Api():
 
         json_response = invoke_endpoint(http_verb, ConjurEndpoint.POLICIES, params,
                                         policy_data, api_token=self.api_token,
-                                        ssl_verify=self._ssl_verify).text
+                                        ssl_verify=self._ssl_verify,
+                                        session=self._session,
+                                        **self._timeout_option(timeout)).text
 
         policy_changes = json.loads(json_response)
         return policy_changes
 
-    def load_policy_file(self, policy_id, policy_file):
+    def load_policy_file(self, policy_id, policy_file, timeout=None):
         """
         This method is used to load a file-based policy into the desired
         name.
         """
 
-        return self._load_policy_file(policy_id, policy_file, HttpVerb.POST)
+        return self._load_policy_file(policy_id, policy_file, HttpVerb.POST, timeout)
 
-    def replace_policy_file(self, policy_id, policy_file):
+    def replace_policy_file(self, policy_id, policy_file, timeout=None):
         """
         This method is used to replace a file-based policy into the desired
         policy ID.
         """
 
-        return self._load_policy_file(policy_id, policy_file, HttpVerb.PUT)
+        return self._load_policy_file(policy_id, policy_file, HttpVerb.PUT, timeout)
 
-    def update_policy_file(self, policy_id, policy_file):
+    def update_policy_file(self, policy_id, policy_file, timeout=None):
         """
         This method is used to update a file-based policy into the desired
         policy ID.
         """
 
-        return self._load_policy_file(policy_id, policy_file, HttpVerb.PATCH)
+        return self._load_policy_file(policy_id, policy_file, HttpVerb.PATCH, timeout)
 
-    def rotate_other_api_key(self, resource: Resource):
+    @_reauthenticate_on_unauthorized
+    def rotate_other_api_key(self, resource: Resource, timeout=None):
         """
         This method is used to rotate a user/host's API key that is not the current user.
         To rotate API key of the current user use rotate_personal_api_key
@@ -303,10 +899,12 @@ class Api():
                                    self._default_params,
                                    api_token=self.api_token,
                                    ssl_verify=self._ssl_verify,
-                                   query=query_params).text
+                                   session=self._session,
+                                   query=query_params,
+                                   **self._timeout_option(timeout)).text
         return response
 
-    def rotate_personal_api_key(self, logged_in_user, current_password):
+    def rotate_personal_api_key(self, logged_in_user, current_password, timeout=None):
         """
         This method is used to rotate a personal API key
         """
@@ -314,10 +912,13 @@ class Api():
                                    self._default_params,
                                    api_token=self.api_token,
                                    auth=(logged_in_user, current_password),
-                                   ssl_verify=self._ssl_verify).text
+                                   ssl_verify=self._ssl_verify,
+                                   session=self._session,
+                                   **self._timeout_option(timeout)).text
         return response
 
-    def change_personal_password(self, logged_in_user, current_password, new_password):
+    def change_personal_password(self, logged_in_user, current_password, new_password,
+                                 timeout=None):
         """
         This method is used to change own password
         """
@@ -326,17 +927,33 @@ class Api():
                                    new_password,
                                    api_token=self.api_token,
                                    auth=(logged_in_user, current_password),
-                                   ssl_verify=self._ssl_verify
-                                   ).text
+                                   ssl_verify=self._ssl_verify,
+                                   session=self._session,
+                                   **self._timeout_option(timeout)).text
         return response
 
-    def whoami(self):
+    @_reauthenticate_on_unauthorized
+    def whoami(self, timeout=None):
         """
         This method provides dictionary of information about the user making an API request.
         """
-        json_response = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.WHOAMI,
-                                        self._default_params,
-                                        api_token=self.api_token,
-                                        ssl_verify=self._ssl_verify).content
+        api_token = self.api_token
+        with self._read_params() as read_params:
+            json_response = invoke_endpoint(HttpVerb.GET, ConjurEndpoint.WHOAMI,
+                                            read_params,
+                                            api_token=api_token,
+                                            ssl_verify=self._ssl_verify,
+                                            session=self._session,
+                                            **self._timeout_option(timeout)).content
 
         return json.loads(json_response.decode('utf-8'))
+
+    def close(self):
+        """
+        This method stops the background token refresh, if any, and releases
+        the pooled connections held by this instance
+        """
+        self.stop_token_refresher()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        self._session.close()
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+
+"""
+AsyncApi module
+
+Provides a non-blocking, asyncio-based interface for programmatic API
+interactions. Requires the optional 'aiohttp' dependency
+(pip install conjur-client[async])
+"""
+# Builtins
+import asyncio
+import json
+import logging
+import ssl
+from datetime import datetime, timedelta
+
+# Third party
+import aiohttp
+
+# Internals
+from conjur.base_api import BaseApi
+from conjur.endpoints import ConjurEndpoint
+from conjur.errors import PartialBatchFailureException
+from conjur.http_wrapper import HttpVerb, build_url, build_headers, DEFAULT_POOL_MAXSIZE
+from conjur.resource import Resource
+from conjur.url_router import UrlRouter
+
+
+# pylint: disable=too-many-instance-attributes
+class AsyncApi(BaseApi):
+    """
+    This module provides the same high-level programmatic access to the HTTP API
+    as conjur.api.Api but every request is a coroutine that does not block
+    the event loop
+    """
+
+    # pylint: disable=unused-argument,too-many-arguments
+    def __init__(self,
+                 account='default',
+                 api_key=None,
+                 ca_bundle=None,
+                 http_debug=False,
+                 login_id=None,
+                 password=None,
+                 plugins=None,
+                 ssl_verify=True,
+                 url=None,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 keep_alive=True,
+                 batch_max_url_length=BaseApi.DEFAULT_BATCH_MAX_URL_LENGTH,
+                 read_urls=None):
+
+        self._url = url
+
+        self._account = account
+        if not self._account:
+            raise RuntimeError("Account cannot be empty!")
+
+        self._ssl_context = ssl_verify
+        if ca_bundle:
+            self._ssl_context = ssl.create_default_context(cafile=ca_bundle)
+        elif ssl_verify is True:
+            # aiohttp uses its own default verification when 'None' is passed
+            self._ssl_context = None
+
+        self.api_key = api_key
+        self.login_id = login_id
+        # The password is exchanged for an API key on the first authentication
+        # since that cannot be awaited from the constructor
+        self._password = password
+
+        self._batch_max_url_length = batch_max_url_length
+        self._pool_maxsize = pool_maxsize
+        self._keep_alive = keep_alive
+
+        self.api_token_expiration = None
+
+        # Created lazily since both need a running event loop
+        self._session = None
+        self._api_token_lock = None
+
+        self._default_params = {
+            'url': url,
+            'account': account
+        }
+        # Reads can be served by other nodes (e.g. followers) than the leader
+        self._router = UrlRouter(url, read_urls)
+
+        # Sanity checks
+        if not self._url:
+            raise Exception("Error: API instantiation parameter 'url' cannot be empty!")
+
+    async def get_api_token(self):
+        """
+        This method returns the cached API token or fetches a new one if it
+        is missing or expired. Concurrent callers share a single fetch.
+        """
+        if self._is_api_token_valid():
+            logging.debug("Using cached API token...")
+            return self._api_token
+
+        if self._api_token_lock is None:
+            self._api_token_lock = asyncio.Lock()
+
+        async with self._api_token_lock:
+            # Another task may have refreshed the token while we were waiting
+            if self._is_api_token_valid():
+                return self._api_token
+
+            logging.debug("API token missing or expired. Fetching new one...")
+            api_token_expiration = datetime.now() + timedelta(minutes=self.API_TOKEN_DURATION)
+            self._api_token = await self.authenticate()
+            self.api_token_expiration = api_token_expiration
+
+            return self._api_token
+
+    async def login(self, login_id=None, password=None):
+        """
+        This method uses the basic auth login id (username) and password
+        to retrieve an api key from the server that can be later used to
+        retrieve short-lived api tokens.
+        """
+        if not login_id or not password:
+            raise RuntimeError("Missing parameters in login invocation!")
+
+        logging.debug("Logging in to %s...", self._url)
+        response = await self._invoke(HttpVerb.GET, ConjurEndpoint.LOGIN,
+                                      self._default_params, auth=(login_id, password))
+        self.api_key = response.decode('utf-8')
+        self.login_id = login_id
+        self._password = None
+
+        return self.api_key
+
+    async def authenticate(self):
+        """
+        Authenticate uses the api_key to fetch a short-lived api token that
+        for a limited time will allow you to interact fully with the Conjur
+        vault.
+        """
+        if not self.api_key and self._password:
+            await self.login(self.login_id, self._password)
+
+        if not self.login_id or not self.api_key:
+            raise RuntimeError("Missing parameters in authentication invocation!")
+
+        params = {
+            'login': self.login_id
+        }
+        params.update(self._default_params)
+
+        logging.debug("Authenticating to %s...", self._url)
+        response = await self._invoke(HttpVerb.POST, ConjurEndpoint.AUTHENTICATE, params,
+                                      self.api_key)
+        return response.decode('utf-8')
+
+    async def resources_list(self, list_constraints=None):
+        """
+        This method is used to fetch all available resources for the current
+        account. Results are returned as an array of identifiers.
+        """
+        params = {
+            'account': self._account
+        }
+
+        # The token is fetched from the leader before a read URL is picked
+        api_token = await self.get_api_token()
+        with self._read_params() as read_params:
+            params.update(read_params)
+            json_response = await self._invoke(HttpVerb.GET, ConjurEndpoint.RESOURCES, params,
+                                               query=list_constraints,
+                                               api_token=api_token)
+        resources = json.loads(json_response.decode('utf-8'))
+
+        if list_constraints is not None and 'inspect' not in list_constraints:
+            return [resource['id'] for resource in resources]
+
+        return resources
+
+    async def get_variable(self, variable_id, version=None):
+        """
+        This method is used to fetch a secret's (aka "variable") value from
+        Conjur vault.
+        """
+        params = {
+            'kind': self.KIND_VARIABLE,
+            'identifier': variable_id,
+        }
+
+        query_params = None
+        if version is not None:
+            query_params = {
+                'version': version
+            }
+
+        api_token = await self.get_api_token()
+        with self._read_params() as read_params:
+            params.update(read_params)
+            return await self._invoke(HttpVerb.GET, ConjurEndpoint.SECRETS, params,
+                                      query=query_params,
+                                      api_token=api_token)
+
+    async def get_variables(self, *variable_ids):
+        """
+        This method is used to fetch multiple secret's (aka "variable") values from
+        Conjur vault. Batches that would not fit in a single URL are split into
+        chunks that are fetched concurrently.
+        """
+        assert variable_ids, 'Variable IDs must not be empty!'
+
+        full_variable_ids = [self.SECRET_ID_FORMAT.format(account=self._account,
+                                                          kind=self.KIND_VARIABLE,
+                                                          id=variable_id)
+                             for variable_id in variable_ids]
+        chunks = self._chunk_variable_ids(full_variable_ids)
+        api_token = await self.get_api_token()
+
+        results = await asyncio.gather(*[self._get_variables_chunk(chunk, api_token)
+                                         for chunk in chunks],
+                                       return_exceptions=True)
+
+        variable_map = {}
+        errors = {}
+        first_error = None
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                first_error = first_error or result
+                errors.update({full_variable_id: result for full_variable_id in chunk})
+                continue
+            variable_map.update(result)
+
+        # Like a batch that fits in a single request, a batch that entirely
+        # failed raises its error as is
+        if len(errors) == len(full_variable_ids):
+            raise first_error
+
+        if errors:
+            raise PartialBatchFailureException(self._remove_variable_id_prefix(variable_map),
+                                               self._remove_variable_id_prefix(errors))
+
+        return self._remove_variable_id_prefix(variable_map)
+
+    async def _get_variables_chunk(self, full_variable_ids, api_token):
+        query_params = {
+            'variable_ids': ','.join(full_variable_ids),
+        }
+
+        with self._read_params() as read_params:
+            json_response = await self._invoke(HttpVerb.GET, ConjurEndpoint.BATCH_SECRETS,
+                                               read_params,
+                                               query=query_params,
+                                               api_token=api_token)
+        return json.loads(json_response.decode('utf-8'))
+
+    async def set_variable(self, variable_id, value):
+        """
+        This method is used to set a secret (aka "variable") to a value of
+        your choosing.
+        """
+        params = {
+            'kind': self.KIND_VARIABLE,
+            'identifier': variable_id,
+        }
+        params.update(self._default_params)
+
+        response = await self._invoke(HttpVerb.POST, ConjurEndpoint.SECRETS, params,
+                                      value, api_token=await self.get_api_token())
+        return response.decode('utf-8')
+
+    async def _load_policy_file(self, policy_id, policy_file, http_verb):
+        params = {
+            'identifier': policy_id,
+        }
+        params.update(self._default_params)
+
+        with open(policy_file, 'r') as content_file:
+            policy_data = content_file.read()
+
+        json_response = await self._invoke(http_verb, ConjurEndpoint.POLICIES, params,
+                                           policy_data, api_token=await self.get_api_token())
+        return json.loads(json_response.decode('utf-8'))
+
+    async def load_policy_file(self, policy_id, policy_file):
+        """
+        This method is used to load a file-based policy into the desired
+        name.
+        """
+        return await self._load_policy_file(policy_id, policy_file, HttpVerb.POST)
+
+    async def replace_policy_file(self, policy_id, policy_file):
+        """
+        This method is used to replace a file-based policy into the desired
+        policy ID.
+        """
+        return await self._load_policy_file(policy_id, policy_file, HttpVerb.PUT)
+
+    async def update_policy_file(self, policy_id, policy_file):
+        """
+        This method is used to update a file-based policy into the desired
+        policy ID.
+        """
+        return await self._load_policy_file(policy_id, policy_file, HttpVerb.PATCH)
+
+    async def rotate_other_api_key(self, resource: Resource):
+        """
+        This method is used to rotate a user/host's API key that is not the current user.
+        To rotate API key of the current user use rotate_personal_api_key
+        """
+        if resource.type not in ('user', 'host'):
+            raise Exception("Error: Invalid resource type")
+
+        query_params = {
+            'role': resource.full_id()
+        }
+        response = await self._invoke(HttpVerb.PUT, ConjurEndpoint.ROTATE_API_KEY,
+                                      self._default_params,
+                                      query=query_params,
+                                      api_token=await self.get_api_token())
+        return response.decode('utf-8')
+
+    async def rotate_personal_api_key(self, logged_in_user, current_password):
+        """
+        This method is used to rotate a personal API key
+        """
+        response = await self._invoke(HttpVerb.PUT, ConjurEndpoint.ROTATE_API_KEY,
+                                      self._default_params,
+                                      auth=(logged_in_user, current_password),
+                                      api_token=await self.get_api_token())
+        return response.decode('utf-8')
+
+    async def change_personal_password(self, logged_in_user, current_password, new_password):
+        """
+        This method is used to change own password
+        """
+        response = await self._invoke(HttpVerb.PUT, ConjurEndpoint.CHANGE_PASSWORD,
+                                      self._default_params,
+                                      new_password,
+                                      auth=(logged_in_user, current_password),
+                                      api_token=await self.get_api_token())
+        return response.decode('utf-8')
+
+    async def whoami(self):
+        """
+        This method provides dictionary of information about the user making an API request.
+        """
+        api_token = await self.get_api_token()
+        with self._read_params() as read_params:
+            json_response = await self._invoke(HttpVerb.GET, ConjurEndpoint.WHOAMI,
+                                               read_params,
+                                               api_token=api_token)
+        return json.loads(json_response.decode('utf-8'))
+
+    async def close(self):
+        """
+        This method releases the pooled connections held by this instance
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @staticmethod
+    def _is_server_failure(error):
+        if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+            return True
+
+        return isinstance(error, aiohttp.ClientResponseError) and error.status >= 500
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit_per_host=self._pool_maxsize,
+                                             force_close=not self._keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    # pylint: disable=too-many-arguments
+    async def _invoke(self, http_verb, endpoint, params, data=None, auth=None,
+                      api_token=None, query=None):
+        """
+        Invokes the endpoint and returns the raw response body. This is the
+        non-blocking counterpart of conjur.http_wrapper.invoke_endpoint
+        """
+        if auth is not None:
+            auth = aiohttp.BasicAuth(*auth)
+        if query is not None:
+            # aiohttp only accepts string query values
+            query = {key: str(value) for key, value in query.items()}
+
+        async with self._get_session().request(http_verb.name,
+                                               build_url(endpoint, params),
+                                               data=data,
+                                               params=query,
+                                               auth=auth,
+                                               headers=build_headers(api_token),
+                                               ssl=self._ssl_context) as response:
+            body = await response.read()
+            if response.status >= 400:
+                # pylint: disable=logging-fstring-interpolation
+                logging.debug(f"{response.status} {response.reason} "
+                              f"{body.decode('utf-8', errors='replace')}")
+                response.raise_for_status()
+
+            return body
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+"""
+AsyncClient module
+
+This module is used to setup an asyncio API client that will be used for
+interactions with the Conjur server. Requires the optional 'aiohttp'
+dependency (pip install conjur-client[async])
+"""
+
+# Builtins
+import logging
+
+# Internals
+from Utils.utils import Utils
+from conjur.async_api import AsyncApi
+from conjur.client import load_connection_config, load_netrc_credentials
+from conjur.resource import Resource
+
+
+class AsyncClient():
+    """
+    AsyncClient
+
+    This class is used to construct an asyncio client for API interaction.
+    It has the same surface as conjur.client.Client but every API method
+    is a coroutine.
+    """
+    _api = None
+
+    # pylint: disable=too-many-arguments
+    def __init__(self,
+                 account=None,
+                 api_key=None,
+                 ca_bundle=None,
+                 http_debug=False,
+                 login_id=None,
+                 password=None,
+                 ssl_verify=True,
+                 url=None,
+                 pool_maxsize=None,
+                 keep_alive=None,
+                 batch_max_url_length=None,
+                 read_urls=None):
+
+        if ssl_verify is False:
+            Utils.get_insecure_warning()
+
+        logging.debug("Initializing configuration...")
+
+        # The config file is only needed when some connection details are missing
+        use_config_file = not url or not login_id or (not password and not api_key)
+        loaded_config = load_connection_config(url, account, ca_bundle, use_config_file,
+                                               read_urls)
+
+        api_options = {
+            'pool_maxsize': pool_maxsize,
+            'keep_alive': keep_alive,
+            'batch_max_url_length': batch_max_url_length,
+        }
+        api_options = {name: value for name, value in api_options.items() if value is not None}
+
+        if api_key:
+            logging.debug("Using API key from parameters...")
+            credentials = {'login_id': login_id, 'api_key': api_key}
+        elif password:
+            logging.debug("API key will be created with login ID/password combo...")
+            credentials = {'login_id': login_id, 'password': password}
+        else:
+            loaded_netrc = load_netrc_credentials(loaded_config['url'])
+            credentials = {'login_id': loaded_netrc['login_id'],
+                           'api_key': loaded_netrc['api_key']}
+
+        self._api = AsyncApi(http_debug=http_debug,
+                             ssl_verify=ssl_verify,
+                             **credentials,
+                             **api_options,
+                             **loaded_config)
+
+        logging.debug("Async client initialized")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    ### API passthrough
+
+    async def whoami(self):
+        """
+        Provides dictionary of information about the user making an API request
+        """
+        return await self._api.whoami()
+
+    async def list(self, list_constraints=None):
+        """
+        Lists all available resources
+        """
+        return await self._api.resources_list(list_constraints)
+
+    async def get(self, variable_id, version=None):
+        """
+        Gets a variable value based on its ID
+        """
+        return await self._api.get_variable(variable_id, version)
+
+    async def get_many(self, *variable_ids):
+        """
+        Gets multiple variable values based on their IDs. Returns a
+        dictionary of mapped values.
+        """
+        return await self._api.get_variables(*variable_ids)
+
+    async def set(self, variable_id, value):
+        """
+        Sets a variable to a specific value based on its ID
+        """
+        await self._api.set_variable(variable_id, value)
+
+    async def load_policy_file(self, policy_name, policy_file):
+        """
+        Applies a file-based policy to the Conjur instance
+        """
+        return await self._api.load_policy_file(policy_name, policy_file)
+
+    async def replace_policy_file(self, policy_name, policy_file):
+        """
+        Replaces a file-based policy defined in the Conjur instance
+        """
+        return await self._api.replace_policy_file(policy_name, policy_file)
+
+    async def update_policy_file(self, policy_name, policy_file):
+        """
+        Replaces a file-based policy defined in the Conjur instance
+        """
+        return await self._api.update_policy_file(policy_name, policy_file)
+
+    async def rotate_other_api_key(self, resource: Resource):
+        """
+        Rotates a API keys and returns new API key
+        """
+        return await self._api.rotate_other_api_key(resource)
+
+    async def rotate_personal_api_key(self, logged_in_user, current_password):
+        """
+        Rotates personal API keys and returns new API key
+        """
+        return await self._api.rotate_personal_api_key(logged_in_user, current_password)
+
+    async def change_personal_password(self, logged_in_user, current_password, new_password):
+        """
+        Change personal password of logged-in user
+        """
+        # pylint: disable=line-too-long
+        return await self._api.change_personal_password(logged_in_user, current_password, new_password)
+
+    async def close(self):
+        """
+        Releases the pooled connections held by the client
+        """
+        await self._api.close()
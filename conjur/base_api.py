@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+BaseApi module
+
+Provides the logic that the synchronous and the asyncio-based APIs share
+since it only depends on the connection details and the token state
+"""
+# Builtins
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlencode
+
+# Internals
+from conjur.endpoints import ConjurEndpoint
+
+
+class BaseApi():
+    """
+    This class holds the constants and the helpers that conjur.api.Api and
+    conjur.async_api.AsyncApi share. Both set the token state, the default
+    params, the read URL router and the batch max URL length, and tell which
+    errors show that the server failed.
+    """
+
+    # Tokens should only be reused for 5 minutes (max lifetime is 8 minutes)
+    API_TOKEN_DURATION = 5
+
+    KIND_VARIABLE = 'variable'
+    SECRET_ID_FORMAT = '{account}:{kind}:{id}'
+    SECRET_ID_RETURN_PREFIX = '{account}:{kind}:'
+
+    # Batch requests are split so that no single URL exceeds this length since
+    # proxies and servers commonly reject URLs longer than a few kilobytes
+    DEFAULT_BATCH_MAX_URL_LENGTH = 4096
+
+    _api_token = None
+    api_token_expiration = None
+    _account = None
+    _default_params = None
+    _router = None
+    _batch_max_url_length = DEFAULT_BATCH_MAX_URL_LENGTH
+
+    def _is_api_token_valid(self):
+        return self._api_token and datetime.now() <= self.api_token_expiration
+
+    def _chunk_variable_ids(self, full_variable_ids):
+        """
+        Splits the variable IDs into chunks whose batch request URL stays within
+        the configured max URL length. The length is measured on the encoded URL
+        since that is what the server and any proxy on the way will see.
+        """
+        # Chunks may be sent to any of the read URLs so the longest one is assumed
+        longest_params = dict(self._default_params, url=max(self._router.read_urls, key=len))
+        base_length = len(ConjurEndpoint.BATCH_SECRETS.value.format(**longest_params)) \
+                      + len('?' + urlencode({'variable_ids': ''}))
+        separator_length = len(urlencode({'': ','})) - 1
+
+        chunks = []
+        chunk = []
+        chunk_length = base_length
+        for full_variable_id in full_variable_ids:
+            id_length = len(urlencode({'': full_variable_id})) - 1
+            if chunk:
+                id_length += separator_length
+
+            # A single ID that is too long on its own still gets its own chunk
+            if chunk and chunk_length + id_length > self._batch_max_url_length:
+                chunks.append(chunk)
+                chunk = []
+                chunk_length = base_length
+                id_length -= separator_length
+
+            chunk.append(full_variable_id)
+            chunk_length += id_length
+
+        chunks.append(chunk)
+        return chunks
+
+    @contextmanager
+    def _read_params(self, exclude=None):
+        """
+        Yields the default params with the URL that a read is sent to and
+        reports to the router how long the read took or whether the node failed.
+        The read is only sent to the excluded URL if there is no other read URL.
+        """
+        url = self._router.read_url(exclude)
+        started_at = time.monotonic()
+        failed = False
+        try:
+            yield dict(self._default_params, url=url)
+        except Exception as error:
+            failed = self._is_server_failure(error)
+            raise
+        finally:
+            self._router.report(url, time.monotonic() - started_at, failed)
+
+    def _remove_variable_id_prefix(self, variable_map):
+        """
+        Removes the 'account:variable:' prefix from the keys of the map
+        """
+        remapped_keys_dict = {}
+        prefix_length = len(self.SECRET_ID_RETURN_PREFIX.format(account=self._account,
+                                                                kind=self.KIND_VARIABLE))
+        for variable_name, variable_value in variable_map.items():
+            new_variable_name = variable_name[prefix_length:]
+            remapped_keys_dict[new_variable_name] = variable_value
+
+        return remapped_keys_dict
+
+    @staticmethod
+    def _is_server_failure(error):
+        """
+        Returns whether the error shows that the server failed rather than
+        the request
+        """
+        raise NotImplementedError
@@ -0,0 +1,8 @@
+"""
+Batch module
+
+This metafile includes all the functionality that will be exposed
+when you install this module
+"""
+from conjur.batch.batch_controller import BatchController
+from conjur.batch.batch_logic import BatchLogic
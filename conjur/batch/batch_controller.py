@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+BatchController module
+
+This module is the controller that facilitates all batch actions
+required to successfully execute the BATCH command
+"""
+
+# Builtins
+import json
+import logging
+import shlex
+import sys
+
+
+# pylint: disable=too-few-public-methods
+class BatchController:
+    """
+    BatchController
+
+    This class represents the Presentation Layer for the BATCH command.
+    Each operation is a CLI command on its own line. Empty lines and lines
+    starting with '#' are skipped. One JSON result is written per operation
+    as soon as it completes, referring to the operation by its line number
+    so that values passed on the line (e.g. with 'variable set') are not
+    echoed back.
+    """
+    def __init__(self, batch_logic, operations, parse_operation):
+        self.batch_logic = batch_logic
+        self.operations = operations
+        self.parse_operation = parse_operation
+
+    def load(self):
+        """
+        Method that executes the operations in order and writes their results.
+        Returns the number of operations that failed.
+        """
+        operation_count = 0
+        failed_count = 0
+        for line_number, line in enumerate(self.operations, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            operation_count += 1
+            result = {'line': line_number}
+            # pylint: disable=broad-except
+            try:
+                args = self.parse_operation(shlex.split(line))
+                result['result'] = self.batch_logic.execute(args)
+            except Exception as error:
+                # pylint: disable=logging-fstring-interpolation
+                logging.debug(f"Batch operation on line {line_number} failed: {error}")
+                failed_count += 1
+                result['error'] = str(error)
+
+            sys.stdout.write(f"{json.dumps(result)}\n")
+            sys.stdout.flush()
+
+        if failed_count:
+            # Written to stderr so that stdout only holds the results
+            sys.stderr.write(f"Error: {failed_count} of {operation_count} "
+                             "batch operations failed\n")
+
+        return failed_count
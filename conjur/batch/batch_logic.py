@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+BatchLogic module
+
+This module is the business logic for executing the BATCH command
+"""
+
+# Internals
+from conjur.errors import InvalidOperationException, MissingRequiredParameterException
+from conjur.list import ListData
+from conjur.list.list_logic import ListLogic
+from conjur.resource import Resource
+
+
+# pylint: disable=too-few-public-methods
+class BatchLogic:
+    """
+    BatchLogic
+
+    This class holds the business logic for executing the operations of
+    a batch with a single client. Interactive operations and the ones that
+    change the local configuration are not supported.
+    """
+    def __init__(self, client):
+        self.client = client
+
+    # pylint: disable=too-many-return-statements
+    def execute(self, args):
+        """
+        Method that executes one parsed operation and returns its result
+        """
+        action = getattr(args, 'action', None)
+        if args.resource == 'variable' and action == 'get':
+            if args.output is not None:
+                return self._write_variable(args)
+            if len(args.identifier) == 1:
+                return self.client.get(args.identifier[0], args.version).decode('utf-8')
+            return self.client.get_many(*args.identifier)
+
+        if args.resource == 'variable' and action == 'set':
+            self.client.set(args.identifier, args.value)
+            return args.identifier
+
+        if args.resource == 'list':
+            list_data = ListData(kind=args.kind, inspect=args.inspect,
+                                 search=args.search, limit=args.limit,
+                                 offset=args.offset, role=args.role)
+            return ListLogic(self.client, getattr(args, 'prefetch', None)).list(list_data)
+
+        if args.resource == 'whoami':
+            return self.client.whoami()
+
+        if args.resource == 'policy':
+            policy_actions = {
+                'load': self.client.load_policy_file,
+                'replace': self.client.replace_policy_file,
+                'update': self.client.update_policy_file,
+            }
+            return policy_actions[action](args.branch, args.file)
+
+        # Rotating the logged-in user's own API key also updates the local
+        # credentials so only the keys of other users and hosts can be rotated
+        if args.resource in ('host', 'user') and action == 'rotate-api-key':
+            if not args.id:
+                raise MissingRequiredParameterException(f"Error: The {args.resource} id is "
+                                                        "required in batch mode")
+            return self.client.rotate_other_api_key(Resource(type_=args.resource, name=args.id))
+
+        operation = ' '.join(filter(None, [args.resource, action]))
+        raise InvalidOperationException(f"Error: '{operation}' is not supported in batch mode")
+
+    def _write_variable(self, args):
+        # stdout holds the results of the batch
+        if args.output == '-' or len(args.identifier) != 1:
+            raise InvalidOperationException("Error: The value of a single variable can only "
+                                            "be written to a file in batch mode")
+        self.client.stream_variable(args.identifier[0], args.output, args.version)
+        return args.output
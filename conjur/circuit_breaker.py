@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""
+CircuitBreaker module
+
+This module holds the circuit breaker that stops sending requests to a
+server that keeps failing or answering slowly, so that callers fail fast
+instead of piling up and the server is not flooded while it recovers
+"""
+
+# Builtins
+import logging
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+# Internals
+from conjur.errors import CircuitOpenException
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_RATE_THRESHOLD = 0.5
+# Calls slower than this many seconds count as slow. Disabled by default.
+DEFAULT_SLOW_CALL_THRESHOLD = None
+DEFAULT_SLOW_CALL_RATE_THRESHOLD = 0.5
+# The rates are measured over the latest calls once there are enough of them
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_MIN_CALLS = 10
+# Seconds that an open circuit rejects calls before letting probes through
+DEFAULT_OPEN_TIME = 30
+DEFAULT_HALF_OPEN_PROBES = 3
+
+
+def _base_url(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+# pylint: disable=too-few-public-methods
+class _Circuit:
+    """
+    The state and the latest call outcomes of one base URL
+    """
+    def __init__(self, window_size):
+        self.state = CLOSED
+        # (failed, slow) of the latest calls
+        self.outcomes = deque(maxlen=window_size)
+        self.open_until = 0
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker
+
+    This class keeps a circuit per base URL (scheme and host). A circuit is
+    closed while calls succeed. It opens when the rate of failed or slow
+    calls among the latest ones crosses its threshold, and then rejects
+    calls with CircuitOpenException for open_time seconds. After that it is
+    half-open and lets up to half_open_probes calls through. The circuit
+    closes once that many probes succeeded and opens again as soon as one
+    fails or is slow.
+
+    Calls fail when the server cannot be reached, times out or answers with
+    a server error. Other errors, such as 404, mean that the server is up.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, failure_rate_threshold=DEFAULT_FAILURE_RATE_THRESHOLD,
+                 slow_call_threshold=DEFAULT_SLOW_CALL_THRESHOLD,
+                 slow_call_rate_threshold=DEFAULT_SLOW_CALL_RATE_THRESHOLD,
+                 window_size=DEFAULT_WINDOW_SIZE,
+                 min_calls=DEFAULT_MIN_CALLS,
+                 open_time=DEFAULT_OPEN_TIME,
+                 half_open_probes=DEFAULT_HALF_OPEN_PROBES):
+        if min_calls > window_size:
+            raise ValueError("Error: Circuit breaker min calls cannot exceed its window size")
+
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.open_time = open_time
+        self.half_open_probes = half_open_probes
+
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def state(self, url):
+        """
+        Method that returns the state of the circuit of the URL
+        """
+        with self._lock:
+            circuit = self._circuit(url)
+            if circuit.state == OPEN and circuit.open_until <= time.monotonic():
+                return HALF_OPEN
+            return circuit.state
+
+    def acquire(self, url):
+        """
+        Method that lets a call to the URL through or raises
+        CircuitOpenException. Returns whether the call is a probe, which
+        must be passed to record along with its outcome.
+        """
+        with self._lock:
+            circuit = self._circuit(url)
+            if circuit.state == OPEN and circuit.open_until <= time.monotonic():
+                logging.debug("Circuit of '%s' is half-open. Probing...", _base_url(url))
+                circuit.state = HALF_OPEN
+                circuit.probes_in_flight = 0
+                circuit.probe_successes = 0
+
+            if circuit.state == CLOSED:
+                return False
+
+            if circuit.state == HALF_OPEN and \
+                    circuit.probes_in_flight + circuit.probe_successes < self.half_open_probes:
+                circuit.probes_in_flight += 1
+                return True
+
+        raise CircuitOpenException(_base_url(url))
+
+    def record(self, url, latency, failed, probe=False):
+        """
+        Method that records the outcome of a call that acquire let through
+        """
+        slow = self.slow_call_threshold is not None and latency >= self.slow_call_threshold
+        with self._lock:
+            circuit = self._circuit(url)
+            if probe:
+                circuit.probes_in_flight -= 1
+                if circuit.state != HALF_OPEN:
+                    return
+                if failed or slow:
+                    self._open(url, circuit)
+                    return
+                circuit.probe_successes += 1
+                if circuit.probe_successes >= self.half_open_probes:
+                    logging.debug("Closing circuit of '%s'", _base_url(url))
+                    circuit.state = CLOSED
+                    circuit.outcomes.clear()
+                return
+
+            # Calls that were let through before the circuit opened are ignored
+            if circuit.state != CLOSED:
+                return
+
+            circuit.outcomes.append((failed, slow))
+            if len(circuit.outcomes) < self.min_calls:
+                return
+
+            failure_rate = sum(failed for failed, _ in circuit.outcomes) / len(circuit.outcomes)
+            slow_call_rate = sum(slow for _, slow in circuit.outcomes) / len(circuit.outcomes)
+            if failure_rate >= self.failure_rate_threshold or \
+                    slow_call_rate >= self.slow_call_rate_threshold:
+                self._open(url, circuit)
+
+    def _circuit(self, url):
+        base_url = _base_url(url)
+        circuit = self._circuits.get(base_url)
+        if circuit is None:
+            circuit = self._circuits[base_url] = _Circuit(self.window_size)
+        return circuit
+
+    def _open(self, url, circuit):
+        # pylint: disable=logging-fstring-interpolation
+        logging.debug(f"Opening circuit of '{_base_url(url)}' for {self.open_time} seconds")
+        circuit.state = OPEN
+        circuit.open_until = time.monotonic() + self.open_time
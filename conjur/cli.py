@@ -9,33 +9,28 @@ module where only the minimal invocation configuration is required.
 
 # Builtins
 import argparse
+import io
 import json
 import logging
 import os
 import sys
+from contextlib import redirect_stdout, redirect_stderr
 
 # Third party
 import traceback
-import requests
 
 # Internals
 from conjur.argparse_wrapper import ArgparseWrapper
-from conjur.client import Client
-from conjur.constants import DEFAULT_NETRC_FILE, DEFAULT_CONFIG_FILE
-from conjur.credentials_data import CredentialsData
-from conjur.credentials_from_file import CredentialsFromFile
-from conjur.host import HostController
-from conjur.host.host_resource_data import HostResourceData
-from conjur.init import ConjurrcData
-from conjur.list import ListData, ListController
-from conjur.list.list_logic import ListLogic
-from conjur.login import LoginLogic, LoginController
-from conjur.logout import LogoutController, LogoutLogic
-from conjur.policy import PolicyData, PolicyLogic, PolicyController
-from conjur.variable import VariableLogic, VariableController, VariableData
-from conjur.user import UserController, UserInputData, UserLogic
+from conjur.constants import DEFAULT_NETRC_FILE, DEFAULT_CONFIG_FILE, DEFAULT_TOKEN_CACHE_FILE
+from conjur.list import ListController
 from conjur.version import __version__
 
+# The modules that are only needed by some of the commands (and their
+# third-party dependencies such as requests, yaml and pyOpenSSL) are
+# imported by the command handlers so that they do not slow down the
+# startup of every other command
+# pylint: disable=import-outside-toplevel
+
 # pylint: disable=too-many-statements
 class Cli():
     """
@@ -44,6 +39,13 @@ class Cli():
     """
     LOGGING_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
 
+    # Listed in the order in which they are shown on the main help screen
+    COMMANDS = ('init', 'login', 'logout', 'list', 'policy', 'user', 'host', 'variable', 'whoami',
+                'agent', 'batch')
+
+    # Commands that are forwarded to the agent when it is running
+    AGENT_COMMANDS = ('list', 'variable')
+
     @staticmethod
     def usage(*args):
         """
@@ -110,6 +112,35 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         Main entrypoint for the class invocation from both CLI, Package, and
         test sources. Parses CLI args and invokes the appropriate client command.
         """
+        parser = self._build_parser(self._commands_to_build(sys.argv[1:]))
+        # The main help screen lists all of the commands
+        build_full_parser = lambda: self._build_parser(self.COMMANDS)
+
+        resource, args = Cli._parse_args(parser, build_full_parser)
+        # pylint: disable=broad-except
+        try:
+            Cli.run_action(resource, args)
+        except KeyboardInterrupt:
+            sys.exit(0)
+        except FileNotFoundError as not_found_error:
+            logging.debug(traceback.format_exc())
+            sys.stdout.write(f"Error: No such file or directory: '{not_found_error.filename}'\n")
+            sys.exit(1)
+        except Exception as error:
+            logging.debug(traceback.format_exc())
+            if Cli._is_http_error(error):
+                sys.stdout.write(f"Failed to execute command. Reason: {error}\n")
+            else:
+                sys.stdout.write(f"{str(error)}\n")
+            sys.exit(1)
+        else:
+            # Explicit exit (required for tests)
+            sys.exit(0)
+
+    def _build_parser(self, commands):
+        """
+        This method builds the argument parser with the subparsers of the commands
+        """
         formatter_class = lambda prog: argparse.RawTextHelpFormatter(prog,
                                                                      max_help_position=100,
                                                                      width=100)
@@ -123,8 +154,50 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         global_optional = parser.add_argument_group("Global options")
         resource_subparsers = parser.add_subparsers(dest='resource', title=self.title("Commands"))
 
-        # *************** INIT COMMAND ***************
+        for command in commands:
+            getattr(self, f"_add_{command}_parser")(resource_subparsers, formatter_class)
+
+        # *************** MAIN HELP SCREEN OPTIONS ***************
+
+        global_optional.add_argument('-h', '--help', action='help', help="Display help list")
+        global_optional.add_argument('-v', '--version', action='version',
+                                     help="Display version number",
+                                     version='Conjur CLI version ' + __version__ + "\n"
+                                             + self.copyright())
+
+        global_optional.add_argument('-d', '--debug',
+                                     help='Enable debugging output',
+                                     action='store_true')
+
+        global_optional.add_argument('--insecure',
+                                     help='Skip verification of server certificate (not recommended for production).\nThis makes your system vulnerable to security attacks!\n',
+                                     dest='ssl_verify',
+                                     action='store_false')
+
+        return parser
 
+    @classmethod
+    def _commands_to_build(cls, argv):
+        """
+        This method returns the commands whose parsers need to be built for
+        the arguments. Only the invoked command is built, unless help for the
+        main screen is requested or no known command is given in which case
+        all commands are built so that they are listed.
+        """
+        for arg in argv:
+            if arg in ('-h', '--help'):
+                break
+            if not arg.startswith('-'):
+                if arg in cls.COMMANDS:
+                    return (arg,)
+                break
+
+        return cls.COMMANDS
+
+    def _add_init_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the init command to the parser
+        """
         init_name = 'init - Initialize Conjur configuration'
         input_usage = 'conjur [global options] init [options] [args]'
         # pylint: disable=line-too-long
@@ -154,8 +227,10 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
                                   dest='force', help='Optional- force overwrite of existing files')
         init_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** LOGIN COMMAND ***************
-
+    def _add_login_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the login command to the parser
+        """
         login_name = 'login - Log in to Conjur server'
         login_usage = 'conjur [global options] login [options] [args]'
         # pylint: disable=line-too-long
@@ -182,8 +257,10 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
                           help='Provide a password or API key for the specified login name')
         login_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** LOGOUT COMMAND ***************
-
+    def _add_logout_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the logout command to the parser
+        """
         logout_name = 'logout - Log out and delete local cache'
         logout_usage = 'conjur [global options] logout [options]'
         # pylint: disable=line-too-long
@@ -199,8 +276,10 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         logout_options = logout_subparser.add_argument_group(title=self.title("Options"))
         logout_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** LIST COMMAND ***************
-
+    def _add_list_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the list command to the parser
+        """
         list_name = 'list - List resources within an organization\'s account'
         list_usage = 'conjur [global options] list [options] [args]'
         # pylint: disable=line-too-long
@@ -216,7 +295,9 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
                                                                                    '    conjur list --role=myorg:user:superuser\t'
                                                                                    'Shows resources that superuser is entitled to see\n'
                                                                                    '    conjur list --search=superuser\t\t'
-                                                                                   'Searches for resources with superuser\n'),
+                                                                                   'Searches for resources with superuser\n'
+                                                                                   '    conjur list --format=ndjson\t\t'
+                                                                                   'Prints each resource on its own line as soon as it is fetched\n'),
                                                         usage=argparse.SUPPRESS,
                                                         add_help=False,
                                                         formatter_class=formatter_class)
@@ -240,10 +321,20 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         list_options.add_argument('-s', '--search',
                                   action='store', metavar='VALUE', dest='search',
                                   help='Optional- search for resources based on specified query')
+        list_options.add_argument('--format',
+                                  action='store', metavar='VALUE', dest='output_format',
+                                  choices=ListController.OUTPUT_FORMATS,
+                                  help='Optional- stream results as they are fetched (json | ndjson)')
+        list_options.add_argument('--prefetch',
+                                  action='store', metavar='NUM', dest='prefetch', type=int,
+                                  help='Optional- fetch large listings in pages of 1000 resources '
+                                       'with up to NUM page requests in flight')
         list_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** POLICY COMMAND ***************
-
+    def _add_policy_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the policy command to the parser
+        """
         policy_name = 'policy - Manage policies'
         policy_usage = 'conjur [global options] policy <subcommand> [options] [args]'
         # pylint: disable=line-too-long
@@ -316,10 +407,13 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         policy_options = policy_subparser.add_argument_group(title=self.title("Options"))
         policy_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** USER COMMAND ***************
-
+    def _add_user_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the user command to the parser
+        """
         user_name = 'user - Manage users'
         user_usage = 'conjur [global options] user <subcommand> [options] [args]'
+        # pylint: disable=line-too-long
         user_subparser = resource_subparsers.add_parser('user',
                                                      help='Manage users',
                                                      description=self.command_description(user_name, user_usage),
@@ -374,9 +468,13 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         user_options = user_subparser.add_argument_group(title=self.title("Options"))
         user_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** HOST COMMAND ***************
+    def _add_host_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the host command to the parser
+        """
         host_name = 'host - Manage hosts'
         host_usage = 'conjur [global options] host <subcommand> [options] [args]'
+        # pylint: disable=line-too-long
         host_subparser = resource_subparsers.add_parser('host',
                                                      help='Manage hosts',
                                                      description=self.command_description(host_name, host_usage),
@@ -404,10 +502,13 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         host_options = host_subparser.add_argument_group(title=self.title("Options"))
         host_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** VARIABLE COMMAND ***************
-
+    def _add_variable_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the variable command to the parser
+        """
         variable_name = 'variable - Manage variables'
         variable_usage = 'conjur [global options] variable <subcommand> [options] [args]'
+        # pylint: disable=line-too-long
 
         variable_parser = resource_subparsers.add_parser('variable',
                                                          help='Manage variables',
@@ -417,7 +518,9 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
                                                                                    '    conjur variable get -i secrets/mysecret "secrets/my secret"\t'
                                                                                    'Gets the values of variables secrets/mysecret and secrets/my secret\n'
                                                                                    '    conjur variable set -i secrets/mysecret -v my_secret_value\t'
-                                                                                   'Sets the value of variable secrets/mysecret to my_secret_value\n',
+                                                                                   'Sets the value of variable secrets/mysecret to my_secret_value\n'
+                                                                                   '    conjur variable set-many -f /tmp/variables.json\t\t'
+                                                                                   'Sets the values of the variables in variables.json\n',
                                                                                    has_subcommand=True),
                                                          usage=argparse.SUPPRESS,
                                                          add_help=False,
@@ -432,7 +535,9 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
                                                                        epilog=self.command_epilog('conjur variable get -i secrets/mysecret\t\t\t'
                                                                                                   'Gets the value of variable secrets/mysecret\n'
                                                                                                   '    conjur variable get -i secrets/mysecret "secrets/my secret"\t'
-                                                                                                  'Gets the values of variables secrets/mysecret and secrets/my secret\n'),
+                                                                                                  'Gets the values of variables secrets/mysecret and secrets/my secret\n'
+                                                                                                  '    conjur variable get -i secrets/keystore --output keystore.p12\t'
+                                                                                                  'Writes the binary value of variable secrets/keystore to keystore.p12\n'),
                                                                        usage=argparse.SUPPRESS,
                                                                        add_help=False,
                                                                        formatter_class=formatter_class)
@@ -441,6 +546,8 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
                                           help='Provide variable identifier', nargs='+', required=True)
         variable_get_options.add_argument('--version',
                                           metavar='NUM', help='Provide version of variable')
+        variable_get_options.add_argument('--output', metavar='FILE',
+                                          help='Optional- write the raw value of the variable to FILE (- for stdout) instead of printing it')
         variable_get_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
         variable_set_name = 'set - Set the value of a variable'
@@ -461,11 +568,37 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
                                           help='Set the value of the specified variable', required=True)
         variable_set_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
+        variable_set_many_name = 'set-many - Set the values of many variables'
+        variable_set_many_usage = 'conjur [global options] variable set-many [options] [args]'
+        variable_set_many_subcommand_parser = variable_subparser.add_parser(name="set-many",
+                                                                            help='Set the values of many variables concurrently',
+                                                                            description=self.command_description(variable_set_many_name, variable_set_many_usage),
+                                                                            epilog=self.command_epilog('conjur variable set-many -f /tmp/variables.json\t\t'
+                                                                                                       'Sets the values of the variables in variables.json\n'
+                                                                                                       '    cat variables.json | conjur variable set-many --workers 16\t'
+                                                                                                       'Sets the values of the variables read from stdin\n'
+                                                                                                       '    conjur variable set-many -f /tmp/variables.json --skip-unchanged\t'
+                                                                                                       'Only sets the variables whose value changed\n'),
+                                                                            usage=argparse.SUPPRESS,
+                                                                            add_help=False,
+                                                                            formatter_class=formatter_class)
+        variable_set_many_options = variable_set_many_subcommand_parser.add_argument_group(title=self.title("Options"))
+
+        variable_set_many_options.add_argument('-f', '--file', dest='file', default='-',
+                                               help='Optional- JSON file mapping variable identifiers to values (Default: stdin)')
+        variable_set_many_options.add_argument('--workers', metavar='NUM', type=int,
+                                               help='Optional- number of variables to set concurrently (Default: 8)')
+        variable_set_many_options.add_argument('--skip-unchanged', action='store_true', dest='skip_unchanged',
+                                               help='Optional- read the current values first and only set the variables that changed')
+        variable_set_many_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
+
         policy_options = variable_parser.add_argument_group(title=self.title("Options"))
         policy_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** WHOAMI COMMAND ***************
-
+    def _add_whoami_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the whoami command to the parser
+        """
         whoami_name = 'whoami - Print information about the current logged-in user'
         whoami_usage = 'conjur [global options] whoami [options]'
         # pylint: disable=line-too-long
@@ -479,50 +612,89 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
 
         whoami_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        # *************** MAIN HELP SCREEN OPTIONS ***************
-
-        global_optional.add_argument('-h', '--help', action='help', help="Display help list")
-        global_optional.add_argument('-v', '--version', action='version',
-                                     help="Display version number",
-                                     version='Conjur CLI version ' + __version__ + "\n"
-                                             + self.copyright())
+    def _add_agent_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the agent command to the parser
+        """
+        agent_name = 'agent - Serve CLI requests from a long-lived process'
+        agent_usage = 'conjur [global options] agent [options]'
+        # pylint: disable=line-too-long
+        agent_subparser = resource_subparsers.add_parser('agent',
+                                                         help='Serve CLI requests from a long-lived process',
+                                                         description=self.command_description(agent_name, agent_usage),
+                                                         epilog=self.command_epilog('conjur agent --cache-ttl=30 &\t\t'
+                                                                                    'Starts an agent that caches secret values for 30 seconds.\n'
+                                                                                    '\t\t\t\t\tThe list and variable commands are forwarded to it while it runs\n'),
+                                                         usage=argparse.SUPPRESS,
+                                                         add_help=False,
+                                                         formatter_class=formatter_class)
+        agent_options = agent_subparser.add_argument_group(title=self.title("Options"))
+        agent_options.add_argument('--cache-ttl',
+                                   action='store', metavar='SECONDS', dest='cache_ttl', type=int,
+                                   help='Optional- cache secret values in the agent for the specified number of seconds')
+        agent_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        global_optional.add_argument('-d', '--debug',
-                                     help='Enable debugging output',
-                                     action='store_true')
+    def _add_batch_parser(self, resource_subparsers, formatter_class):
+        """
+        This method adds the batch command to the parser
+        """
+        batch_name = 'batch - Execute many commands with a single connection'
+        batch_usage = 'conjur [global options] batch [options]'
+        # pylint: disable=line-too-long
+        batch_subparser = resource_subparsers.add_parser('batch',
+                                                         help='Execute many commands with a single connection',
+                                                         description=self.command_description(batch_name, batch_usage),
+                                                         epilog=self.command_epilog('conjur batch -f /tmp/operations.txt\t\t'
+                                                                                    'Executes the commands in operations.txt, one per line\n'
+                                                                                    '    echo "variable get -i secrets/mysecret" | conjur batch\t'
+                                                                                    'Executes the commands read from stdin\n'),
+                                                         usage=argparse.SUPPRESS,
+                                                         add_help=False,
+                                                         formatter_class=formatter_class)
+        batch_options = batch_subparser.add_argument_group(title=self.title("Options"))
+        batch_options.add_argument('-f', '--file', dest='file', default='-',
+                                   help='Optional- file of commands to execute, one per line (Default: stdin)')
+        batch_options.add_argument('-h', '--help', action='help', help='Display help screen and exit')
 
-        global_optional.add_argument('--insecure',
-                                     help='Skip verification of server certificate (not recommended for production).\nThis makes your system vulnerable to security attacks!\n',
-                                     dest='ssl_verify',
-                                     action='store_false')
+    def _parse_batch_operation(self, parser, argv):
+        """
+        This method parses one operation of a batch without printing the
+        help screens or exiting on invalid operations
+        """
+        from conjur.errors import InvalidOperationException
 
-        resource, args = Cli._parse_args(parser)
-        # pylint: disable=broad-except
+        error_stream = io.StringIO()
         try:
-            Cli.run_action(resource, args)
-        except KeyboardInterrupt:
-            sys.exit(0)
-        except FileNotFoundError as not_found_error:
-            logging.debug(traceback.format_exc())
-            sys.stdout.write(f"Error: No such file or directory: '{not_found_error.filename}'\n")
-            sys.exit(1)
-        except requests.exceptions.HTTPError as client_error:
-            logging.debug(traceback.format_exc())
-            sys.stdout.write(f"Failed to execute command. Reason: {client_error}\n")
-            sys.exit(1)
-        except Exception as error:
-            logging.debug(traceback.format_exc())
-            sys.stdout.write(f"{str(error)}\n")
-            sys.exit(1)
-        else:
-            # Explicit exit (required for tests)
-            sys.exit(0)
+            with redirect_stdout(io.StringIO()), redirect_stderr(error_stream):
+                args = parser.parse_args(argv)
+        except SystemExit:
+            errors = error_stream.getvalue().strip().splitlines()
+            # pylint: disable=raise-missing-from
+            raise InvalidOperationException(errors[0] if errors else "Error: Invalid operation")
+
+        if not args.resource or ('action' in args and not args.action):
+            raise InvalidOperationException("Error: Invalid operation")
+
+        return args
+
+    @staticmethod
+    def _is_http_error(error):
+        from conjur.errors import AgentRequestException
+
+        if isinstance(error, AgentRequestException):
+            return error.is_http_error
+
+        # requests is only loaded by the commands that send HTTP requests
+        # so no other error can be one of its HTTP errors
+        requests = sys.modules.get('requests')
+        return requests is not None and isinstance(error, requests.exceptions.HTTPError)
 
     @classmethod
     def handle_init_logic(cls, url=None, name=None, certificate=None, force=None):
         """
         Method that wraps the init call logic
         """
+        from conjur.client import Client
         Client.initialize(url, name, certificate, force)
 
     @classmethod
@@ -530,6 +702,10 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         """
         Method that wraps the login call logic
         """
+        from conjur.credentials_data import CredentialsData
+        from conjur.credentials_from_file import CredentialsFromFile
+        from conjur.login import LoginLogic, LoginController
+
         credential_data = CredentialsData(login=identifier)
         credentials = CredentialsFromFile(netrc_path=DEFAULT_NETRC_FILE)
         login_logic = LoginLogic(credentials)
@@ -544,21 +720,48 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         """
         Method that wraps the logout call logic
         """
+        from conjur.credentials_from_file import CredentialsFromFile
+        from conjur.logout import LogoutController, LogoutLogic
+
         credentials = CredentialsFromFile(DEFAULT_NETRC_FILE)
         logout_logic = LogoutLogic(credentials)
 
         logout_controller = LogoutController(ssl_verify=ssl_verify,
                                              logout_logic=logout_logic)
-        logout_controller.remove_credentials()
+        try:
+            logout_controller.remove_credentials()
+        finally:
+            # The agent would otherwise keep serving with the removed credentials
+            cls._stop_agent()
+
+    @staticmethod
+    def _stop_agent():
+        """
+        Helper for stopping the agent, if one is running
+        """
+        from conjur.agent import AgentClient
+
+        agent_client = AgentClient.connect()
+        if agent_client is None:
+            return
+
+        logging.debug("Stopping the Conjur agent...")
+        try:
+            agent_client.stop()
+        finally:
+            agent_client.close()
 
     @classmethod
-    def handle_list_logic(cls, list_data=None, client=None):
+    def handle_list_logic(cls, list_data=None, client=None, output_format=None, prefetch=None):
         """
         Method that wraps the list call logic
         """
-        list_logic = ListLogic(client)
+        from conjur.list.list_logic import ListLogic
+
+        list_logic = ListLogic(client, prefetch)
         list_controller = ListController(list_logic=list_logic,
-                                         list_data=list_data)
+                                         list_data=list_data,
+                                         output_format=output_format)
         list_controller.load()
 
     @classmethod
@@ -566,10 +769,12 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         """
         Method that wraps the variable call logic
         """
+        from conjur.variable import VariableLogic, VariableController, VariableData
+
         variable_logic = VariableLogic(client)
         if args.action == 'get':
             variable_data = VariableData(action=args.action, id=args.identifier, value=None,
-                                         variable_version=args.version)
+                                         variable_version=args.version, output=args.output)
             variable_controller = VariableController(variable_logic=variable_logic,
                                                      variable_data=variable_data)
             variable_controller.get_variable()
@@ -579,12 +784,25 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
             variable_controller = VariableController(variable_logic=variable_logic,
                                                      variable_data=variable_data)
             variable_controller.set_variable()
+        elif args.action == 'set-many':
+            with (sys.stdin if args.file == '-' else open(args.file, 'r')) as variables_file:
+                variables = variable_logic.load_variables(variables_file)
+            variable_data = VariableData(action=args.action, id=None, value=None,
+                                         variable_version=None, variables=variables,
+                                         max_workers=args.workers,
+                                         skip_unchanged=args.skip_unchanged)
+            variable_controller = VariableController(variable_logic=variable_logic,
+                                                     variable_data=variable_data)
+            if not variable_controller.set_many_variables():
+                sys.exit(1)
 
     @classmethod
     def handle_policy_logic(cls, policy_data=None, client=None):
         """
         Method that wraps the variable call logic
         """
+        from conjur.policy import PolicyLogic, PolicyController
+
         policy_logic = PolicyLogic(client)
         policy_controller = PolicyController(policy_logic=policy_logic,
                                              policy_data=policy_data)
@@ -595,6 +813,10 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         """
         Method that wraps the user call logic
         """
+        from conjur.credentials_from_file import CredentialsFromFile
+        from conjur.init import ConjurrcData
+        from conjur.user import UserController, UserInputData, UserLogic
+
         credentials = CredentialsFromFile()
         user_logic = UserLogic(ConjurrcData, credentials, client)
         if args.action == 'rotate-api-key':
@@ -617,10 +839,54 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         """
         Method that wraps the host call logic
         """
+        from conjur.host import HostController
+        from conjur.host.host_resource_data import HostResourceData
+
         host_resource_data = HostResourceData(action=args.action, host_to_update=args.id)
         host_controller = HostController(client=client, host_resource_data=host_resource_data)
         host_controller.rotate_api_key()
 
+    @classmethod
+    def handle_agent_logic(cls, client=None, ssl_verify=True):
+        """
+        Method that wraps the agent call logic
+        """
+        import signal
+        from conjur.agent import AgentServer
+        from conjur.constants import DEFAULT_AGENT_SOCKET
+
+        agent_server = AgentServer(client, DEFAULT_AGENT_SOCKET,
+                                   identity=cls._load_agent_identity(ssl_verify))
+        # Exit cleanly on termination so that the socket is removed
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            sys.stdout.write(f"Conjur agent listening on '{DEFAULT_AGENT_SOCKET}'\n")
+            sys.stdout.flush()
+            agent_server.serve_forever()
+        finally:
+            agent_server.server_close()
+
+    @classmethod
+    def handle_batch_logic(cls, args, client):
+        """
+        Method that wraps the batch call logic
+        """
+        from conjur.batch import BatchController, BatchLogic
+
+        cli = cls()
+        parser = cli._build_parser(cls.COMMANDS)
+        parse_operation = lambda argv: cli._parse_batch_operation(parser, argv)
+
+        batch_logic = BatchLogic(client)
+        with (sys.stdin if args.file == '-' else open(args.file, 'r')) as operations:
+            batch_controller = BatchController(batch_logic=batch_logic,
+                                               operations=operations,
+                                               parse_operation=parse_operation)
+            failed_count = batch_controller.load()
+
+        if failed_count:
+            sys.exit(1)
+
     @staticmethod
     # pylint: disable=too-many-branches
     def run_action(resource, args):
@@ -628,7 +894,8 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         Helper for creating the Client instance and invoking the appropriate
         api class method with the specified parameters.
         """
-        Client.setup_logging(Client, args.debug)
+        logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARN,
+                            format=Cli.LOGGING_FORMAT)
         # pylint: disable=no-else-return
         if resource == 'init':
             Cli.handle_init_logic(args.url, args.name, args.certificate, args.force)
@@ -642,27 +909,21 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
             Cli.handle_logout_logic(args.ssl_verify)
             return
 
-        # Needed for unit tests so that they do not require configuring
-        if os.getenv('TEST_ENV') is None or os.getenv('TEST_ENV') == 'False':
-            # If the user runs a command without configuring the CLI or logging in,
-            # we request they do so before executing their request
-            # pylint: disable=line-too-long
-            if not os.path.exists(DEFAULT_CONFIG_FILE) or os.path.getsize(DEFAULT_CONFIG_FILE) == 0:
-                sys.stdout.write("Error: The Conjur CLI has not been initialized\n")
-                Cli.handle_init_logic()
-
-            # pylint: disable=line-too-long
-            if not os.path.exists(DEFAULT_NETRC_FILE) or os.path.getsize(DEFAULT_NETRC_FILE) == 0:
-                sys.stdout.write("Error: You have not logged in\n")
-                Cli.handle_login_logic(ssl_verify=args.ssl_verify)
+        client = None
+        # Debugging output is only logged by the process that sends the requests
+        if resource in Cli.AGENT_COMMANDS and not args.debug:
+            client = Cli._connect_agent(args.ssl_verify)
 
-        client = Client(ssl_verify=args.ssl_verify, debug=args.debug)
+        # The agent already holds the configuration and the credentials
+        if client is None:
+            client = Cli._create_client(resource, args)
 
         if resource == 'list':
+            from conjur.list import ListData
             list_data = ListData(kind=args.kind, inspect=args.inspect,
                              search=args.search, limit=args.limit,
                              offset=args.offset, role=args.role)
-            Cli.handle_list_logic(list_data, client)
+            Cli.handle_list_logic(list_data, client, args.output_format, args.prefetch)
 
         elif resource == 'whoami':
             result = client.whoami()
@@ -672,6 +933,7 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
             Cli.handle_variable_logic(args, client)
 
         elif resource == 'policy':
+            from conjur.policy import PolicyData
             policy_data = PolicyData(action=args.action, branch=args.branch, file=args.file)
             Cli.handle_policy_logic(policy_data, client)
 
@@ -681,8 +943,98 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
         elif resource == 'host':
             Cli.handle_host_logic(args, client)
 
+        elif resource == 'agent':
+            Cli.handle_agent_logic(client, args.ssl_verify)
+
+        elif resource == 'batch':
+            Cli.handle_batch_logic(args, client)
+
+    @staticmethod
+    def _connect_agent(ssl_verify):
+        """
+        Helper for connecting to the agent. Returns None if no agent is
+        running or if it serves another server, account or login than the
+        configured ones, or verifies the server certificate differently.
+        """
+        from conjur.agent import AgentClient
+
+        agent_client = AgentClient.connect()
+        if agent_client is None:
+            return None
+
+        try:
+            identity = Cli._load_agent_identity(ssl_verify)
+            agent_identity = agent_client.ping()
+        # The CLI prompts to initialize or to log in when it creates its own client
+        # pylint: disable=broad-except
+        except Exception as error:
+            # pylint: disable=logging-fstring-interpolation
+            logging.debug(f"Not forwarding to the Conjur agent: {error}")
+            agent_client.close()
+            return None
+
+        if agent_identity != identity:
+            logging.debug("Not forwarding to the Conjur agent since it serves another "
+                          "server, account or login, or verifies certificates differently")
+            agent_client.close()
+            return None
+
+        return agent_client
+
+    @staticmethod
+    def _load_agent_identity(ssl_verify):
+        """
+        Helper for loading the server, the account and the login that the
+        CLI is configured with, which the agent must serve
+        """
+        # The client stack is not imported so that forwarding stays fast
+        from conjur.config import Config
+        from conjur.credentials_from_file import CredentialsFromFile
+
+        config = Config(DEFAULT_CONFIG_FILE)
+        credentials = CredentialsFromFile(DEFAULT_NETRC_FILE).load(config.url)
+        return {
+            'url': config.url,
+            'account': config.account,
+            'login_id': credentials['login_id'],
+            'ssl_verify': ssl_verify,
+        }
+
+    @staticmethod
+    def _create_client(resource, args):
+        """
+        Helper for creating the Client instance from the configuration files
+        """
+        from conjur.client import Client
+
+        # Needed for unit tests so that they do not require configuring
+        if os.getenv('TEST_ENV') is None or os.getenv('TEST_ENV') == 'False':
+            # If the user runs a command without configuring the CLI or logging in,
+            # we request they do so before executing their request
+            # pylint: disable=line-too-long
+            if not os.path.exists(DEFAULT_CONFIG_FILE) or os.path.getsize(DEFAULT_CONFIG_FILE) == 0:
+                sys.stdout.write("Error: The Conjur CLI has not been initialized\n")
+                Cli.handle_init_logic()
+
+            # pylint: disable=line-too-long
+            if not os.path.exists(DEFAULT_NETRC_FILE) or os.path.getsize(DEFAULT_NETRC_FILE) == 0:
+                sys.stdout.write("Error: You have not logged in\n")
+                Cli.handle_login_logic(ssl_verify=args.ssl_verify)
+
+        client_options = {}
+        if resource == 'agent' and args.cache_ttl:
+            client_options['cache_ttl'] = args.cache_ttl
+
+        # Opt-in since the token is then stored on disk (readable only by the user)
+        if os.getenv('CONJUR_TOKEN_CACHE', '').lower() == 'true':
+            from conjur.token_cache import is_token_cache_supported
+            if is_token_cache_supported():
+                client_options['token_cache_file'] = DEFAULT_TOKEN_CACHE_FILE
+
+        return Client(ssl_verify=args.ssl_verify, debug=args.debug, **client_options)
+
     @staticmethod
-    def _parse_args(parser):
+    def _parse_args(parser, build_full_parser):
         args = parser.parse_args()
 
         if not args.resource:
@@ -690,9 +1042,9 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
             sys.exit(0)
 
         # Check whether we are running a command with required additional arguments/options
-        if args.resource not in ['list', 'whoami', 'init', 'login', 'logout']:
+        if args.resource not in ['list', 'whoami', 'init', 'login', 'logout', 'agent', 'batch']:
             if 'action' not in args or not args.action:
-                parser.print_help()
+                build_full_parser().print_help()
                 sys.exit(0)
 
         return args.resource, args
@@ -9,6 +9,7 @@ the Conjur server
 
 # Builtins
 import logging
+import threading
 
 # Internals
 import netrc
@@ -17,12 +18,14 @@ from Utils.utils import Utils
 from conjur.api import Api
 from conjur.config import Config as ApiConfig
 from conjur.constants import DEFAULT_NETRC_FILE
-from conjur.init.init_controller import InitController
-from conjur.init.init_logic import InitLogic
 from conjur.init.conjurrc_data import ConjurrcData
 from conjur.credentials_from_file import CredentialsFromFile
+from conjur.errors import CircuitOpenException, PartialBatchFailureException
+from conjur.request_coalescer import RequestCoalescer
 from conjur.resource import Resource
-from conjur.ssl_service import SSLService
+from conjur.secret_cache import SecretCache, DEFAULT_CACHE_MAX_ENTRIES
+from conjur.secret_file import open_secret_output
+from conjur.token_cache import TokenCache
 
 class ConfigException(Exception):
     """
@@ -37,6 +40,71 @@ class ConfigException(Exception):
     use these parameters defined in this class to initialize our Python
     SDK in their code.
     """
+def load_connection_config(url=None, account=None, ca_bundle=None, use_config_file=True,
+                           read_urls=None):
+    """
+    Resolves the connection details of the Conjur server. Values that are
+    not provided are read from the conjurrc file when use_config_file is set.
+    """
+    loaded_config = {
+        'url': url,
+        'account': account,
+        'ca_bundle': ca_bundle,
+        'read_urls': read_urls,
+    }
+    if use_config_file:
+        try:
+            on_disk_config = dict(ApiConfig())
+
+            # We want to retain any overrides that the user provided from params
+            # but only if those values are valid
+            for field_name, field_value in loaded_config.items():
+                if field_value:
+                    on_disk_config[field_name] = field_value
+            loaded_config = on_disk_config
+            # pylint: disable=logging-fstring-interpolation
+            logging.debug("Fetched connection details: "
+                          f"{{'account': {loaded_config['account']}, "
+                          f"'appliance_url': {loaded_config['url']}, "
+                          f"'cert_file': {loaded_config['ca_bundle']}}}")
+
+        # TODO add error handling for when conjurrc field doesn't exist
+        except Exception as exc:
+            raise ConfigException(exc) from exc
+
+    # We only want to override missing account info with "default"
+    # if we can't find it anywhere else.
+    if loaded_config['account'] is None:
+        loaded_config['account'] = "default"
+
+    # Without read URLs every request goes to the appliance URL so they are
+    # only passed down when there are some
+    if not loaded_config.get('read_urls'):
+        loaded_config.pop('read_urls', None)
+
+    return loaded_config
+
+def load_netrc_credentials(appliance_url):
+    """
+    Loads the login ID and API key saved in the netrc file for the server
+    """
+    try:
+        credentials = CredentialsFromFile(DEFAULT_NETRC_FILE)
+        return credentials.load(appliance_url)
+    except netrc.NetrcParseError as netrc_error:
+        raise Exception("Error: netrc is in an invalid format. "
+                        f"Reason: {netrc_error}") from netrc_error
+    except Exception as exception:
+        # pylint: disable=line-too-long
+        raise RuntimeError("Unable to authenticate with Conjur. Please log in and try again.") from exception
+
+def _timeout_option(timeout):
+    """
+    Returns the Api option of a per-call timeout, which is only passed when
+    set so that the timeout of the client applies otherwise
+    """
+    return {} if timeout is None else {'timeout': timeout}
+
 class Client():
     """
     Client
@@ -46,6 +114,8 @@ class Client():
     _api = None
     _login_id = None
     _api_key = None
+    _cache = None
+    _coalescer = None
 
     LOGGING_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
 
@@ -61,7 +131,23 @@ class Client():
                  login_id=None,
                  password=None,
                  ssl_verify=True,
-                 url=None):
+                 url=None,
+                 pool_connections=None,
+                 pool_maxsize=None,
+                 keep_alive=None,
+                 token_refresh_lead_time=None,
+                 cache_ttl=None,
+                 cache_max_entries=DEFAULT_CACHE_MAX_ENTRIES,
+                 cache_hard_ttl=None,
+                 batch_max_url_length=None,
+                 batch_max_workers=None,
+                 coalesce_window=None,
+                 token_cache_file=None,
+                 read_urls=None,
+                 timeout=None,
+                 retry_policy=None,
+                 circuit_breaker=None,
+                 hedge_policy=None):
 
         if ssl_verify is False:
             Utils.get_insecure_warning()
@@ -72,35 +158,28 @@ class Client():
 
         self._login_id = login_id
 
-        loaded_config = {
-            'url': url,
-            'account': account,
-            'ca_bundle': ca_bundle,
+        # The config file is only needed when some connection details are missing
+        use_config_file = not url or not login_id or (not password and not api_key)
+        loaded_config = load_connection_config(url, account, ca_bundle, use_config_file,
+                                               read_urls)
+
+        # Transport tuning is optional so we only pass down the values
+        # the user explicitly provided and let the API use its own defaults
+        api_options = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'keep_alive': keep_alive,
+            'batch_max_url_length': batch_max_url_length,
+            'batch_max_workers': batch_max_workers,
+            'timeout': timeout,
+            'retry_policy': retry_policy,
+            'circuit_breaker': circuit_breaker,
+            'hedge_policy': hedge_policy,
         }
-        if not url or not login_id or (not password and not api_key):
-            try:
-                on_disk_config = dict(ApiConfig())
-
-                # We want to retain any overrides that the user provided from params
-                # but only if those values are valid
-                for field_name, field_value in loaded_config.items():
-                    if field_value:
-                        on_disk_config[field_name] = field_value
-                loaded_config = on_disk_config
-                # pylint: disable=logging-fstring-interpolation
-                logging.debug("Fetched connection details: "
-                              f"{{'account': {loaded_config['account']}, "
-                              f"'appliance_url': {loaded_config['url']}, "
-                              f"'cert_file': {loaded_config['ca_bundle']}}}")
-
-            # TODO add error handling for when conjurrc field doesn't exist
-            except Exception as exc:
-                raise ConfigException(exc) from exc
-
-        # We only want to override missing account info with "default"
-        # if we can't find it anywhere else.
-        if loaded_config['account'] is None:
-            loaded_config['account'] = "default"
+        if token_cache_file is not None:
+            logging.debug("Enabling the on-disk API token cache...")
+            api_options['token_cache'] = TokenCache(token_cache_file)
+        api_options = {name: value for name, value in api_options.items() if value is not None}
 
         if api_key:
             logging.debug("Using API key from parameters...")
@@ -108,30 +187,44 @@ class Client():
                             http_debug=http_debug,
                             login_id=login_id,
                             ssl_verify=ssl_verify,
+                            **api_options,
                             **loaded_config)
         elif password:
             logging.debug("Creating API key with login ID/password combo...")
             self._api = Api(http_debug=http_debug,
                             ssl_verify=ssl_verify,
+                            **api_options,
                             **loaded_config)
             self._api.login(login_id, password)
         else:
-            try:
-                credentials = CredentialsFromFile(DEFAULT_NETRC_FILE)
-                loaded_netrc = credentials.load(loaded_config['url'])
-            except netrc.NetrcParseError as netrc_error:
-                raise Exception("Error: netrc is in an invalid format. "
-                                f"Reason: {netrc_error}") from netrc_error
-            except Exception as exception:
-                # pylint: disable=line-too-long
-                raise RuntimeError("Unable to authenticate with Conjur. Please log in and try again.") from exception
-
+            loaded_netrc = load_netrc_credentials(loaded_config['url'])
             self._api = Api(http_debug=http_debug,
                             ssl_verify=ssl_verify,
                             login_id=loaded_netrc['login_id'],
                             api_key=loaded_netrc['api_key'],
+                            **api_options,
                             **loaded_config)
 
+        self._account = loaded_config['account']
+        if cache_ttl is not None:
+            logging.debug("Enabling in-process secret cache...")
+            # Expired values are kept to be served while the circuit is open
+            self._cache = SecretCache(max_entries=cache_max_entries, ttl=cache_ttl,
+                                      hard_ttl=cache_hard_ttl,
+                                      keep_expired=circuit_breaker is not None)
+            # Variables that currently have a background refresh in flight
+            self._revalidating = set()
+            self._revalidating_lock = threading.Lock()
+
+        if coalesce_window is not None:
+            logging.debug("Enabling coalescing of concurrent variable reads...")
+            self._coalescer = RequestCoalescer(self._api.get_variables,
+                                               self._api.get_variable,
+                                               window=coalesce_window)
+
+        if token_refresh_lead_time is not None:
+            self._api.start_token_refresher(lead_time=token_refresh_lead_time)
+
         logging.debug("Client initialized")
 
     def setup_logging(self, debug):
@@ -150,6 +243,12 @@ class Client():
         """
         Initializes the client, creating the .conjurrc file
         """
+        # pyOpenSSL is slow to import and only needed to fetch the certificate
+        # pylint: disable=import-outside-toplevel
+        from conjur.init.init_controller import InitController
+        from conjur.init.init_logic import InitLogic
+        from conjur.ssl_service import SSLService
+
         ssl_service = SSLService()
 
         conjurrc_data = ConjurrcData(url,
@@ -165,71 +264,278 @@ class Client():
 
     ### API passthrough
 
-    def whoami(self):
+    def whoami(self, timeout=None):
         """
         Provides dictionary of information about the user making an API request
         """
-        return self._api.whoami()
+        return self._api.whoami(**_timeout_option(timeout))
 
     # Constraints remain an optional parameter for backwards compatibility in the SDK
-    def list(self, list_constraints=None):
+    def list(self, list_constraints=None, timeout=None):
         """
         Lists all available resources
         """
-        return self._api.resources_list(list_constraints)
+        return self._api.resources_list(list_constraints, **_timeout_option(timeout))
+
+    def stream_resources(self, list_constraints=None, timeout=None):
+        """
+        Lazily iterates over all available resources, parsing them one by one
+        from a single streamed response
+        """
+        return self._api.stream_resources(list_constraints, **_timeout_option(timeout))
 
-    def get(self, variable_id, version=None):
+    def iter_resources(self, list_constraints=None, page_size=Api.DEFAULT_RESOURCES_PAGE_SIZE,
+                       prefetch=0, timeout=None):
+        """
+        Lazily iterates over all available resources, fetching them page by page.
+        Up to prefetch page requests are kept in flight ahead of the consumer.
+        """
+        return self._api.iter_resources(list_constraints, page_size, prefetch,
+                                        **_timeout_option(timeout))
+
+    def get(self, variable_id, version=None, timeout=None):
         """
         Gets a variable value based on its ID
         """
-        return self._api.get_variable(variable_id, version)
+        if self._cache is None:
+            return self._fetch_variable(variable_id, version, timeout)
+
+        cache_key = self._cache_key(variable_id, version)
+        cache_entry = self._cache.get_entry(cache_key)
+        if cache_entry is not None:
+            variable_value, is_stale = cache_entry
+            if is_stale:
+                self._revalidate_in_background(variable_id)
+            return variable_value
+
+        try:
+            variable_value = self._fetch_variable(variable_id, version, timeout)
+        except CircuitOpenException:
+            variable_value = self._cache.get_last_known(cache_key)
+            if variable_value is None:
+                raise
+            logging.debug("Serving expired cached value of '%s' while the circuit is open",
+                          variable_id)
+            return variable_value
+
+        # Specific versions of a variable never change so they can be kept
+        # until they are evicted
+        self._cache.set(cache_key, variable_value, immutable=version is not None)
+        return variable_value
+
+    def stream_variable(self, variable_id, output, version=None, timeout=None):
+        """
+        Writes a variable value, based on its ID, to a binary file object or
+        to a path in chunks as it is received. A path is only replaced once the
+        whole value has been written and is readable by its owner only. The
+        secret cache is bypassed. Returns the number of bytes written.
+        """
+        with open_secret_output(output) as output_file:
+            return self._api.stream_variable(variable_id, output_file, version,
+                                             **_timeout_option(timeout))
 
-    def get_many(self, *variable_ids):
+    def get_many(self, *variable_ids, timeout=None):
         """
         Gets multiple variable values based on their IDs. Returns a
         dictionary of mapped values.
         """
-        return self._api.get_variables(*variable_ids)
+        if self._cache is None:
+            return self._api.get_variables(*variable_ids, **_timeout_option(timeout))
+
+        variable_values = {}
+        missing_variable_ids = []
+        stale_variable_ids = []
+        for variable_id in variable_ids:
+            cache_entry = self._cache.get_entry(self._cache_key(variable_id))
+            try:
+                variable_value, is_stale = cache_entry
+                # Values are cached as raw bytes like 'get' returns them
+                variable_values[variable_id] = variable_value.decode('utf-8')
+            except (TypeError, UnicodeDecodeError):
+                missing_variable_ids.append(variable_id)
+                continue
 
-    def set(self, variable_id, value):
+            if is_stale:
+                stale_variable_ids.append(variable_id)
+
+        if stale_variable_ids:
+            self._revalidate_in_background(*stale_variable_ids)
+
+        if missing_variable_ids:
+            try:
+                fetched_values = self._api.get_variables(*missing_variable_ids,
+                                                         **_timeout_option(timeout))
+            except (CircuitOpenException, PartialBatchFailureException) as error:
+                variable_values.update(self._get_last_known(error, missing_variable_ids))
+                return variable_values
+            for variable_id, variable_value in fetched_values.items():
+                self._cache.set(self._cache_key(variable_id), variable_value.encode('utf-8'))
+            variable_values.update(fetched_values)
+
+        return variable_values
+
+    def set(self, variable_id, value, timeout=None):
         """
         Sets a variable to a specific value based on its ID
         """
-        self._api.set_variable(variable_id, value)
+        self._api.set_variable(variable_id, value, **_timeout_option(timeout))
 
-    def load_policy_file(self, policy_name, policy_file):
+        if self._cache is not None:
+            self._cache.invalidate(self._cache_key(variable_id))
+
+    def set_many(self, variables, max_workers=None, skip_unchanged=False, timeout=None):
+        """
+        Sets multiple variables concurrently. The variables are a dictionary
+        or an iterable of (variable_id, value) pairs. Returns the IDs of the
+        variables that were set. With skip_unchanged, variables that already
+        hold their value are not set and are left out of the returned IDs.
+        """
+        if isinstance(variables, dict):
+            variables = variables.items()
+        variables = list(variables)
+
+        set_options = {} if max_workers is None else {'max_workers': max_workers}
+        if skip_unchanged:
+            set_options['skip_unchanged'] = True
+        set_options.update(_timeout_option(timeout))
+        try:
+            return self._api.set_variables(variables, **set_options)
+        finally:
+            # Some of the variables may have been set even if others failed
+            if self._cache is not None:
+                for variable_id, _ in variables:
+                    self._cache.invalidate(self._cache_key(variable_id))
+
+    def load_policy_file(self, policy_name, policy_file, timeout=None):
         """
         Applies a file-based policy to the Conjur instance
         """
-        return self._api.load_policy_file(policy_name, policy_file)
+        return self._api.load_policy_file(policy_name, policy_file, **_timeout_option(timeout))
 
-    def replace_policy_file(self, policy_name, policy_file):
+    def replace_policy_file(self, policy_name, policy_file, timeout=None):
         """
         Replaces a file-based policy defined in the Conjur instance
         """
-        return self._api.replace_policy_file(policy_name, policy_file)
+        return self._api.replace_policy_file(policy_name, policy_file, **_timeout_option(timeout))
 
-    def update_policy_file(self, policy_name, policy_file):
+    def update_policy_file(self, policy_name, policy_file, timeout=None):
         """
         Replaces a file-based policy defined in the Conjur instance
         """
-        return self._api.update_policy_file(policy_name, policy_file)
+        return self._api.update_policy_file(policy_name, policy_file, **_timeout_option(timeout))
 
-    def rotate_other_api_key(self, resource: Resource):
+    def rotate_other_api_key(self, resource: Resource, timeout=None):
         """
         Rotates a API keys and returns new API key
         """
-        return self._api.rotate_other_api_key(resource)
+        return self._api.rotate_other_api_key(resource, **_timeout_option(timeout))
 
-    def rotate_personal_api_key(self, logged_in_user, current_password):
+    def rotate_personal_api_key(self, logged_in_user, current_password, timeout=None):
         """
         Rotates personal API keys and returns new API key
         """
-        return self._api.rotate_personal_api_key(logged_in_user, current_password)
+        return self._api.rotate_personal_api_key(logged_in_user, current_password,
+                                                 **_timeout_option(timeout))
 
-    def change_personal_password(self, logged_in_user, current_password, new_password):
+    def change_personal_password(self, logged_in_user, current_password, new_password,
+                                 timeout=None):
         """
         Change personal password of logged-in user
         """
         # pylint: disable=line-too-long
-        return self._api.change_personal_password(logged_in_user, current_password, new_password)
+        return self._api.change_personal_password(logged_in_user, current_password, new_password,
+                                                  **_timeout_option(timeout))
+
+    def token_refresh_stats(self):
+        """
+        Returns counters of API token refreshes and coalesced waiters
+        """
+        return self._api.token_refresh_stats
+
+    def _fetch_variable(self, variable_id, version=None, timeout=None):
+        # Batch reads cannot fetch specific versions so those are never coalesced.
+        # Neither are reads with their own timeout since coalesced reads share
+        # a single request.
+        if self._coalescer is None or version is not None or timeout is not None:
+            return self._api.get_variable(variable_id, version, **_timeout_option(timeout))
+
+        return self._coalescer.get(variable_id)
+
+    def _get_last_known(self, error, variable_ids):
+        """
+        Returns the values of the variables that could not be fetched because
+        the circuit is open from the cache, even if they expired, along with
+        the ones that were fetched. Raises the error again if any variable
+        failed for another reason or is not cached.
+        """
+        variable_values = {}
+        if isinstance(error, PartialBatchFailureException):
+            if not all(isinstance(variable_error, CircuitOpenException)
+                       for variable_error in error.errors.values()):
+                raise error
+            for variable_id, variable_value in error.results.items():
+                self._cache.set(self._cache_key(variable_id), variable_value.encode('utf-8'))
+            variable_values.update(error.results)
+            variable_ids = list(error.errors)
+
+        for variable_id in variable_ids:
+            variable_value = self._cache.get_last_known(self._cache_key(variable_id))
+            try:
+                # Values are cached as raw bytes like 'get' returns them
+                variable_values[variable_id] = variable_value.decode('utf-8')
+            except (AttributeError, UnicodeDecodeError):
+                variable_values = None
+                break
+
+        if variable_values is None:
+            raise error
+
+        logging.debug("Serving expired cached values of %s while the circuit is open",
+                      variable_ids)
+        return variable_values
+
+    def _cache_key(self, variable_id, version=None):
+        return (self._account, variable_id, version)
+
+    def _revalidate_in_background(self, *variable_ids):
+        """
+        Refreshes stale cache entries without blocking the caller. Variables
+        that already have a refresh in flight are skipped.
+        """
+        with self._revalidating_lock:
+            variable_ids = [variable_id for variable_id in variable_ids
+                            if variable_id not in self._revalidating]
+            self._revalidating.update(variable_ids)
+
+        if not variable_ids:
+            return
+
+        threading.Thread(target=self._revalidate,
+                         args=variable_ids,
+                         name='conjur-cache-revalidation',
+                         daemon=True).start()
+
+    def _revalidate(self, *variable_ids):
+        try:
+            if len(variable_ids) == 1:
+                variable_value = self._api.get_variable(variable_ids[0])
+                self._cache.set(self._cache_key(variable_ids[0]), variable_value)
+            else:
+                variable_values = self._api.get_variables(*variable_ids)
+                for variable_id, variable_value in variable_values.items():
+                    self._cache.set(self._cache_key(variable_id), variable_value.encode('utf-8'))
+        # The stale value keeps being served until the hard TTL so
+        # a failed refresh is not fatal
+        # pylint: disable=broad-except
+        except Exception as error:
+            # pylint: disable=logging-fstring-interpolation
+            logging.debug(f"Failed to refresh cached variables {list(variable_ids)}: {error}")
+        finally:
+            with self._revalidating_lock:
+                self._revalidating.difference_update(variable_ids)
+
+    def close(self):
+        """
+        Stops background work and releases the pooled connections held by the client
+        """
+        self._api.close()
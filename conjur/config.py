@@ -31,6 +31,7 @@ class Config():
         ('appliance_url', 'url', True),
         ('cert_file', 'ca_bundle', False),
         ('plugins', 'plugins', False),
+        ('read_urls', 'read_urls', False),
     ]
 
     _config = {}
@@ -47,7 +48,7 @@ class Config():
             if mandatory:
                 assert config_field_name in config
 
-            setattr(self, attribute_name, config[config_field_name])
+            setattr(self, attribute_name, config.get(config_field_name))
             self._config[attribute_name] = getattr(self, attribute_name)
 
     def __repr__(self):
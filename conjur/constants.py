@@ -25,6 +25,11 @@ DEFAULT_CONFIG_FILE = os.path.expanduser(os.path.join('~', '.conjurrc'))
 DEFAULT_NETRC_FILE = os.path.expanduser(os.path.join('~', DEFAULT_NETRC_FILE_NAME))
 DEFAULT_CERTIFICATE_FILE = os.path.expanduser(os.path.join('~', "conjur-server.pem"))
 CREDENTIAL_HOST_PATH = "/authn"
+DEFAULT_TOKEN_CACHE_FILE = os.path.expanduser(os.path.join('~', INTERNAL_FILE_PREFIX
+                                                         + "conjur-token-cache"))
+DEFAULT_AGENT_SOCKET = os.getenv('CONJUR_AGENT_SOCKET',
+                                 os.path.expanduser(os.path.join('~', INTERNAL_FILE_PREFIX
+                                                                 + "conjur-agent.sock")))
 
 PASSWORD_COMPLEXITY_CONSTRAINTS_MESSAGE = "The password must contain at least 12 characters: " \
                                           "2 uppercase, 2 lowercase, 1 digit, 1 special character"
@@ -26,3 +26,41 @@ class OperationNotCompletedException(Exception):
 
 class MissingRequiredParameterException(Exception):
     """ Exception for when user does not input a required paramter """
+
+class PartialBatchFailureException(Exception):
+    """
+    Exception for when only some of the requests that make up a batch
+    operation succeeded. Holds the results of the ones that succeeded and
+    the errors, keyed by item, of the ones that failed
+    """
+    def __init__(self, results, errors, message=None):
+        self.results = results
+        self.errors = errors
+        if message is None:
+            message = f"Error: Failed to complete {len(errors)} of " \
+                      f"{len(results) + len(errors)} batch items. " \
+                      f"Failed items: {', '.join(map(str, errors))}"
+        self.message = message
+        super().__init__(self.message)
+
+class AgentRequestException(Exception):
+    """
+    Exception for when the agent fails to execute a forwarded request.
+    is_http_error is set when the agent's request to the Conjur server failed
+    """
+    def __init__(self, message, is_http_error=False):
+        self.message = message
+        self.is_http_error = is_http_error
+        super().__init__(self.message)
+
+class CircuitOpenException(Exception):
+    """
+    Exception for when a request is rejected without being sent because
+    the circuit breaker of its server is open
+    """
+    def __init__(self, url, message=None):
+        self.url = url
+        if message is None:
+            message = f"Error: Requests to '{url}' are suspended after repeated failures"
+        self.message = message
+        super().__init__(self.message)
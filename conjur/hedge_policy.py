@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""
+HedgePolicy module
+
+This module holds the policy for hedging reads, which sends a duplicate of
+a read to another node when the first one is slower than usual so that an
+occasional slow node does not dominate the tail latency
+"""
+
+# Builtins
+import math
+import threading
+from collections import deque
+
+# Internals
+from conjur.retry_policy import RetryBudget
+
+# A read is hedged once it takes longer than this percentile of the
+# latest read latencies
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_HEDGE_MIN_DELAY = 0.01
+DEFAULT_HEDGE_MAX_DELAY = 1
+DEFAULT_HEDGE_WINDOW_SIZE = 200
+# Until enough latencies were measured, reads are hedged after the max delay
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+# Each read earns a fraction of a hedge so that hedges add at most this
+# much load when every read is slow
+DEFAULT_HEDGE_RATIO = 0.1
+DEFAULT_HEDGE_MAX_WORKERS = 32
+
+
+class HedgePolicy:
+    """
+    HedgePolicy
+
+    This class configures the hedging of variable reads. A read that has not
+    answered within the percentile of the latest read latencies, bounded by
+    min_delay and max_delay, is sent again to another read URL. The first
+    answer wins. Hedges are taken from a budget and the reads run on a pool
+    of up to max_workers threads.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, percentile=DEFAULT_HEDGE_PERCENTILE,
+                 min_delay=DEFAULT_HEDGE_MIN_DELAY,
+                 max_delay=DEFAULT_HEDGE_MAX_DELAY,
+                 window_size=DEFAULT_HEDGE_WINDOW_SIZE,
+                 min_samples=DEFAULT_HEDGE_MIN_SAMPLES,
+                 budget=None,
+                 max_workers=DEFAULT_HEDGE_MAX_WORKERS):
+        if not 0 < percentile <= 100:
+            raise ValueError("Error: Hedge percentile must be greater than 0 and at most 100")
+
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.budget = budget if budget is not None else RetryBudget(ratio=DEFAULT_HEDGE_RATIO)
+        self.max_workers = max_workers
+
+        self._latencies = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """
+        Method that returns the seconds to wait for a read before hedging it
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        if len(latencies) < self.min_samples:
+            return self.max_delay
+
+        # Nearest-rank percentile
+        latency = latencies[math.ceil(self.percentile / 100 * len(latencies)) - 1]
+        return min(max(latency, self.min_delay), self.max_delay)
+
+    def record(self, latency):
+        """
+        Method that records the latency of a read that succeeded
+        """
+        with self._lock:
+            self._latencies.append(latency)
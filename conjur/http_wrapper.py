@@ -9,10 +9,20 @@ HTTP-based endpoints in a generic way
 
 import base64
 import logging
+import time
 from enum import Enum
 from urllib.parse import quote
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from conjur.errors import CircuitOpenException
+
+# Defaults for the pooled transport. These mirror the defaults of the
+# underlying 'requests' adapter but are kept here so callers can reason
+# about them without digging into third party code
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
 
 
 class HttpVerb(Enum):
@@ -27,11 +37,89 @@ class HttpVerb(Enum):
     PATCH = 5
 
 
-#pylint: disable=too-many-locals
-def invoke_endpoint(http_verb, endpoint, params, *args, check_errors=True,
-                    ssl_verify=True, auth=None, api_token=None, query=None):
+class _TransportAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies a default timeout to the requests that do not
+    set their own, feeds the retry budget of the retry policy and goes
+    through the circuit breaker, if any
+    """
+    def __init__(self, timeout=None, circuit_breaker=None, **kwargs):
+        self.timeout = timeout
+        self.circuit_breaker = circuit_breaker
+        super().__init__(**kwargs)
+
+    # pylint: disable=arguments-differ
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+
+        # The circuit sees the outcome of a request once all its retries,
+        # which happen within this call, are done
+        probe = False
+        if self.circuit_breaker is not None:
+            probe = self.circuit_breaker.acquire(request.url)
+
+        # Retries happen within this call so it is sent once per request
+        budget = getattr(self.max_retries, 'budget', None)
+        if budget is not None:
+            budget.deposit()
+
+        start_time = time.monotonic()
+        try:
+            response = super().send(request, timeout=timeout, **kwargs)
+        except Exception as error:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(request.url, time.monotonic() - start_time,
+                                            is_server_failure(error), probe)
+            raise
+
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(request.url, time.monotonic() - start_time,
+                                        response.status_code >= 500, probe)
+        return response
+
+
+def create_session(pool_connections=DEFAULT_POOL_CONNECTIONS,
+                   pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                   keep_alive=True,
+                   timeout=None,
+                   retry_policy=None,
+                   circuit_breaker=None):
     """
-    This method flexibly invokes HTTP calls from 'requests' module
+    This method builds a 'requests' session backed by a connection pool
+    so that subsequent calls to the same Conjur server reuse the already
+    established TCP/TLS connection instead of opening a new one each time.
+
+    pool_connections is the number of per-host pools to cache, pool_maxsize
+    is the max number of connections kept alive for a single host and
+    keep_alive controls whether connections are returned to the pool at all.
+    timeout is the default seconds to wait for a connection and for each
+    read, or a (connect, read) tuple, and retry_policy is the RetryPolicy of
+    requests that failed transiently. Without them, requests wait forever
+    and are not retried. circuit_breaker is the CircuitBreaker that fails
+    requests fast while their server keeps failing.
+    """
+    session = requests.Session()
+    adapter_options = {}
+    if retry_policy is not None:
+        adapter_options['max_retries'] = retry_policy.build_retry()
+    adapter = _TransportAdapter(timeout=timeout,
+                                circuit_breaker=circuit_breaker,
+                                pool_connections=pool_connections,
+                                pool_maxsize=pool_maxsize,
+                                **adapter_options)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+
+    return session
+
+def build_url(endpoint, params):
+    """
+    This method builds the URL of the endpoint, escaping all params
+    except the base URL
     """
     orig_params = params or {}
 
@@ -43,21 +131,49 @@ def invoke_endpoint(http_verb, endpoint, params, *args, check_errors=True,
             continue
         params[key] = quote(value, safe='')
 
-    url = endpoint.value.format(**params)
+    return endpoint.value.format(**params)
 
+def build_headers(api_token=None):
+    """
+    This method builds the request headers, including the
+    authorization header when an API token is provided
+    """
     headers = {}
     if api_token:
         encoded_token = base64.b64encode(api_token.encode()).decode('utf-8')
         headers['Authorization'] = 'Token token="{}"'.format(encoded_token)
 
-    request_method = getattr(requests, http_verb.name.lower())
+    return headers
+
+#pylint: disable=too-many-locals
+def invoke_endpoint(http_verb, endpoint, params, *args, check_errors=True,
+                    ssl_verify=True, auth=None, api_token=None, query=None,
+                    session=None, stream=False, timeout=None):
+    """
+    This method flexibly invokes HTTP calls from 'requests' module. When a
+    session is provided, the call is dispatched through it so that the
+    pooled connections can be reused. When stream is set, the body is not
+    downloaded up front and must be read (or the response closed) by the caller.
+    timeout overrides the default timeout of the session for this call.
+    """
+    url = build_url(endpoint, params)
+    headers = build_headers(api_token)
+
+    request_method = getattr(session or requests, http_verb.name.lower())
+
+    request_options = {}
+    if stream:
+        request_options['stream'] = True
+    if timeout is not None:
+        request_options['timeout'] = timeout
 
     #pylint: disable=not-callable
     response = request_method(url, *args,
                               params=query,
                               verify=ssl_verify,
                               auth=auth,
-                              headers=headers)
+                              headers=headers,
+                              **request_options)
 
     if check_errors:
         # takes the "requests" response object and expands the
@@ -75,6 +191,27 @@ def invoke_endpoint(http_verb, endpoint, params, *args, check_errors=True,
 
     return response
 
+def is_server_failure(error):
+    """
+    This method returns whether the error shows that the server failed rather
+    than the request: it could not be reached, timed out, answered with
+    a server error or its circuit breaker is open
+    """
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                          CircuitOpenException)):
+        return True
+
+    return isinstance(error, requests.exceptions.HTTPError) \
+        and error.response is not None and error.response.status_code >= 500
+
+def is_unauthorized(error):
+    """
+    This method returns whether the error shows that the server rejected
+    the credentials of the request, e.g. an expired or revoked API token
+    """
+    return isinstance(error, requests.exceptions.HTTPError) \
+        and error.response is not None and error.response.status_code == 401
+
 # Not coverage tested since this code should never be hit
 # from checked-in code
 def enable_http_logging(): #pragma: no cover
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+JSON stream module
+
+This module holds the logic for incrementally parsing a JSON array
+from a stream of response chunks
+"""
+
+# Builtins
+import codecs
+import json
+import re
+
+WHITESPACE = ' \t\n\r'
+# What is left of the buffer after a value when the value may be a number
+# that continues in the next chunk, e.g. '' after '2' or '.' after '2'
+NUMBER_CONTINUATION = re.compile(r'[0-9.eE+-]*\Z')
+
+
+def iter_json_array(chunks):
+    """
+    This method yields the elements of the top-level JSON array that the
+    byte chunks make up, one by one as soon as each has been received.
+    Only the element being parsed is buffered, so memory stays proportional
+    to the largest element rather than to the whole array.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    exhausted = False
+
+    def read_more():
+        nonlocal buffer, position, exhausted
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer = buffer[position:] + text_decoder.decode(chunk)
+            position = 0
+            return
+        buffer = buffer[position:] + text_decoder.decode(b'', final=True)
+        position = 0
+        exhausted = True
+
+    def next_token():
+        """
+        Skips whitespace and returns the next character without consuming it
+        """
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if exhausted:
+                raise json.JSONDecodeError("Unexpected end of JSON array", buffer, position)
+            read_more()
+
+    if next_token() != '[':
+        raise json.JSONDecodeError("Expected a JSON array", buffer, position)
+    position += 1
+
+    if next_token() == ']':
+        return
+
+    while True:
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+            # A value that runs up to the end of the buffer, or that is only
+            # followed by the start of a fraction or an exponent (e.g. '2.'),
+            # may be a number that continues in the next chunk
+            if not exhausted and NUMBER_CONTINUATION.match(buffer, end):
+                raise json.JSONDecodeError("Incomplete element", buffer, end)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            read_more()
+            continue
+
+        position = end
+        yield element
+
+        separator = next_token()
+        position += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise json.JSONDecodeError("Expected ',' or ']'", buffer, position - 1)
+        next_token()
@@ -15,19 +15,30 @@ class ListController:
     """
     ListController
 
-    This class represents the Presentation Layer for the LIST command
+    This class represents the Presentation Layer for the LIST command.
+    With an output format, each resource is written as soon as it is
+    fetched instead of after the whole listing has been collected.
     """
+    FORMAT_JSON = 'json'
+    FORMAT_NDJSON = 'ndjson'
+    OUTPUT_FORMATS = (FORMAT_JSON, FORMAT_NDJSON)
 
-    def __init__(self, list_logic, list_data):
+    def __init__(self, list_logic, list_data, output_format=None):
         self.list_logic = list_logic
         self.list_data = list_data
+        self.output_format = output_format
 
     def load(self):
         """
         Method that facilitates all method calls in this class
         """
-        result = self.list_logic.list(self.list_data)
-        self.print_json_result(result)
+        if self.output_format == self.FORMAT_NDJSON:
+            self.print_ndjson_result(self.list_logic.iter_list(self.list_data))
+        elif self.output_format == self.FORMAT_JSON:
+            self.print_compact_json_result(self.list_logic.iter_list(self.list_data))
+        else:
+            result = self.list_logic.list(self.list_data)
+            self.print_json_result(result)
 
     @classmethod
     def print_json_result(cls, result):
@@ -35,3 +46,23 @@ class ListController:
         Method to print the JSON of the returned result
         """
         sys.stdout.write(f"{json.dumps(result, indent=4)}\n")
+
+    @classmethod
+    def print_ndjson_result(cls, results):
+        """
+        Method to print each result as a JSON document on its own line
+        """
+        for result in results:
+            sys.stdout.write(f"{json.dumps(result)}\n")
+
+    @classmethod
+    def print_compact_json_result(cls, results):
+        """
+        Method to print the results as a compact JSON array, one element at a time
+        """
+        sys.stdout.write("[")
+        for index, result in enumerate(results):
+            if index:
+                sys.stdout.write(",")
+            sys.stdout.write(json.dumps(result, separators=(',', ':')))
+        sys.stdout.write("]\n")
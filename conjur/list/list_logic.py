@@ -8,23 +8,46 @@ This module is the business logic for executing the list command
 # pylint: disable=too-few-public-methods
 import logging
 
+from conjur.errors import InvalidOperationException
+
 
 class ListLogic:
     """
     ListLogic
 
     This class holds the business logic for executing and manipulating
-    returned data
+    returned data. Resources are fetched with a single request and parsed
+    as they arrive. With prefetch, they are fetched page by page with up
+    to that many page requests in flight so that large listings do not
+    wait on one round trip per page.
     """
-    def __init__(self, client):
+    LIST_PAGE_SIZE = 1000
+
+    def __init__(self, client, prefetch=None):
+        if prefetch is not None and prefetch < 0:
+            raise InvalidOperationException("Error: Prefetch cannot be negative")
+
         self.client = client
+        self.prefetch = prefetch
 
     def list(self, list_data):
         """
         Method for calling list from the client service
         """
+        return list(self.iter_list(list_data))
+
+    def iter_list(self, list_data):
+        """
+        Method that lazily yields the resources from the client service
+        as their pages are fetched
+        """
         list_constraints = self.build_constraints(list_data)
-        return self.client.list(list_constraints)
+        if not self.prefetch:
+            return self.client.stream_resources(list_constraints)
+
+        return self.client.iter_resources(list_constraints,
+                                          page_size=self.LIST_PAGE_SIZE,
+                                          prefetch=self.prefetch)
 
     @classmethod
     def build_constraints(cls, list_data):
@@ -13,8 +13,9 @@ import os
 import sys
 
 # Internals
-from conjur.constants import DEFAULT_NETRC_FILE, DEFAULT_CONFIG_FILE
+from conjur.constants import DEFAULT_NETRC_FILE, DEFAULT_CONFIG_FILE, DEFAULT_TOKEN_CACHE_FILE
 from conjur.init import ConjurrcData
+from conjur.token_cache import TokenCache, is_token_cache_supported
 
 # pylint: disable=too-few-public-methods
 class LogoutController:
@@ -38,6 +39,7 @@ class LogoutController:
             elif os.path.exists(DEFAULT_NETRC_FILE) and os.path.getsize(DEFAULT_NETRC_FILE) != 0:
                 conjurrc = ConjurrcData.load_from_file(DEFAULT_CONFIG_FILE)
                 self.logout_logic.remove_credentials(conjurrc.appliance_url)
+                self.remove_cached_api_tokens()
                 logging.debug("Logout successful")
                 sys.stdout.write("Successfully logged out from Conjur.\n")
             else:
@@ -45,3 +47,11 @@ class LogoutController:
         except Exception as error:
             # pylint: disable=raise-missing-from
             raise Exception(f"Failed to log out. {error}.")
+
+    @classmethod
+    def remove_cached_api_tokens(cls):
+        """
+        Method for removing the API tokens cached on the user machine
+        """
+        if is_token_cache_supported():
+            TokenCache(DEFAULT_TOKEN_CACHE_FILE).clear()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+RequestCoalescer module
+
+This module holds the logic for merging concurrent single variable
+reads into one batch request
+"""
+
+# Builtins
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+# Internals
+from conjur.errors import PartialBatchFailureException
+
+DEFAULT_COALESCE_WINDOW = 0.005
+
+
+class RequestCoalescer:
+    """
+    RequestCoalescer
+
+    This class collects the variable reads that arrive within a short window
+    and fetches them with a single batch request. The first caller of a window
+    waits for the window to pass and then sends the batch on behalf of everyone
+    that joined it. Each caller gets back only its own value.
+
+    If the batch request fails as a whole (e.g. one of the variables does not
+    exist), each variable is fetched on its own so that callers only see the
+    errors of their own variables.
+    """
+    def __init__(self, fetch_many, fetch_one, window=DEFAULT_COALESCE_WINDOW):
+        self.fetch_many = fetch_many
+        self.fetch_one = fetch_one
+        self.window = window
+
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def get(self, variable_id):
+        """
+        Method that returns the value of the variable once the batch it was
+        added to has been fetched
+        """
+        with self._lock:
+            is_leader = self._pending is None
+            if is_leader:
+                self._pending = {}
+
+            future = self._pending.get(variable_id)
+            if future is None:
+                future = Future()
+                self._pending[variable_id] = future
+
+        if is_leader:
+            time.sleep(self.window)
+            self._dispatch()
+
+        return future.result()
+
+    def _dispatch(self):
+        with self._lock:
+            batch = self._pending
+            self._pending = None
+
+        # pylint: disable=logging-fstring-interpolation
+        logging.debug(f"Fetching {len(batch)} coalesced variable reads...")
+        try:
+            variable_values = self.fetch_many(*batch)
+        except PartialBatchFailureException as partial_failure:
+            variable_values = partial_failure.results
+            for variable_id, error in partial_failure.errors.items():
+                batch.pop(variable_id).set_exception(error)
+        # pylint: disable=broad-except
+        except Exception as error:
+            if len(batch) == 1:
+                next(iter(batch.values())).set_exception(error)
+                return
+
+            logging.debug(f"Coalesced batch read failed: {error}. Fetching variables one by one...")
+            self._dispatch_one_by_one(batch)
+            return
+
+        for variable_id, future in batch.items():
+            if variable_id not in variable_values:
+                future.set_exception(RuntimeError("Error: No value returned for "
+                                                  f"variable '{variable_id}'"))
+                continue
+
+            # Batch reads return text while single reads return raw bytes
+            future.set_result(variable_values[variable_id].encode('utf-8'))
+
+    def _dispatch_one_by_one(self, batch):
+        for variable_id, future in batch.items():
+            try:
+                future.set_result(self.fetch_one(variable_id))
+            # pylint: disable=broad-except
+            except Exception as error:
+                future.set_exception(error)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+"""
+RetryPolicy module
+
+This module holds the policy for retrying requests that failed because of
+a transient server or network error, with a budget that keeps retries from
+multiplying the load on a server that is already struggling
+"""
+
+# Builtins
+import random
+import threading
+import time
+
+# Third Parties
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_MAX_BACKOFF = 10
+# Statuses that the server sends when it is overloaded or briefly unavailable
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+# Each request earns a fraction of a retry and the budget also refills over
+# time so that clients that send few requests can still retry
+DEFAULT_RETRY_RATIO = 0.2
+DEFAULT_MIN_RETRIES_PER_SECOND = 1
+DEFAULT_MAX_RETRY_BALANCE = 10
+
+
+class RetryBudget:
+    """
+    RetryBudget
+
+    This class limits retries to a ratio of the requests that are sent, plus
+    a minimum rate, so that retries add at most a bounded amount of load when
+    every request fails. It is shared by all the requests of a client.
+    """
+    def __init__(self, ratio=DEFAULT_RETRY_RATIO,
+                 min_retries_per_second=DEFAULT_MIN_RETRIES_PER_SECOND,
+                 max_balance=DEFAULT_MAX_RETRY_BALANCE):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_balance = max_balance
+
+        self._balance = max_balance
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """
+        Method that records a request, which earns a fraction of a retry
+        """
+        with self._lock:
+            self._refill()
+            self._balance = min(self._balance + self.ratio, self.max_balance)
+
+    def withdraw(self):
+        """
+        Method that returns whether a retry is allowed, in which case it is
+        taken from the budget
+        """
+        with self._lock:
+            self._refill()
+            if self._balance < 1:
+                return False
+
+            self._balance -= 1
+            return True
+
+    def _refill(self):
+        now = time.monotonic()
+        self._balance = min(self._balance + (now - self._updated_at) * self.min_retries_per_second,
+                            self.max_balance)
+        self._updated_at = now
+
+
+class _BudgetedRetry(Retry):
+    """
+    Retry of urllib3 that takes every retry from a RetryBudget and spreads
+    its backoff with full jitter
+    """
+    budget = None
+    max_backoff = DEFAULT_MAX_BACKOFF
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.budget = self.budget
+        retry.max_backoff = self.max_backoff
+        return retry
+
+    # pylint: disable=too-many-arguments
+    def increment(self, method=None, url=None, response=None, error=None,
+                  _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response=response, error=error,
+                                  _pool=_pool, _stacktrace=_stacktrace)
+        if self.budget is not None and not self.budget.withdraw():
+            # Without raise_on_status, urllib3 returns the last response
+            # instead of raising when the retry was caused by its status
+            raise MaxRetryError(_pool, url, error or ResponseError("retry budget exhausted"))
+
+        return retry
+
+    def get_backoff_time(self):
+        # Full jitter keeps clients that failed together from retrying together
+        backoff = min(super().get_backoff_time(), self.max_backoff)
+        return random.uniform(0, backoff) if backoff > 0 else 0
+
+
+# pylint: disable=too-few-public-methods
+class RetryPolicy:
+    """
+    RetryPolicy
+
+    This class configures the retries of requests that failed to connect,
+    whose connection was reset or that were answered with 429, 502, 503 or
+    504. Requests whose connection failed after they were sent, or that got
+    one of the statuses, are only retried for idempotent verbs. Retries wait
+    for an exponential backoff with jitter, or for the Retry-After the server
+    sent, and give up early when the budget is spent.
+    """
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 max_backoff=DEFAULT_MAX_BACKOFF,
+                 budget=None):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def build_retry(self):
+        """
+        Method that returns the urllib3 Retry that implements the policy
+        """
+        retry = _BudgetedRetry(total=self.max_retries,
+                               status_forcelist=RETRY_STATUSES,
+                               backoff_factor=self.backoff_factor,
+                               raise_on_status=False)
+        retry.budget = self.budget
+        retry.max_backoff = self.max_backoff
+        return retry
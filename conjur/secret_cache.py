@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+SecretCache module
+
+This module holds an in-process cache for secret values so that
+repeated reads of the same variable do not go over the network
+"""
+
+# Builtins
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_MAX_ENTRIES = 1000
+DEFAULT_CACHE_TTL = 60
+
+
+class SecretCache:
+    """
+    SecretCache
+
+    This class is a thread-safe, size-bounded LRU cache where each entry
+    becomes stale ttl seconds after it was stored and expires hard_ttl
+    seconds after it was stored. Stale entries can still be read through
+    get_entry, which lets callers serve them while they are being refreshed.
+    Entries stored as immutable (e.g. a specific version of a variable)
+    never expire and are only removed when evicted by newer entries.
+    With keep_expired, expired entries are kept until they are evicted so
+    that get_last_known can still return them, e.g. while the server is down.
+    """
+    def __init__(self, max_entries=DEFAULT_CACHE_MAX_ENTRIES, ttl=DEFAULT_CACHE_TTL,
+                 hard_ttl=None, keep_expired=False):
+        if max_entries < 1:
+            raise ValueError("Error: Cache max entries must be at least 1")
+
+        if hard_ttl is None:
+            hard_ttl = ttl
+        if hard_ttl < ttl:
+            raise ValueError("Error: Cache hard TTL cannot be shorter than its TTL")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hard_ttl = hard_ttl
+        self.keep_expired = keep_expired
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Method that returns the cached value for the key or None
+        if it is missing, stale or expired
+        """
+        entry = self.get_entry(key)
+        if entry is None or entry[1]:
+            return None
+
+        return entry[0]
+
+    def get_entry(self, key):
+        """
+        Method that returns a (value, is_stale) tuple for the key or None
+        if it is missing or expired
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, stale_at, expires_at = entry
+            if expires_at is not None and now >= expires_at:
+                if not self.keep_expired:
+                    del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value, stale_at is not None and now >= stale_at
+
+    def get_last_known(self, key):
+        """
+        Method that returns the cached value for the key even if it is stale
+        or expired, or None if it is missing. Expired entries are only
+        kept with keep_expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, immutable=False):
+        """
+        Method that stores the value for the key, evicting the least
+        recently used entry if the cache is full
+        """
+        stale_at = expires_at = None
+        if not immutable:
+            now = time.monotonic()
+            stale_at = now + self.ttl
+            expires_at = now + self.hard_ttl
+
+        with self._lock:
+            self._entries[key] = (value, stale_at, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Method that removes the key from the cache
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Method that removes all entries from the cache
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
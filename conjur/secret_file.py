@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+"""
+SecretFile module
+
+This module holds the logic for writing secret values to files without
+ever exposing a partially written or world-readable file
+"""
+
+# Builtins
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def open_secret_output(output):
+    """
+    This method yields a binary file object to write a secret to. The output
+    is either a binary file object, which is used as is, or a path. A path
+    is written through a temporary file that only its owner can read and
+    that replaces the path only once the whole secret has been written.
+    """
+    if not isinstance(output, (str, os.PathLike)):
+        yield output
+        return
+
+    output = os.fspath(output)
+    # mkstemp creates the file owner-only and in the same directory so that
+    # it can be renamed over the path
+    output_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output)),
+                                            prefix=f".{os.path.basename(output)}.")
+    try:
+        with os.fdopen(output_fd, 'wb') as output_file:
+            yield output_file
+        os.replace(temp_path, output)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
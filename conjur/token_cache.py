@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+TokenCache module
+
+This module holds an on-disk cache for API tokens so that separate
+processes of the same user can reuse a token instead of authenticating
+again
+"""
+
+# Builtins
+import json
+import logging
+import os
+import stat
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    # Not available on Windows, where the token cache is not supported
+    fcntl = None
+
+# Internals
+from conjur.constants import DEFAULT_TOKEN_CACHE_FILE
+
+
+def is_token_cache_supported():
+    """
+    Method that returns whether the platform supports the file locks
+    that the token cache needs
+    """
+    return fcntl is not None
+
+
+class TokenCache:
+    """
+    TokenCache
+
+    This class stores API tokens, along with their expiration, in a JSON file
+    that only its owner can read, keyed by appliance URL, account and login.
+    Callers serialize their access to the file across processes with lock()
+    and a file that can be read by others is never trusted.
+    """
+    def __init__(self, path=DEFAULT_TOKEN_CACHE_FILE):
+        if not is_token_cache_supported():
+            raise RuntimeError("Error: The API token cache is not supported on this platform")
+
+        self.path = path
+        self.lock_path = path + '.lock'
+
+    @staticmethod
+    def key(url, account, login_id):
+        """
+        Method that builds the cache key of a token
+        """
+        return f"{url}|{account}|{login_id}"
+
+    @contextmanager
+    def lock(self):
+        """
+        Method that holds an exclusive lock on the cache across processes
+        """
+        lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, stat.S_IRUSR | stat.S_IWUSR)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+
+    def get(self, key):
+        """
+        Method that returns a (token, expiration) tuple for the key or None
+        if it is missing or expired
+        """
+        entry = self._load().get(key)
+        if entry is None or entry['expires_at'] <= time.time():
+            return None
+
+        return entry['token'], datetime.fromtimestamp(entry['expires_at'])
+
+    def set(self, key, token, expiration):
+        """
+        Method that stores the token and its expiration for the key
+        """
+        now = time.time()
+        # Expired tokens of other logins are dropped while we are rewriting the file
+        entries = {entry_key: entry for entry_key, entry in self._load().items()
+                   if entry['expires_at'] > now}
+        entries[key] = {
+            'token': token,
+            'expires_at': expiration.timestamp(),
+        }
+        self._save(entries)
+
+    def invalidate(self, key):
+        """
+        Method that removes the token of the key from the cache
+        """
+        entries = self._load()
+        if entries.pop(key, None) is not None:
+            self._save(entries)
+
+    def clear(self):
+        """
+        Method that removes the cache file
+        """
+        for path in (self.path, self.lock_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as cache_file:
+                file_stat = os.fstat(cache_file.fileno())
+                if file_stat.st_uid != os.getuid() or stat.S_IMODE(file_stat.st_mode) & 0o077:
+                    logging.warning("Ignoring the API token cache '%s' because it can be "
+                                    "accessed by other users", self.path)
+                    return {}
+
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.debug("Ignoring corrupted API token cache '%s'", self.path)
+            return {}
+
+    def _save(self, entries):
+        # The file is written next to the cache and renamed over it so that
+        # readers never see a partial write. mkstemp creates it owner-only.
+        cache_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.',
+                                               prefix=os.path.basename(self.path))
+        try:
+            with os.fdopen(cache_fd, 'w') as cache_file:
+                json.dump(entries, cache_file)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
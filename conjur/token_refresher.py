@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+TokenRefresher module
+
+This module holds the logic for renewing the API token in the background
+before it expires so that regular requests never have to wait on an
+authentication round trip
+"""
+
+# Builtins
+import logging
+import random
+import threading
+from datetime import datetime
+
+DEFAULT_TOKEN_REFRESH_LEAD_TIME = 30
+DEFAULT_TOKEN_REFRESH_JITTER = 5
+
+
+class TokenRefresher:
+    """
+    TokenRefresher
+
+    This class runs a daemon thread that renews the API token of the given
+    API instance lead_time seconds (minus a random jitter) before it expires.
+    Failed refreshes are retried with exponential backoff.
+    """
+    INITIAL_BACKOFF = 1
+    MAX_BACKOFF = 30
+
+    def __init__(self, api, lead_time=DEFAULT_TOKEN_REFRESH_LEAD_TIME,
+                 jitter=DEFAULT_TOKEN_REFRESH_JITTER):
+        token_duration = api.API_TOKEN_DURATION * 60
+        if not 0 <= lead_time < token_duration:
+            raise ValueError("Error: Token refresh lead time must be between 0 "
+                             f"and {token_duration} seconds")
+
+        self.api = api
+        self.lead_time = lead_time
+        self.jitter = jitter
+
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name='conjur-token-refresher',
+                                        daemon=True)
+
+    def start(self):
+        """
+        Method that starts the background refresh thread
+        """
+        logging.debug("Starting background API token refresher...")
+        self._thread.start()
+
+    def stop(self):
+        """
+        Method that stops the background refresh thread
+        """
+        self._stop_event.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def next_refresh_delay(self):
+        """
+        Method that returns the number of seconds to wait before the next refresh
+        """
+        if self.api.api_token_expiration is None:
+            return 0
+
+        time_to_expiration = (self.api.api_token_expiration - datetime.now()).total_seconds()
+        delay = time_to_expiration - self.lead_time - random.uniform(0, self.jitter)
+        return max(0, delay)
+
+    def _run(self):
+        while not self._stop_event.wait(self.next_refresh_delay()):
+            self._refresh_with_backoff()
+
+    def _refresh_with_backoff(self):
+        backoff = self.INITIAL_BACKOFF
+        while not self._stop_event.is_set():
+            try:
+                self.api.refresh_api_token()
+                return
+            # pylint: disable=broad-except
+            except Exception as error:
+                # pylint: disable=logging-fstring-interpolation
+                logging.debug(f"Background API token refresh failed: {error}. "
+                              f"Retrying in {backoff} seconds...")
+
+            self._stop_event.wait(backoff + random.uniform(0, backoff))
+            backoff = min(backoff * 2, self.MAX_BACKOFF)
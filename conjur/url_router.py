@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+UrlRouter module
+
+This module holds the logic for deciding which appliance URL each request
+is sent to when reads are served by other nodes than the leader
+"""
+
+# Builtins
+import logging
+import random
+import threading
+import time
+
+# Weight of the latest latency in the moving average of a node
+DEFAULT_EWMA_ALPHA = 0.3
+# Seconds that a failed node is ejected for. The time doubles with every
+# consecutive failure up to the max.
+DEFAULT_EJECTION_TIME = 5
+DEFAULT_MAX_EJECTION_TIME = 60
+
+
+# pylint: disable=too-few-public-methods
+class _ReadNode:
+    """
+    The latency and health of one read URL
+    """
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.pending = 0
+        self.failures = 0
+        self.ejected_until = 0
+
+
+class UrlRouter:
+    """
+    UrlRouter
+
+    This class routes writes, and any request that is not a read, to the
+    leader URL and balances reads over the read URLs (e.g. followers).
+    Without read URLs, every request goes to the leader.
+
+    Each read picks the better of two random nodes by their moving average
+    latency times their reads in flight (power of two choices), so slow
+    nodes get less traffic without every client piling onto the fastest one.
+    Nodes that fail are ejected and probed again once their ejection ends.
+    """
+    def __init__(self, leader_url, read_urls=None, ewma_alpha=DEFAULT_EWMA_ALPHA,
+                 ejection_time=DEFAULT_EJECTION_TIME,
+                 max_ejection_time=DEFAULT_MAX_EJECTION_TIME):
+        if isinstance(read_urls, str):
+            read_urls = [read_urls]
+
+        self.leader_url = leader_url
+        self.read_urls = list(dict.fromkeys(read_urls or [])) or [leader_url]
+        self.ewma_alpha = ewma_alpha
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+
+        self._nodes = [_ReadNode(url) for url in self.read_urls]
+        self._nodes_by_url = {node.url: node for node in self._nodes}
+        self._lock = threading.Lock()
+
+    def read_url(self, exclude=None):
+        """
+        Method that returns the URL that the next read is sent to. The read
+        counts as in flight until its outcome is reported. The excluded URL
+        is only returned if it is the only read URL.
+        """
+        with self._lock:
+            now = time.monotonic()
+            nodes = [node for node in self._nodes if node.url != exclude] or self._nodes
+            candidates = [node for node in nodes if node.ejected_until <= now]
+            if not candidates:
+                # Reads are never refused. The node whose ejection ends first
+                # is probed early instead.
+                candidates = [min(nodes, key=lambda node: node.ejected_until)]
+            elif len(candidates) > 2:
+                candidates = random.sample(candidates, 2)
+
+            node = min(candidates, key=self._score)
+            node.pending += 1
+            return node.url
+
+    def report(self, url, latency, failed=False):
+        """
+        Method that records the latency of a read sent to the URL, or ejects
+        the node when it failed
+        """
+        with self._lock:
+            node = self._nodes_by_url.get(url)
+            if node is None:
+                return
+
+            node.pending -= 1
+            if failed:
+                node.failures += 1
+                ejection_time = min(self.ejection_time * 2 ** (node.failures - 1),
+                                    self.max_ejection_time)
+                node.ejected_until = time.monotonic() + ejection_time
+                # pylint: disable=logging-fstring-interpolation
+                logging.debug(f"Ejecting '{url}' from reads for {ejection_time} seconds "
+                              f"after {node.failures} consecutive failures")
+                return
+
+            node.failures = 0
+            if node.latency is None:
+                node.latency = latency
+            else:
+                node.latency += self.ewma_alpha * (latency - node.latency)
+
+    @staticmethod
+    def _score(node):
+        # Nodes without a measured latency yet are preferred so they get one
+        return (node.latency or 0) * (node.pending + 1)
@@ -6,6 +6,7 @@ VariableController module
 This module is the controller that facilitates all list actions
 required to successfully execute the VARIABLE command
 """
+import json
 import sys
 
 # pylint: disable=too-few-public-methods
@@ -23,12 +24,52 @@ class VariableController:
         """
         Method that facilitates get call to the logic
         """
+        if self.variable_data.output is not None:
+            self.write_variable()
+            return
+
         result = self.variable_logic.get_variable(self.variable_data)
         sys.stdout.write(result+'\n')
 
+    def write_variable(self):
+        """
+        Method that facilitates the get call to the logic that writes the
+        raw value to the output file, or to stdout for '-'
+        """
+        if self.variable_data.output == '-':
+            sys.stdout.flush()
+            self.variable_logic.write_variable(self.variable_data, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+            return
+
+        self.variable_logic.write_variable(self.variable_data, self.variable_data.output)
+        sys.stdout.write("Successfully wrote value of variable "
+                         f"'{self.variable_data.variable_id[0]}' "
+                         f"to '{self.variable_data.output}'\n")
+
     def set_variable(self):
         """
         Method that facilitates set call to the logic
         """
         result = self.variable_logic.set_variable(self.variable_data)
         sys.stdout.write(f"Successfully set value for variable '{result}'\n")
+
+    def set_many_variables(self):
+        """
+        Method that facilitates set-many call to the logic. Writes which
+        variables were set or unchanged and why the others failed and returns
+        whether none of them failed.
+        """
+        set_variable_ids, unchanged_variable_ids, errors = \
+            self.variable_logic.set_many_variables(self.variable_data)
+        report = {
+            'set': set_variable_ids,
+            'unchanged': unchanged_variable_ids,
+            'failed': {variable_id: str(error) for variable_id, error in errors.items()},
+        }
+        sys.stdout.write(json.dumps(report, indent=4) + '\n')
+
+        if errors:
+            sys.stderr.write(f"Error: Failed to set {len(errors)} of "
+                             f"{len(self.variable_data.variables)} variables\n")
+        return not errors
@@ -18,6 +18,10 @@ class VariableData:
         # pylint: disable=line-too-long
         self.variable_version = arg_params['variable_version'] if arg_params['variable_version'] else None
         self.value = arg_params['value'] if arg_params['value'] else None
+        self.output = arg_params.get('output')
+        self.variables = arg_params.get('variables')
+        self.max_workers = arg_params.get('max_workers')
+        self.skip_unchanged = arg_params.get('skip_unchanged', False)
 
     def __repr__(self):
         result = []
@@ -25,4 +29,6 @@ class VariableData:
         if self.action == 'get': result.append(f"Getting variable values for: {self.variable_id} ")
         if self.variable_version: result.append(f"with version {self.variable_version}")
         if self.action == 'set': result.append(f"Setting variable value for: '{self.variable_id}'")
+        if self.action == 'set-many':
+            result.append(f"Setting variable values for {len(self.variables)} variables")
         return ''.join(result)
@@ -10,6 +10,9 @@ This module is the business logic for executing the VARIABLE command
 import json
 import logging
 
+# Internals
+from conjur.errors import InvalidOperationException, PartialBatchFailureException
+
 # pylint: disable=too-few-public-methods
 class VariableLogic:
     """
@@ -36,6 +39,19 @@ class VariableLogic:
             variable_values = self.client.get_many(*variable_data.variable_id)
             return json.dumps(variable_values, indent=4)
 
+    def write_variable(self, variable_data, output):
+        """
+        Method to handle get action activity that writes the raw value
+        to a binary file object or a path instead of returning it
+        """
+        logging.debug(variable_data)
+        if len(variable_data.variable_id) != 1:
+            raise InvalidOperationException("Error: Only the value of a single variable "
+                                            "can be written to an output file")
+
+        return self.client.stream_variable(variable_data.variable_id[0], output,
+                                           variable_data.variable_version)
+
     # pylint: disable=logging-fstring-interpolation
     def set_variable(self, variable_data):
         """
@@ -46,3 +62,51 @@ class VariableLogic:
 
         logging.debug(f"Successfully set value for variable '{variable_data.variable_id}'")
         return variable_data.variable_id
+
+    @staticmethod
+    def load_variables(variables_file):
+        """
+        Method that reads the JSON object mapping variable IDs to values
+        from the file
+        """
+        try:
+            variables = json.load(variables_file)
+        except ValueError:
+            variables = None
+
+        if not isinstance(variables, dict) or \
+                not all(isinstance(value, str) for value in variables.values()):
+            raise InvalidOperationException("Error: The variables must be a JSON object "
+                                            "mapping variable IDs to string values")
+        return variables
+
+    # pylint: disable=logging-fstring-interpolation
+    def set_many_variables(self, variable_data):
+        """
+        Method to handle all set-many action activity. Returns the IDs of
+        the variables that were set, the IDs of the ones that were skipped
+        because their value did not change and the errors, keyed by variable
+        ID, of the ones that failed.
+        """
+        logging.debug(variable_data)
+        set_options = {}
+        if variable_data.max_workers is not None:
+            set_options['max_workers'] = variable_data.max_workers
+        if variable_data.skip_unchanged:
+            set_options['skip_unchanged'] = True
+
+        errors = {}
+        try:
+            set_variable_ids = self.client.set_many(variable_data.variables, **set_options)
+        except PartialBatchFailureException as partial_failure:
+            set_variable_ids = partial_failure.results
+            errors = partial_failure.errors
+
+        # Only the variables that were skipped are missing from both
+        handled_variable_ids = set(set_variable_ids) | set(errors)
+        unchanged_variable_ids = [variable_id for variable_id in variable_data.variables
+                                  if variable_id not in handled_variable_ids]
+
+        logging.debug(f"Set values for {len(set_variable_ids)} variables and skipped "
+                      f"{len(unchanged_variable_ids)} unchanged variables")
+        return set_variable_ids, unchanged_variable_ids, errors
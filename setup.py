@@ -52,6 +52,11 @@ setup(
         "urllib3>=1.25.9"
     ],
 
+    extras_require={
+        # Keep this in sync with requirements.txt
+        "async": ["aiohttp>=3.7.0"],
+    },
+
     package_data={
         '': ['*.md'],
     },
@@ -0,0 +1,212 @@
+import io
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+from unittest.mock import ANY, MagicMock
+
+import requests
+
+from conjur.agent import AgentClient, AgentServer, is_agent_supported
+from conjur.errors import AgentRequestException, PartialBatchFailureException
+
+
+@unittest.skipUnless(is_agent_supported(), "Unix domain sockets are not supported")
+class AgentTest(unittest.TestCase):
+    def setUp(self):
+        self.socket_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.socket_dir, 'agent.sock')
+        self.client = MagicMock()
+
+    def tearDown(self):
+        shutil.rmtree(self.socket_dir)
+
+    def start_agent(self, identity=None):
+        server = AgentServer(self.client, self.socket_path, identity)
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+        thread.start()
+
+        def stop_agent():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.addCleanup(stop_agent)
+        self.agent_thread = thread
+
+        agent_client = AgentClient.connect(self.socket_path)
+        self.addCleanup(agent_client.close)
+        return agent_client
+
+    def test_agent_client_connect_returns_none_if_agent_is_not_running(self):
+        self.assertIsNone(AgentClient.connect(self.socket_path))
+
+    def test_agent_client_connect_returns_none_if_socket_is_stale(self):
+        open(self.socket_path, 'w').close()
+
+        self.assertIsNone(AgentClient.connect(self.socket_path))
+
+    def test_agent_socket_can_only_be_used_by_its_owner(self):
+        self.start_agent()
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+
+    def test_agent_replaces_stale_socket(self):
+        open(self.socket_path, 'w').close()
+
+        self.assertIsNone(self.start_agent().ping())
+
+    def test_agent_ping_returns_its_identity(self):
+        identity = {'url': 'https://conjur', 'account': 'myaccount', 'login_id': 'admin',
+                    'ssl_verify': True}
+
+        self.assertEqual(self.start_agent(identity).ping(), identity)
+
+    def test_agent_stops_when_asked_to(self):
+        self.start_agent().stop()
+
+        self.agent_thread.join(5)
+        self.assertFalse(self.agent_thread.is_alive())
+
+    def test_agent_refuses_to_start_if_another_agent_is_running(self):
+        self.start_agent()
+
+        with self.assertRaises(RuntimeError):
+            AgentServer(self.client, self.socket_path)
+
+    def test_agent_forwards_binary_variable_values(self):
+        self.client.get.return_value = b'\x00\xffsecret'
+
+        value = self.start_agent().get('myvar', '2')
+
+        self.assertEqual(value, b'\x00\xffsecret')
+        self.client.get.assert_called_once_with('myvar', '2')
+
+    def stream_chunks(self, *chunks, error=None):
+        def stream_variable(variable_id, output_file, version=None):
+            for chunk in chunks:
+                output_file.write(chunk)
+            if error is not None:
+                raise error
+            return sum(len(chunk) for chunk in chunks)
+        self.client.stream_variable.side_effect = stream_variable
+
+    def test_agent_client_streams_variable_values_to_output(self):
+        self.stream_chunks(b'\x00\xff', b'sec', b'ret')
+        output_file = io.BytesIO()
+
+        self.assertEqual(self.start_agent().stream_variable('myvar', output_file, '2'), 8)
+
+        self.assertEqual(output_file.getvalue(), b'\x00\xffsecret')
+        self.client.stream_variable.assert_called_once_with('myvar', ANY, '2')
+        self.client.get.assert_not_called()
+
+    def test_agent_sends_streamed_values_in_chunks(self):
+        self.stream_chunks(b'a' * 10, b'b' * 10)
+        agent_client = self.start_agent()
+        agent_client._send('stream_variable', variable_id='myvar', version=None)
+
+        self.assertEqual([agent_client._receive() for _ in range(3)],
+                         [{'chunk': 'YWFhYWFhYWFhYQ=='}, {'chunk': 'YmJiYmJiYmJiYg=='},
+                          {'result': 20}])
+
+    def test_agent_client_does_not_replace_output_path_if_stream_fails(self):
+        self.stream_chunks(b'partial', error=RuntimeError("connection reset"))
+        output_path = os.path.join(self.socket_dir, 'secret')
+        agent_client = self.start_agent()
+
+        with self.assertRaises(AgentRequestException):
+            agent_client.stream_variable('myvar', output_path)
+
+        self.assertEqual(os.listdir(self.socket_dir), ['agent.sock'])
+        # The connection can still be used after a failed stream
+        self.assertIsNone(agent_client.ping())
+
+    def test_agent_forwards_batch_variable_reads(self):
+        self.client.get_many.return_value = {'one': 'a', 'two': 'b'}
+
+        self.assertEqual(self.start_agent().get_many('one', 'two'), {'one': 'a', 'two': 'b'})
+        self.client.get_many.assert_called_once_with('one', 'two')
+
+    def test_agent_forwards_variable_writes(self):
+        self.start_agent().set('myvar', 'value')
+
+        self.client.set.assert_called_once_with('myvar', 'value')
+
+    def test_agent_forwards_bulk_variable_writes(self):
+        self.client.set_many.return_value = ['one', 'two']
+
+        result = self.start_agent().set_many({'one': 'a', 'two': 'b'}, max_workers=2)
+
+        self.assertEqual(result, ['one', 'two'])
+        self.client.set_many.assert_called_once_with([['one', 'a'], ['two', 'b']], max_workers=2)
+
+    def test_agent_forwards_skip_unchanged_bulk_variable_writes(self):
+        self.client.set_many.return_value = ['two']
+
+        result = self.start_agent().set_many({'one': 'a', 'two': 'b'}, skip_unchanged=True)
+
+        self.assertEqual(result, ['two'])
+        self.client.set_many.assert_called_once_with([['one', 'a'], ['two', 'b']], skip_unchanged=True)
+
+    def test_agent_forwards_partial_bulk_variable_write_failures(self):
+        self.client.set_many.side_effect = PartialBatchFailureException(
+            ['one'], {'two': RuntimeError("Error: Bad variable")})
+
+        with self.assertRaises(PartialBatchFailureException) as context:
+            self.start_agent().set_many([('one', 'a'), ('two', 'b')])
+
+        self.assertEqual(context.exception.results, ['one'])
+        self.assertEqual(context.exception.errors, {'two': "Error: Bad variable"})
+        self.client.set_many.assert_called_once_with([['one', 'a'], ['two', 'b']])
+
+    def test_agent_forwards_resource_listings(self):
+        self.client.iter_resources.return_value = iter(['one', 'two'])
+
+        resources = self.start_agent().iter_resources({'kind': 'user'}, page_size=10, prefetch=2)
+
+        self.assertEqual(list(resources), ['one', 'two'])
+        self.client.iter_resources.assert_called_once_with({'kind': 'user'}, page_size=10, prefetch=2)
+
+    def test_agent_forwards_streamed_resource_listings(self):
+        self.client.stream_resources.return_value = iter(['one', 'two'])
+
+        resources = self.start_agent().stream_resources({'kind': 'user'})
+
+        self.assertEqual(list(resources), ['one', 'two'])
+        self.client.stream_resources.assert_called_once_with({'kind': 'user'})
+
+    def test_agent_serves_several_requests_per_connection(self):
+        self.client.get.side_effect = [b'first', b'second']
+        agent_client = self.start_agent()
+
+        self.assertEqual(agent_client.get('one'), b'first')
+        self.assertEqual(agent_client.get('two'), b'second')
+
+    def test_agent_returns_errors_of_failed_requests(self):
+        self.client.get.side_effect = RuntimeError("Error: Bad variable")
+
+        with self.assertRaises(AgentRequestException) as context:
+            self.start_agent().get('myvar')
+
+        self.assertEqual(str(context.exception), "Error: Bad variable")
+        self.assertFalse(context.exception.is_http_error)
+
+    def test_agent_flags_http_errors(self):
+        self.client.get.side_effect = requests.exceptions.HTTPError("404 Client Error")
+
+        with self.assertRaises(AgentRequestException) as context:
+            self.start_agent().get('myvar')
+
+        self.assertTrue(context.exception.is_http_error)
+
+    def test_agent_rejects_unsupported_operations(self):
+        with self.assertRaises(AgentRequestException):
+            self.start_agent()._request('whoami')
+
+    def test_agent_removes_socket_when_closed(self):
+        server = AgentServer(self.client, self.socket_path)
+        server.server_close()
+
+        self.assertFalse(os.path.exists(self.socket_path))
@@ -1,14 +1,26 @@
+import io
 import json
+import os
+import tempfile
+import threading
+import time
 import unittest
 from datetime import datetime
-from unittest.mock import call, patch, MagicMock
+from unittest.mock import call, patch, ANY, MagicMock
 
+import requests
 import urllib3
 
 from conjur.http_wrapper import HttpVerb
 from conjur.endpoints import ConjurEndpoint
 
 from conjur.api import Api
+from conjur.circuit_breaker import CircuitBreaker
+from conjur.hedge_policy import HedgePolicy
+from conjur.retry_policy import RetryBudget, RetryPolicy
+from conjur.token_cache import TokenCache
+from conjur.errors import PartialBatchFailureException
+from conjur.resource import Resource
 
 
 MOCK_RESOURCE_LIST = [
@@ -68,7 +80,8 @@ class ApiTest(unittest.TestCase):
 
         http_client.assert_called_once_with(method, endpoint, params, *args,
                                             **extra_args,
-                                            ssl_verify=ssl_verify)
+                                            ssl_verify=ssl_verify,
+                                            session=ANY)
 
     def test_new_client_throws_error_when_no_url(self):
         with self.assertRaises(Exception):
@@ -92,6 +105,62 @@ class ApiTest(unittest.TestCase):
                               ssl_verify='cabundle')
 
 
+    @patch('conjur.api.create_session')
+    def test_new_client_creates_pooled_session_with_defaults(self, mock_create_session):
+        Api(url='http://localhost')
+
+        mock_create_session.assert_called_once_with(pool_connections=10,
+                                                    pool_maxsize=10,
+                                                    keep_alive=True)
+
+    @patch('conjur.api.create_session')
+    def test_new_client_passes_pool_settings_to_session(self, mock_create_session):
+        Api(url='http://localhost', pool_connections=2, pool_maxsize=50, keep_alive=False)
+
+        mock_create_session.assert_called_once_with(pool_connections=2,
+                                                    pool_maxsize=50,
+                                                    keep_alive=False)
+
+    @patch('conjur.api.create_session')
+    def test_new_client_passes_timeout_and_retry_policy_to_session(self, mock_create_session):
+        retry_policy = RetryPolicy()
+        Api(url='http://localhost', timeout=(1, 5), retry_policy=retry_policy)
+
+        mock_create_session.assert_called_once_with(pool_connections=10,
+                                                    pool_maxsize=10,
+                                                    keep_alive=True,
+                                                    timeout=(1, 5),
+                                                    retry_policy=retry_policy)
+
+    @patch('conjur.api.create_session')
+    def test_new_client_passes_circuit_breaker_to_session(self, mock_create_session):
+        circuit_breaker = CircuitBreaker()
+        Api(url='http://localhost', circuit_breaker=circuit_breaker)
+
+        mock_create_session.assert_called_once_with(pool_connections=10,
+                                                    pool_maxsize=10,
+                                                    keep_alive=True,
+                                                    circuit_breaker=circuit_breaker)
+
+    @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse())
+    def test_requests_are_sent_through_the_pooled_session(self, mock_http_client):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+
+        api.get_variable('myvar')
+        api.set_variable('myvar', 'myvalue')
+
+        for invocation in mock_http_client.call_args_list:
+            self.assertIs(invocation[1]['session'], api._session)
+
+    def test_close_releases_the_pooled_session(self):
+        api = Api(url='http://localhost')
+        api._session = MagicMock()
+
+        api.close()
+
+        api._session.close.assert_called_once_with()
+
     @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse())
     def test_login_invokes_http_client_correctly(self, mock_http_client):
         Api(url='http://localhost').login('myuser', 'mypass')
@@ -154,6 +223,150 @@ class ApiTest(unittest.TestCase):
 
         self.assertEquals(api.api_token, 'newtoken')
 
+    def test_concurrent_expired_token_reads_authenticate_only_once(self):
+        api = Api(url='http://localhost')
+        thread_count = 16
+        barrier = threading.Barrier(thread_count)
+        def slow_authenticate():
+            time.sleep(0.2)
+            return 'mytoken'
+        api.authenticate = MagicMock(side_effect=slow_authenticate)
+
+        tokens = []
+        def read_token():
+            barrier.wait()
+            tokens.append(api.api_token)
+        threads = [threading.Thread(target=read_token) for _ in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        api.authenticate.assert_called_once_with()
+        self.assertEqual(tokens, ['mytoken'] * thread_count)
+        self.assertEqual(api.token_refresh_stats, {'refreshes': 1,
+                                                   'coalesced_waiters': thread_count - 1})
+
+    def test_token_reads_arriving_while_token_is_published_do_not_fail(self):
+        class SlowExpirationApi(Api):
+            # Widens the window between setting the expiration and the token
+            @property
+            def api_token_expiration(self):
+                return self._expiration
+
+            @api_token_expiration.setter
+            def api_token_expiration(self, expiration):
+                time.sleep(0.05)
+                self._expiration = expiration
+
+        api = SlowExpirationApi(url='http://localhost')
+        def slow_authenticate():
+            time.sleep(0.1)
+            return 'mytoken'
+        api.authenticate = MagicMock(side_effect=slow_authenticate)
+
+        tokens = []
+        errors = []
+        def read_token(delay):
+            time.sleep(delay)
+            try:
+                tokens.append(api.api_token)
+            except Exception as error:
+                errors.append(error)
+        # Callers keep arriving before, during and after the first authenticate
+        threads = [threading.Thread(target=read_token, args=(index * 0.01,))
+                   for index in range(25)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(tokens, ['mytoken'] * 25)
+        api.authenticate.assert_called_once_with()
+
+    def test_token_refresh_stats_do_not_count_cached_token_reads(self):
+        api = Api(url='http://localhost')
+        api.authenticate = MagicMock(return_value='mytoken')
+
+        api.api_token
+        api.api_token
+
+        self.assertEqual(api.token_refresh_stats, {'refreshes': 1, 'coalesced_waiters': 0})
+
+    def test_refresh_api_token_fetches_new_token_even_if_cached_one_is_valid(self):
+        api = Api(url='http://localhost')
+        api.authenticate = MagicMock(return_value='mytoken')
+        api.api_token
+
+        api.authenticate = MagicMock(return_value='newtoken')
+
+        self.assertEqual(api.refresh_api_token(), 'newtoken')
+        self.assertEqual(api.api_token, 'newtoken')
+
+    def test_api_token_is_shared_through_token_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, 'token-cache')
+            first_api = Api(url='http://localhost', login_id='mylogin',
+                            token_cache=TokenCache(cache_path))
+            first_api.authenticate = MagicMock(return_value='mytoken')
+            second_api = Api(url='http://localhost', login_id='mylogin',
+                             token_cache=TokenCache(cache_path))
+            second_api.authenticate = MagicMock(return_value='othertoken')
+
+            self.assertEqual(first_api.api_token, 'mytoken')
+            self.assertEqual(second_api.api_token, 'mytoken')
+
+            second_api.authenticate.assert_not_called()
+            self.assertEqual(second_api.api_token_expiration.replace(microsecond=0),
+                             first_api.api_token_expiration.replace(microsecond=0))
+
+    def test_token_cache_is_not_shared_between_logins(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, 'token-cache')
+            first_api = Api(url='http://localhost', login_id='mylogin',
+                            token_cache=TokenCache(cache_path))
+            first_api.authenticate = MagicMock(return_value='mytoken')
+            second_api = Api(url='http://localhost', login_id='otherlogin',
+                             token_cache=TokenCache(cache_path))
+            second_api.authenticate = MagicMock(return_value='othertoken')
+
+            first_api.api_token
+
+            self.assertEqual(second_api.api_token, 'othertoken')
+
+    def test_refresh_api_token_updates_token_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, 'token-cache')
+            api = Api(url='http://localhost', login_id='mylogin', token_cache=TokenCache(cache_path))
+            api.authenticate = MagicMock(return_value='mytoken')
+            api.api_token
+            api.authenticate = MagicMock(return_value='newtoken')
+
+            api.refresh_api_token()
+
+            key = TokenCache.key('http://localhost', 'default', 'mylogin')
+            self.assertEqual(TokenCache(cache_path).get(key)[0], 'newtoken')
+
+    @patch('conjur.api.TokenRefresher')
+    def test_start_token_refresher_starts_a_single_refresher(self, mock_refresher):
+        api = Api(url='http://localhost')
+
+        api.start_token_refresher(lead_time=60, jitter=2)
+        api.start_token_refresher(lead_time=60, jitter=2)
+
+        mock_refresher.assert_called_once_with(api, lead_time=60, jitter=2)
+        mock_refresher.return_value.start.assert_called_once_with()
+
+    @patch('conjur.api.TokenRefresher')
+    def test_close_stops_token_refresher(self, mock_refresher):
+        api = Api(url='http://localhost')
+        api.start_token_refresher()
+
+        api.close()
+
+        mock_refresher.return_value.stop.assert_called_once_with()
+
     @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse())
     def test_authenticate_invokes_http_client_correctly(self, mock_http_client):
         Api(url='http://localhost', login_id='mylogin', api_key='apikey').authenticate()
@@ -197,6 +410,102 @@ class ApiTest(unittest.TestCase):
                               login='mylogin',
                               ssl_verify='verify')
 
+    # Read/write routing
+
+    @patch('conjur.api.invoke_endpoint')
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_reads_are_spread_over_read_urls(self, mock_http_client):
+        mock_http_client.return_value = self.MockClientResponse(content='{}')
+        api = Api(url='http://leader', login_id='mylogin', api_key='apikey',
+                  read_urls=['http://follower1', 'http://follower2'])
+
+        api.get_variable('myvar')
+        api.get_variables('myvar')
+        api.resources_list()
+        api.whoami()
+
+        urls = {call[0][2]['url'] for call in mock_http_client.call_args_list}
+        self.assertEqual(urls, {'http://follower1', 'http://follower2'})
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_reads_eject_failing_read_urls(self):
+        api = Api(url='http://leader', login_id='mylogin', api_key='apikey',
+                  read_urls=['http://follower1', 'http://follower2'])
+        def invoke(verb, endpoint, params, *args, **kwargs):
+            if params['url'] == 'http://follower1':
+                raise requests.exceptions.ConnectionError("Connection refused")
+            return self.MockClientResponse(content='value')
+
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke) as mock_http_client:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                api.get_variable('myvar')
+            for _ in range(3):
+                api.get_variable('myvar')
+
+        urls = [call[0][2]['url'] for call in mock_http_client.call_args_list]
+        self.assertEqual(urls, ['http://follower1'] + ['http://follower2'] * 3)
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_reads_do_not_eject_read_urls_on_client_errors(self):
+        api = Api(url='http://leader', login_id='mylogin', api_key='apikey',
+                  read_urls=['http://follower1', 'http://follower2'])
+        response = requests.models.Response()
+        response.status_code = 404
+
+        with patch('conjur.api.invoke_endpoint',
+                   side_effect=requests.exceptions.HTTPError(response=response)):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                api.get_variable('myvar')
+
+        self.assertEqual([node.ejected_until for node in api._router._nodes], [0, 0])
+        self.assertEqual([node.pending for node in api._router._nodes], [0, 0])
+
+    @patch('conjur.api.invoke_endpoint')
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_writes_are_sent_to_leader(self, mock_http_client):
+        mock_http_client.return_value = self.MockClientResponse(text='{}')
+        api = Api(url='http://leader', login_id='mylogin', api_key='apikey',
+                  read_urls=['http://follower'])
+
+        api.set_variable('myvar', 'value')
+        api.load_policy_file('root', self.POLICY_FILE)
+        api.rotate_other_api_key(Resource(type_='host', name='myhost'))
+
+        urls = [call[0][2]['url'] for call in mock_http_client.call_args_list]
+        self.assertEqual(urls, ['http://leader'] * 3)
+
+    @patch('conjur.api.invoke_endpoint')
+    def test_authentication_is_sent_to_leader(self, mock_http_client):
+        mock_http_client.return_value = self.MockClientResponse(text='apitoken')
+        api = Api(url='http://leader', login_id='mylogin', api_key='apikey',
+                  read_urls=['http://follower'])
+
+        api.authenticate()
+
+        self.assertEqual(mock_http_client.call_args[0][2]['url'], 'http://leader')
+
+    @patch('conjur.api.invoke_endpoint')
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_set_variables_reads_unchanged_values_from_leader(self, mock_http_client):
+        mock_http_client.return_value = self.MockClientResponse(content='{"default:variable:myvar": "value"}')
+        api = Api(url='http://leader', login_id='mylogin', api_key='apikey',
+                  read_urls=['http://follower'])
+
+        self.assertEqual(api.set_variables({'myvar': 'value'}, skip_unchanged=True), [])
+
+        self.assertEqual(mock_http_client.call_args[0][1], ConjurEndpoint.BATCH_SECRETS)
+        self.assertEqual(mock_http_client.call_args[0][2]['url'], 'http://leader')
+
+    def test_get_variables_chunks_fit_longest_read_url(self):
+        full_variable_ids = ['default:variable:foo', 'default:variable:bar']
+        leader_api = Api(url='http://leader', batch_max_url_length=90)
+        api = Api(url='http://leader', batch_max_url_length=90,
+                  read_urls=['http://a-much-longer-follower-url'])
+
+        self.assertEqual(leader_api._chunk_variable_ids(full_variable_ids), [full_variable_ids])
+        self.assertEqual(api._chunk_variable_ids(full_variable_ids),
+                         [['default:variable:foo'], ['default:variable:bar']])
+
     # Get variable
 
     @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse())
@@ -245,6 +554,15 @@ class ApiTest(unittest.TestCase):
                               query={},
                               ssl_verify='verify')
 
+    @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse())
+    def test_get_variable_passes_down_timeout(self, mock_http_client):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+
+        api.get_variable('myvar', timeout=(1, 2))
+
+        self.assertEqual(mock_http_client.call_args[1]['timeout'], (1, 2))
+
     # Set variable
 
     @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse())
@@ -278,6 +596,153 @@ class ApiTest(unittest.TestCase):
                               identifier='myvar',
                               ssl_verify='verify')
 
+    @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse())
+    def test_set_variables_passes_down_timeout(self, mock_http_client):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+
+        api.set_variables({'foo': 'a', 'bar': 'b'}, timeout=5)
+
+        self.assertEqual([kwargs['timeout'] for _, kwargs in mock_http_client.call_args_list],
+                         [5, 5])
+
+    def test_set_variables_sets_all_variables_concurrently(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+        in_flight = set()
+        max_in_flight = []
+        lock = threading.Lock()
+        def invoke(*args, **kwargs):
+            with lock:
+                in_flight.add(args[2]['identifier'])
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.discard(args[2]['identifier'])
+            return self.MockClientResponse()
+
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke) as mock_http_client:
+            output = api.set_variables({f'var{index}': 'value' for index in range(6)},
+                                       max_workers=3)
+
+        self.assertEqual(output, [f'var{index}' for index in range(6)])
+        self.assertEqual(mock_http_client.call_count, 6)
+        self.assertLessEqual(max(max_in_flight), 3)
+        api.authenticate.assert_called_once_with()
+
+    def test_set_variables_accepts_pairs(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+
+        with patch('conjur.api.invoke_endpoint', return_value=self.MockClientResponse()) as mock_http_client:
+            output = api.set_variables(iter([('foo', 'a'), ('bar', 'b')]))
+
+        self.assertEqual(output, ['foo', 'bar'])
+        self.assertEqual(sorted(call[0][3] for call in mock_http_client.call_args_list), ['a', 'b'])
+
+    def test_set_variables_skips_empty_input(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+
+        with patch('conjur.api.invoke_endpoint') as mock_http_client:
+            self.assertEqual(api.set_variables({}), [])
+
+        mock_http_client.assert_not_called()
+
+    def test_set_variables_reports_partial_failures(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+        error = RuntimeError('set failed')
+        def invoke(*args, **kwargs):
+            if args[2]['identifier'] == 'bar':
+                raise error
+            return self.MockClientResponse()
+
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke):
+            with self.assertRaises(PartialBatchFailureException) as context:
+                api.set_variables({'foo': 'a', 'bar': 'b', 'baz': 'c'})
+
+        self.assertEqual(context.exception.results, ['foo', 'baz'])
+        self.assertEqual(context.exception.errors, {'bar': error})
+        self.assertIn('1 of 3', str(context.exception))
+
+    def test_set_variables_skips_unchanged_variables(self):
+        api = Api(url='http://localhost', account='myaccount', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+        api._get_variables = MagicMock(return_value={'foo': 'a', 'bar': 'old', 'baz': 'c'})
+
+        with patch('conjur.api.invoke_endpoint', return_value=self.MockClientResponse()) as mock_http_client:
+            output = api.set_variables([('foo', 'a'), ('bar', 'new'), ('baz', b'c')],
+                                       skip_unchanged=True)
+
+        self.assertEqual(output, ['bar'])
+        api._get_variables.assert_called_once_with(['foo', 'bar', 'baz'], ANY)
+        mock_http_client.assert_called_once()
+        self.assertEqual(mock_http_client.call_args[0][3], 'new')
+
+    def test_set_variables_skips_unchanged_variables_of_a_batch_with_a_new_variable(self):
+        api = Api(url='http://localhost', account='myaccount', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+        stored_values = {'myaccount:variable:var{}'.format(i): 'value' for i in range(8)}
+        set_values = []
+        def invoke(http_verb, endpoint, params, *args, query=None, **kwargs):
+            if endpoint == ConjurEndpoint.SECRETS:
+                set_values.append((params['identifier'], args[0]))
+                return self.MockClientResponse()
+            # Like the server, the whole batch fails if a variable has no value
+            full_variable_ids = query['variable_ids'].split(',')
+            if any(full_variable_id not in stored_values for full_variable_id in full_variable_ids):
+                raise self._http_error(404)
+            return self.MockClientResponse(content=json.dumps(
+                {full_variable_id: stored_values[full_variable_id]
+                 for full_variable_id in full_variable_ids}))
+
+        variables = {'var{}'.format(i): 'value' for i in range(8)}
+        variables['new'] = 'value'
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke):
+            output = api.set_variables(variables, skip_unchanged=True)
+
+        self.assertEqual(output, ['new'])
+        self.assertEqual(set_values, [('new', 'value')])
+
+    def test_set_variables_sets_variables_whose_values_could_not_be_read(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+        api._get_variables = MagicMock(side_effect=PartialBatchFailureException(
+            {'foo': 'a'}, {'bar': RuntimeError('404 Client Error')}))
+
+        with patch('conjur.api.invoke_endpoint', return_value=self.MockClientResponse()):
+            output = api.set_variables({'foo': 'a', 'bar': 'b'}, skip_unchanged=True)
+
+        self.assertEqual(output, ['bar'])
+
+    def test_set_variables_sets_all_variables_if_no_value_could_be_read(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+        api._get_variables = MagicMock(side_effect=RuntimeError('404 Client Error'))
+
+        with patch('conjur.api.invoke_endpoint', return_value=self.MockClientResponse()):
+            output = api.set_variables({'foo': 'a', 'bar': 'b'}, skip_unchanged=True)
+
+        self.assertEqual(output, ['foo', 'bar'])
+
+    def test_set_variables_reads_current_values_in_batches(self):
+        api = Api(url='http://localhost', account='myaccount', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+        def invoke(verb, endpoint, *args, **kwargs):
+            if endpoint == ConjurEndpoint.BATCH_SECRETS:
+                return self.MockClientResponse(content=json.dumps({
+                    'myaccount:variable:foo': 'a',
+                    'myaccount:variable:bar': 'b',
+                }))
+            return self.MockClientResponse()
+
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke) as mock_http_client:
+            output = api.set_variables({'foo': 'a', 'bar': 'b'}, skip_unchanged=True)
+
+        self.assertEqual(output, [])
+        self.assertEqual([call[0][1] for call in mock_http_client.call_args_list],
+                         [ConjurEndpoint.BATCH_SECRETS])
+
     # Policy load
 
     @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse(text='{}'))
@@ -422,6 +887,48 @@ class ApiTest(unittest.TestCase):
                               identifier='mypolicyname',
                               ssl_verify='ssl_verify')
 
+    @patch('conjur.api.invoke_endpoint')
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_stream_variable_writes_raw_chunks_to_output_file(self, mock_http_client):
+        value = bytes(range(256)) * 3
+        response = MagicMock()
+        response.iter_content.side_effect = lambda chunk_size: \
+            (value[i:i + 100] for i in range(0, len(value), 100))
+        mock_http_client.return_value = response
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        output_file = io.BytesIO()
+
+        written_bytes = api.stream_variable('myvar', output_file, version='3')
+
+        self.assertEqual(output_file.getvalue(), value)
+        self.assertEqual(written_bytes, len(value))
+        mock_http_client.assert_called_once_with(HttpVerb.GET, ConjurEndpoint.SECRETS,
+                                                 {'kind': 'variable', 'identifier': 'myvar',
+                                                  'url': 'http://localhost', 'account': 'default'},
+                                                 api_token='apitoken',
+                                                 query={'version': '3'},
+                                                 ssl_verify=True,
+                                                 session=ANY,
+                                                 stream=True)
+        response.iter_content.assert_called_once_with(chunk_size=Api.STREAM_CHUNK_SIZE)
+        response.close.assert_called_once_with()
+
+    @patch('conjur.api.invoke_endpoint')
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_stream_variable_closes_response_if_writing_fails(self, mock_http_client):
+        response = MagicMock()
+        response.iter_content.return_value = iter([b'chunk'])
+        mock_http_client.return_value = response
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        output_file = MagicMock()
+        output_file.write.side_effect = OSError("No space left on device")
+
+        with self.assertRaises(OSError):
+            api.stream_variable('myvar', output_file)
+
+        self.assertIsNone(mock_http_client.call_args[1]['query'])
+        response.close.assert_called_once_with()
+
     # Get variables
 
     @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse(content='{"foo": "a", "bar": "b"}'))
@@ -468,6 +975,92 @@ class ApiTest(unittest.TestCase):
                               },
                               ssl_verify='sslverify')
 
+    def test_get_variables_splits_batch_by_encoded_url_length(self):
+        # 'http://localhost/secrets?variable_ids=' is 38 characters long and each
+        # encoded 'default:variable:myvarN' ID is 27 characters long
+        api = Api(url='http://localhost', batch_max_url_length=38 + 27 + 3 + 27)
+
+        chunks = api._chunk_variable_ids(['default:variable:myvar{}'.format(i) for i in range(5)])
+
+        self.assertEqual(chunks, [
+            ['default:variable:myvar0', 'default:variable:myvar1'],
+            ['default:variable:myvar2', 'default:variable:myvar3'],
+            ['default:variable:myvar4'],
+        ])
+
+    def test_get_variables_keeps_too_long_id_in_its_own_chunk(self):
+        api = Api(url='http://localhost', batch_max_url_length=10)
+
+        chunks = api._chunk_variable_ids(['default:variable:foo', 'default:variable:bar'])
+
+        self.assertEqual(chunks, [['default:variable:foo'], ['default:variable:bar']])
+
+    def test_get_variables_fetches_chunks_and_merges_results(self):
+        api = Api(url='http://localhost', account='myaccount', batch_max_url_length=1)
+        api.authenticate = MagicMock(return_value='apitoken')
+        def invoke(*args, query=None, **kwargs):
+            full_variable_id = query['variable_ids']
+            return self.MockClientResponse(content=json.dumps({full_variable_id: full_variable_id[-3:]}))
+
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke) as mock_http_client:
+            output = api.get_variables('foo', 'bar', 'baz')
+
+        self.assertEqual(output, {'foo': 'foo', 'bar': 'bar', 'baz': 'baz'})
+        self.assertEqual(mock_http_client.call_count, 3)
+        api.authenticate.assert_called_once_with()
+
+    def test_get_variables_passes_down_timeout_to_every_chunk(self):
+        api = Api(url='http://localhost', account='myaccount', batch_max_url_length=1)
+        api.authenticate = MagicMock(return_value='apitoken')
+        def invoke(*args, query=None, **kwargs):
+            full_variable_id = query['variable_ids']
+            return self.MockClientResponse(content=json.dumps({full_variable_id: 'value'}))
+
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke) as mock_http_client:
+            api.get_variables('foo', 'bar', 'baz', timeout=5)
+
+        self.assertEqual([kwargs['timeout'] for _, kwargs in mock_http_client.call_args_list],
+                         [5, 5, 5])
+
+    @patch('conjur.api.invoke_endpoint', return_value=MockClientResponse(content='[]'))
+    def test_iter_resources_passes_down_timeout_to_every_page(self, mock_http_client):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+
+        self.assertEqual(list(api.iter_resources(timeout=5)), [])
+
+        self.assertEqual(mock_http_client.call_args[1]['timeout'], 5)
+
+    def test_get_variables_reports_partial_chunk_failures(self):
+        api = Api(url='http://localhost', account='myaccount', batch_max_url_length=1)
+        api.authenticate = MagicMock(return_value='apitoken')
+        error = RuntimeError('chunk failed')
+        def invoke(*args, query=None, **kwargs):
+            full_variable_id = query['variable_ids']
+            if full_variable_id.endswith('bar'):
+                raise error
+            return self.MockClientResponse(content=json.dumps({full_variable_id: 'value'}))
+
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke):
+            with self.assertRaises(PartialBatchFailureException) as context:
+                api.get_variables('foo', 'bar', 'baz')
+
+        self.assertEqual(context.exception.results, {'foo': 'value', 'baz': 'value'})
+        self.assertEqual(context.exception.errors, {'bar': error})
+        self.assertIn('1 of 3', str(context.exception))
+
+    def test_get_variables_raises_error_as_is_if_every_chunk_failed(self):
+        api = Api(url='http://localhost', account='myaccount', batch_max_url_length=1)
+        api.authenticate = MagicMock(return_value='apitoken')
+        error = RuntimeError('chunk failed')
+
+        with patch('conjur.api.invoke_endpoint', side_effect=error) as mock_http_client:
+            with self.assertRaises(RuntimeError) as context:
+                api.get_variables('foo', 'bar', 'baz')
+
+        self.assertIs(context.exception, error)
+        self.assertEqual(mock_http_client.call_count, 3)
+
     # List resources
 
     @patch('conjur.api.invoke_endpoint', \
@@ -498,6 +1091,178 @@ class ApiTest(unittest.TestCase):
                               query={'limit': 1},
                               ssl_verify=True)
 
+    def mock_paged_resources(self, api, resource_count):
+        resources = [{'id': 'resource{}'.format(i)} for i in range(resource_count)]
+        def fetch_resources(list_constraints=None):
+            offset = list_constraints['offset']
+            return resources[offset:offset + list_constraints['limit']]
+        api._fetch_resources = MagicMock(side_effect=fetch_resources)
+
+    def test_iter_resources_pages_until_short_page(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 5)
+
+        output = list(api.iter_resources({'kind': 'variable'}, page_size=2))
+
+        self.assertEqual(output, ['resource0', 'resource1', 'resource2', 'resource3', 'resource4'])
+        api._fetch_resources.assert_has_calls([
+            call({'kind': 'variable', 'offset': 0, 'limit': 2}),
+            call({'kind': 'variable', 'offset': 2, 'limit': 2}),
+            call({'kind': 'variable', 'offset': 4, 'limit': 2}),
+        ])
+
+    def test_iter_resources_fetches_extra_empty_page_when_last_page_is_full(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 4)
+
+        self.assertEqual(len(list(api.iter_resources({}, page_size=2))), 4)
+        self.assertEqual(api._fetch_resources.call_count, 3)
+
+    def test_iter_resources_fetches_pages_lazily(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 10)
+
+        resources = api.iter_resources({}, page_size=3)
+        next(resources)
+
+        api._fetch_resources.assert_called_once_with({'offset': 0, 'limit': 3})
+
+    def test_iter_resources_applies_limit_and_offset_to_whole_listing(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 10)
+
+        output = list(api.iter_resources({'offset': '3', 'limit': '5'}, page_size=2))
+
+        self.assertEqual(output, ['resource3', 'resource4', 'resource5', 'resource6', 'resource7'])
+        api._fetch_resources.assert_called_with({'offset': 7, 'limit': 1})
+
+    def test_iter_resources_yields_full_resources_when_inspecting(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 2)
+
+        self.assertEqual(list(api.iter_resources({'inspect': True})),
+                         [{'id': 'resource0'}, {'id': 'resource1'}])
+        self.assertEqual(list(api.iter_resources()),
+                         [{'id': 'resource0'}, {'id': 'resource1'}])
+
+    def test_iter_resources_rejects_empty_pages(self):
+        api = Api(url='http://localhost')
+
+        with self.assertRaises(ValueError):
+            next(api.iter_resources(page_size=0))
+
+    def test_iter_resources_prefetch_yields_pages_in_order(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 7)
+
+        output = list(api.iter_resources({}, page_size=2, prefetch=3))
+
+        self.assertEqual(output, ['resource{}'.format(i) for i in range(7)])
+
+    def test_iter_resources_prefetch_keeps_pages_in_flight(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 100)
+        # The consumer is blocked on the second page until the next ones were requested
+        next_pages_requested = threading.Barrier(3, timeout=5)
+        fetch_resources = api._fetch_resources.side_effect
+        def slow_next_pages(list_constraints=None):
+            if 2 <= list_constraints['offset'] < 8:
+                next_pages_requested.wait()
+            return fetch_resources(list_constraints)
+        api._fetch_resources.side_effect = slow_next_pages
+
+        resources = api.iter_resources({}, page_size=2, prefetch=3)
+
+        self.assertEqual([next(resources) for _ in range(3)],
+                         ['resource0', 'resource1', 'resource2'])
+        resources.close()
+
+    def test_iter_resources_prefetch_fetches_short_first_page_alone(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 5)
+
+        output = list(api.iter_resources({}, page_size=1000, prefetch=4))
+
+        self.assertEqual(len(output), 5)
+        api._fetch_resources.assert_called_once_with({'offset': 0, 'limit': 1000})
+
+    def test_iter_resources_prefetch_does_not_fetch_past_limit(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 100)
+
+        output = list(api.iter_resources({'limit': '5'}, page_size=2, prefetch=4))
+
+        self.assertEqual(len(output), 5)
+        api._fetch_resources.assert_has_calls([
+            call({'offset': 0, 'limit': 2}),
+            call({'offset': 2, 'limit': 2}),
+            call({'offset': 4, 'limit': 1}),
+        ], any_order=True)
+        self.assertEqual(api._fetch_resources.call_count, 3)
+
+    def test_iter_resources_prefetch_stops_scheduling_after_short_page(self):
+        api = Api(url='http://localhost')
+        self.mock_paged_resources(api, 3)
+
+        output = list(api.iter_resources({}, page_size=2, prefetch=2))
+
+        self.assertEqual(len(output), 3)
+        # At most the pages that were in flight when the short page arrived are requested
+        requested_offsets = {args[0]['offset'] for args, _ in api._fetch_resources.call_args_list}
+        self.assertTrue(requested_offsets <= {0, 2, 4})
+
+    def mock_streamed_resources(self, mock_http_client, resources):
+        body = json.dumps(resources).encode('utf-8')
+        response = MagicMock()
+        response.iter_content.side_effect = lambda chunk_size: \
+            (body[i:i + 5] for i in range(0, len(body), 5))
+        mock_http_client.return_value = response
+        return response
+
+    @patch('conjur.api.invoke_endpoint')
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_stream_resources_parses_resource_ids_from_streamed_response(self, mock_http_client):
+        response = self.mock_streamed_resources(mock_http_client, [{'id': 'one'}, {'id': 'two'}])
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+
+        self.assertEqual(list(api.stream_resources({'kind': 'variable'})), ['one', 'two'])
+
+        mock_http_client.assert_called_once_with(HttpVerb.GET, ConjurEndpoint.RESOURCES,
+                                                 {'url': 'http://localhost', 'account': 'default'},
+                                                 query={'kind': 'variable'},
+                                                 api_token='apitoken',
+                                                 ssl_verify=True,
+                                                 session=ANY,
+                                                 stream=True)
+        response.close.assert_called_once_with()
+
+    @patch('conjur.api.invoke_endpoint')
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_stream_resources_yields_full_resources_when_inspecting(self, mock_http_client):
+        self.mock_streamed_resources(mock_http_client, [{'id': 'one', 'owner': 'me'}])
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+
+        self.assertEqual(list(api.stream_resources()), [{'id': 'one', 'owner': 'me'}])
+
+    @patch('conjur.api.invoke_endpoint')
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_stream_resources_closes_response_if_consumer_stops_early(self, mock_http_client):
+        response = self.mock_streamed_resources(mock_http_client, [{'id': 'one'}, {'id': 'two'}])
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+
+        resources = api.stream_resources({})
+        next(resources)
+        resources.close()
+
+        response.close.assert_called_once_with()
+
+    def test_iter_resources_prefetch_raises_page_errors(self):
+        api = Api(url='http://localhost')
+        api._fetch_resources = MagicMock(side_effect=RuntimeError("500 error"))
+
+        with self.assertRaises(RuntimeError):
+            list(api.iter_resources({}, page_size=2, prefetch=2))
+
     @patch('conjur.api.invoke_endpoint', \
            return_value=MockClientResponse(content=json.dumps({})))
     def test_whoami_invokes_http_client_correctly(self, mock_http_client):
@@ -510,3 +1275,217 @@ class ApiTest(unittest.TestCase):
 
         self.verify_http_call(mock_http_client, HttpVerb.GET, ConjurEndpoint.WHOAMI,
                               ssl_verify=True)
+
+    def _http_error(self, status_code):
+        response = requests.models.Response()
+        response.status_code = status_code
+        return requests.exceptions.HTTPError(response=response)
+
+    def test_rejected_api_token_is_renewed_once(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(side_effect=['oldtoken', 'newtoken'])
+
+        with patch('conjur.api.invoke_endpoint',
+                   side_effect=[self._http_error(401), self.MockClientResponse()]) \
+                as mock_http_client:
+            self.assertEqual(api.get_variable('myvar'), b'mycontent')
+
+        self.assertEqual([sent_call[1]['api_token'] for sent_call in mock_http_client.call_args_list],
+                         ['oldtoken', 'newtoken'])
+
+    def test_rejected_api_token_is_renewed_once_for_batches_of_several_chunks(self):
+        api = Api(url='http://localhost', account='myaccount', login_id='mylogin',
+                  api_key='apikey', batch_max_url_length=1)
+        api.authenticate = MagicMock(side_effect=['oldtoken', 'newtoken'])
+        def invoke(*args, api_token=None, query=None, **kwargs):
+            if api_token == 'oldtoken':
+                raise self._http_error(401)
+            full_variable_id = query['variable_ids']
+            return self.MockClientResponse(content=json.dumps({full_variable_id: 'value'}))
+
+        variable_ids = ['var{}'.format(i) for i in range(20)]
+        with patch('conjur.api.invoke_endpoint', side_effect=invoke) as mock_http_client:
+            output = api.get_variables(*variable_ids)
+
+        self.assertEqual(output, {variable_id: 'value' for variable_id in variable_ids})
+        self.assertEqual(api.authenticate.call_count, 2)
+        self.assertEqual(mock_http_client.call_count, 40)
+
+    def test_rejected_api_token_is_renewed_once_for_streamed_resources(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(side_effect=['oldtoken', 'newtoken'])
+        response = MagicMock()
+        response.iter_content.return_value = [b'[{"id": "one"}]']
+
+        with patch('conjur.api.invoke_endpoint',
+                   side_effect=[self._http_error(401), response]) as mock_http_client:
+            self.assertEqual(list(api.stream_resources({})), ['one'])
+
+        self.assertEqual([sent_call[1]['api_token'] for sent_call in mock_http_client.call_args_list],
+                         ['oldtoken', 'newtoken'])
+
+    def test_api_token_is_not_renewed_again_if_new_one_is_rejected(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(side_effect=['oldtoken', 'newtoken'])
+
+        with patch('conjur.api.invoke_endpoint', side_effect=self._http_error(401)) \
+                as mock_http_client:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                api.set_variable('myvar', 'myvalue')
+
+        self.assertEqual(mock_http_client.call_count, 2)
+        self.assertEqual(api.authenticate.call_count, 2)
+
+    def test_api_token_is_not_renewed_on_other_errors(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='apitoken')
+
+        with patch('conjur.api.invoke_endpoint', side_effect=self._http_error(403)) \
+                as mock_http_client:
+            with self.assertRaises(requests.exceptions.HTTPError):
+                api.whoami()
+
+        mock_http_client.assert_called_once()
+        api.authenticate.assert_called_once_with()
+
+    def test_api_token_renewed_by_another_request_is_not_renewed_again(self):
+        api = Api(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.authenticate = MagicMock(return_value='oldtoken')
+        responses = [self._http_error(401), self.MockClientResponse()]
+
+        def send(*args, **kwargs):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                # Another request renews the token while this one is rejected
+                api._api_token = 'newtoken'
+                raise response
+            return response
+
+        with patch('conjur.api.invoke_endpoint', side_effect=send) as mock_http_client:
+            api.get_variable('myvar')
+
+        api.authenticate.assert_called_once_with()
+        self.assertEqual(mock_http_client.call_args[1]['api_token'], 'newtoken')
+
+    def _hedged_api(self, **hedge_options):
+        hedge_options.setdefault('max_delay', 0.05)
+        api = Api(url='http://leader', login_id='mylogin', api_key='apikey',
+                  read_urls=['http://follower1', 'http://follower2'],
+                  hedge_policy=HedgePolicy(**hedge_options))
+        self.addCleanup(api.close)
+        # The first read goes to follower1
+        api._router._nodes[1].latency = 1
+        return api
+
+    def _slow_follower1(self, follower1_response=None, follower2_response=None, delay=5):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def send(http_verb, endpoint, params, *args, **kwargs):
+            if params['url'] == 'http://follower1':
+                release.wait(delay)
+                response = follower1_response
+            else:
+                response = follower2_response
+            if isinstance(response, Exception):
+                raise response
+            return response or self.MockClientResponse(content=params['url'])
+
+        return send
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_hedged_read_is_sent_to_another_read_url_when_first_is_slow(self):
+        api = self._hedged_api()
+
+        with patch('conjur.api.invoke_endpoint', side_effect=self._slow_follower1()) \
+                as mock_http_client:
+            self.assertEqual(api.get_variable('myvar'), b'http://follower2')
+
+        urls = [sent_call[0][2]['url'] for sent_call in mock_http_client.call_args_list]
+        self.assertEqual(urls, ['http://follower1', 'http://follower2'])
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_hedged_read_is_not_duplicated_when_first_answers_in_time(self):
+        api = self._hedged_api(max_delay=5)
+
+        with patch('conjur.api.invoke_endpoint', return_value=self.MockClientResponse()) \
+                as mock_http_client:
+            self.assertEqual(api.get_variable('myvar'), b'mycontent')
+
+        mock_http_client.assert_called_once()
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_hedged_batch_read_is_sent_to_another_read_url_when_first_is_slow(self):
+        api = self._hedged_api()
+        api._account = 'myaccount'
+        batch_response = self.MockClientResponse(content=MOCK_BATCH_GET_RESPONSE)
+
+        with patch('conjur.api.invoke_endpoint',
+                   side_effect=self._slow_follower1(follower2_response=batch_response)):
+            self.assertEqual(api.get_variables('foo', 'bar'), {'foo': 'a', 'bar': 'b'})
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_hedged_read_waits_for_other_read_if_first_to_answer_failed(self):
+        api = self._hedged_api()
+        error = requests.exceptions.ConnectionError()
+
+        with patch('conjur.api.invoke_endpoint',
+                   side_effect=self._slow_follower1(follower2_response=error, delay=0.2)):
+            self.assertEqual(api.get_variable('myvar'), b'http://follower1')
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_hedged_read_raises_error_of_first_read_if_both_failed(self):
+        api = self._hedged_api()
+        first_error = requests.exceptions.ReadTimeout()
+
+        with patch('conjur.api.invoke_endpoint',
+                   side_effect=self._slow_follower1(first_error,
+                                                    requests.exceptions.ConnectionError(),
+                                                    delay=0.2)):
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                api.get_variable('myvar')
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_hedged_read_is_not_duplicated_when_hedge_budget_is_spent(self):
+        api = self._hedged_api(budget=RetryBudget(ratio=0, min_retries_per_second=0,
+                                                  max_balance=0))
+
+        with patch('conjur.api.invoke_endpoint', side_effect=self._slow_follower1(delay=0.2)) \
+                as mock_http_client:
+            self.assertEqual(api.get_variable('myvar'), b'http://follower1')
+
+        mock_http_client.assert_called_once()
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_reads_are_not_hedged_with_a_single_read_url(self):
+        api = Api(url='http://leader', login_id='mylogin', api_key='apikey',
+                  hedge_policy=HedgePolicy(max_delay=0))
+
+        with patch('conjur.api.invoke_endpoint', return_value=self.MockClientResponse()) \
+                as mock_http_client:
+            api.get_variable('myvar')
+
+        mock_http_client.assert_called_once()
+        self.assertIsNone(api._hedge_executor)
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_unchanged_value_reads_of_bulk_sets_are_not_hedged(self):
+        api = self._hedged_api(max_delay=0)
+
+        with patch('conjur.api.invoke_endpoint',
+                   return_value=self.MockClientResponse(content='{"default:variable:myvar": "value"}')) \
+                as mock_http_client:
+            self.assertEqual(api.set_variables({'myvar': 'value'}, skip_unchanged=True), [])
+
+        mock_http_client.assert_called_once()
+        self.assertEqual(mock_http_client.call_args[0][2]['url'], 'http://leader')
+        self.assertIsNone(api._hedge_executor)
+
+    @patch.object(Api, 'api_token', 'apitoken')
+    def test_hedged_reads_record_their_latency(self):
+        api = self._hedged_api(max_delay=5)
+
+        with patch('conjur.api.invoke_endpoint', return_value=self.MockClientResponse()):
+            api.get_variable('myvar')
+
+        self.assertEqual(len(api._hedge_policy._latencies), 1)
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from conjur.async_api import AsyncApi
+from conjur.endpoints import ConjurEndpoint
+from conjur.errors import PartialBatchFailureException
+from conjur.http_wrapper import HttpVerb
+from conjur.resource import Resource
+
+
+class AsyncApiTest(unittest.IsolatedAsyncioTestCase):
+    async def start_server(self, routes):
+        app = web.Application()
+        app.add_routes(routes)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        return str(server.make_url('')).rstrip('/')
+
+    def test_new_client_throws_error_when_no_url(self):
+        with self.assertRaises(Exception):
+            AsyncApi(login_id='mylogin', api_key='apikey')
+
+    def test_new_client_throws_error_when_account_is_empty(self):
+        with self.assertRaises(RuntimeError):
+            AsyncApi(url='http://localhost', account='')
+
+    async def test_get_variable_authenticates_and_fetches_value_over_http(self):
+        async def authenticate(request):
+            self.assertEqual(await request.text(), 'apikey')
+            return web.Response(text='token')
+        async def get_secret(request):
+            self.assertEqual(request.headers['Authorization'], 'Token token="dG9rZW4="')
+            return web.Response(body=b'value of ' + request.match_info['identifier'].encode())
+        url = await self.start_server([
+            web.post('/authn/default/mylogin/authenticate', authenticate),
+            web.get('/secrets/default/variable/{identifier}', get_secret),
+        ])
+        api = AsyncApi(url=url, login_id='mylogin', api_key='apikey')
+
+        try:
+            self.assertEqual(await api.get_variable('myvar'), b'value of myvar')
+        finally:
+            await api.close()
+
+    async def test_reads_are_sent_to_read_urls(self):
+        api = AsyncApi(url='http://leader', login_id='mylogin', api_key='apikey',
+                       read_urls=['http://follower'])
+        api.get_api_token = AsyncMock(return_value='token')
+        api._invoke = AsyncMock(return_value=b'{}')
+
+        await api.get_variable('myvar')
+        await api.get_variables('myvar')
+        await api.set_variable('myvar', 'value')
+
+        urls = [call[0][2]['url'] for call in api._invoke.call_args_list]
+        self.assertEqual(urls, ['http://follower', 'http://follower', 'http://leader'])
+
+    async def test_reads_eject_failing_read_urls(self):
+        api = AsyncApi(url='http://leader', login_id='mylogin', api_key='apikey',
+                       read_urls=['http://follower1', 'http://follower2'])
+        api.get_api_token = AsyncMock(return_value='token')
+        async def invoke(verb, endpoint, params, **kwargs):
+            if params['url'] == 'http://follower1':
+                raise asyncio.TimeoutError()
+            return b'value'
+        api._invoke = AsyncMock(side_effect=invoke)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await api.get_variable('myvar')
+        for _ in range(3):
+            await api.get_variable('myvar')
+
+        urls = [call[0][2]['url'] for call in api._invoke.call_args_list]
+        self.assertEqual(urls, ['http://follower1'] + ['http://follower2'] * 3)
+
+    async def test_http_errors_are_raised(self):
+        async def authenticate(request):
+            return web.Response(status=401, text='unauthorized')
+        url = await self.start_server([
+            web.post('/authn/default/mylogin/authenticate', authenticate),
+        ])
+        api = AsyncApi(url=url, login_id='mylogin', api_key='apikey')
+
+        try:
+            with self.assertRaises(Exception) as context:
+                await api.get_variable('myvar')
+            self.assertEqual(context.exception.status, 401)
+        finally:
+            await api.close()
+
+    async def test_password_is_exchanged_for_api_key_on_first_authentication(self):
+        api = AsyncApi(url='http://localhost', login_id='mylogin', password='mypass')
+        api._invoke = AsyncMock(side_effect=[b'apikey', b'token'])
+
+        self.assertEqual(await api.get_api_token(), 'token')
+
+        self.assertEqual(api.api_key, 'apikey')
+        api._invoke.assert_any_call(HttpVerb.GET, ConjurEndpoint.LOGIN,
+                                    {'url': 'http://localhost', 'account': 'default'},
+                                    auth=('mylogin', 'mypass'))
+
+    async def test_concurrent_token_reads_authenticate_only_once(self):
+        api = AsyncApi(url='http://localhost', login_id='mylogin', api_key='apikey')
+        async def slow_authenticate():
+            await asyncio.sleep(0.1)
+            return 'token'
+        api.authenticate = AsyncMock(side_effect=slow_authenticate)
+
+        tokens = await asyncio.gather(*[api.get_api_token() for _ in range(10)])
+
+        self.assertEqual(tokens, ['token'] * 10)
+        api.authenticate.assert_awaited_once_with()
+
+    async def test_get_variables_removes_account_prefix(self):
+        api = AsyncApi(url='http://localhost', account='myacct', login_id='mylogin', api_key='apikey')
+        api.get_api_token = AsyncMock(return_value='token')
+        api._invoke = AsyncMock(return_value=json.dumps({'myacct:variable:foo': 'a',
+                                                         'myacct:variable:bar': 'b'}).encode())
+
+        self.assertEqual(await api.get_variables('foo', 'bar'), {'foo': 'a', 'bar': 'b'})
+        api._invoke.assert_awaited_once_with(HttpVerb.GET, ConjurEndpoint.BATCH_SECRETS,
+                                             {'url': 'http://localhost', 'account': 'myacct'},
+                                             query={'variable_ids': 'myacct:variable:foo,myacct:variable:bar'},
+                                             api_token='token')
+
+    async def test_get_variables_reports_partial_chunk_failures(self):
+        api = AsyncApi(url='http://localhost', account='myacct', login_id='mylogin',
+                       api_key='apikey', batch_max_url_length=1)
+        api.get_api_token = AsyncMock(return_value='token')
+        error = RuntimeError('chunk failed')
+        async def invoke(*args, query=None, **kwargs):
+            if query['variable_ids'].endswith('bar'):
+                raise error
+            return json.dumps({query['variable_ids']: 'value'}).encode()
+        api._invoke = invoke
+
+        with self.assertRaises(PartialBatchFailureException) as context:
+            await api.get_variables('foo', 'bar')
+
+        self.assertEqual(context.exception.results, {'foo': 'value'})
+        self.assertEqual(context.exception.errors, {'bar': error})
+
+    async def test_get_variables_raises_chunk_error_if_every_chunk_failed(self):
+        api = AsyncApi(url='http://localhost', account='myacct', login_id='mylogin',
+                       api_key='apikey', batch_max_url_length=1)
+        api.get_api_token = AsyncMock(return_value='token')
+        error = RuntimeError('chunk failed')
+        api._invoke = AsyncMock(side_effect=error)
+
+        with self.assertRaises(RuntimeError) as context:
+            await api.get_variables('foo', 'bar')
+
+        self.assertIs(context.exception, error)
+        self.assertEqual(api._invoke.call_count, 2)
+
+    async def test_resources_list_returns_ids_unless_inspecting(self):
+        api = AsyncApi(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.get_api_token = AsyncMock(return_value='token')
+        api._invoke = AsyncMock(return_value=json.dumps([{'id': 'first'}, {'id': 'second'}]).encode())
+
+        self.assertEqual(await api.resources_list({'kind': 'user'}), ['first', 'second'])
+        self.assertEqual(await api.resources_list({'inspect': True}),
+                         [{'id': 'first'}, {'id': 'second'}])
+
+    async def test_rotate_other_api_key_rejects_invalid_resource_type(self):
+        api = AsyncApi(url='http://localhost', login_id='mylogin', api_key='apikey')
+
+        with self.assertRaises(Exception):
+            await api.rotate_other_api_key(Resource(type_='variable', name='foo'))
+
+    async def test_load_policy_file_returns_policy_changes(self):
+        api = AsyncApi(url='http://localhost', login_id='mylogin', api_key='apikey')
+        api.get_api_token = AsyncMock(return_value='token')
+        api._invoke = AsyncMock(return_value=b'{"version": 4}')
+
+        output = await api.load_policy_file('root', './test/test_config/policies/variables.yml')
+
+        self.assertEqual(output, {'version': 4})
+        self.assertEqual(api._invoke.call_args[0][0], HttpVerb.POST)
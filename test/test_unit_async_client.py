@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from conjur.async_client import AsyncClient
+
+
+class AsyncClientTest(unittest.IsolatedAsyncioTestCase):
+    @patch('conjur.async_client.AsyncApi')
+    def test_client_passes_api_key_credentials_to_api(self, mock_api):
+        AsyncClient(url='http://foo', account='myacct', login_id='mylogin', api_key='apikey')
+
+        mock_api.assert_called_once_with(account='myacct',
+                                         ca_bundle=None,
+                                         http_debug=False,
+                                         login_id='mylogin',
+                                         api_key='apikey',
+                                         ssl_verify=True,
+                                         url='http://foo')
+
+    @patch('conjur.async_client.AsyncApi')
+    def test_client_passes_password_credentials_to_api(self, mock_api):
+        AsyncClient(url='http://foo', login_id='mylogin', password='mypass', pool_maxsize=5)
+
+        mock_api.assert_called_once_with(account='default',
+                                         ca_bundle=None,
+                                         http_debug=False,
+                                         login_id='mylogin',
+                                         password='mypass',
+                                         pool_maxsize=5,
+                                         ssl_verify=True,
+                                         url='http://foo')
+
+    @patch('conjur.async_client.load_netrc_credentials',
+           return_value={'login_id': 'netrclogin', 'api_key': 'netrcapikey'})
+    @patch('conjur.async_client.load_connection_config',
+           return_value={'url': 'http://foo', 'account': 'myacct', 'ca_bundle': None})
+    @patch('conjur.async_client.AsyncApi')
+    def test_client_loads_credentials_from_netrc(self, mock_api, mock_config, mock_netrc):
+        AsyncClient()
+
+        mock_netrc.assert_called_once_with('http://foo')
+        self.assertEqual(mock_api.call_args[1]['login_id'], 'netrclogin')
+        self.assertEqual(mock_api.call_args[1]['api_key'], 'netrcapikey')
+
+    @patch('conjur.async_client.AsyncApi')
+    async def test_client_passes_through_api_calls(self, mock_api):
+        api = mock_api.return_value
+        api.get_variable = AsyncMock(return_value=b'value')
+        api.get_variables = AsyncMock(return_value={'foo': 'a'})
+        api.set_variable = AsyncMock()
+        api.whoami = AsyncMock(return_value={'account': 'myacct'})
+        client = AsyncClient(url='http://foo', login_id='mylogin', api_key='apikey')
+
+        self.assertEqual(await client.get('foo', '1'), b'value')
+        self.assertEqual(await client.get_many('foo'), {'foo': 'a'})
+        await client.set('foo', 'bar')
+        self.assertEqual(await client.whoami(), {'account': 'myacct'})
+
+        api.get_variable.assert_awaited_once_with('foo', '1')
+        api.get_variables.assert_awaited_once_with('foo')
+        api.set_variable.assert_awaited_once_with('foo', 'bar')
+
+    @patch('conjur.async_client.AsyncApi')
+    async def test_client_closes_api_when_used_as_context_manager(self, mock_api):
+        mock_api.return_value.close = AsyncMock()
+
+        async with AsyncClient(url='http://foo', login_id='mylogin', api_key='apikey'):
+            pass
+
+        mock_api.return_value.close.assert_awaited_once_with()
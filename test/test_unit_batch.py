@@ -0,0 +1,145 @@
+import io
+import json
+import unittest
+from argparse import Namespace
+from contextlib import redirect_stdout, redirect_stderr
+from unittest.mock import MagicMock
+
+from conjur.batch import BatchController, BatchLogic
+from conjur.errors import InvalidOperationException, MissingRequiredParameterException
+from conjur.resource import Resource
+
+
+class BatchLogicTest(unittest.TestCase):
+    def setUp(self):
+        self.client = MagicMock()
+        self.batch_logic = BatchLogic(self.client)
+
+    def test_batch_logic_gets_single_variable(self):
+        self.client.get.return_value = b'secret'
+
+        result = self.batch_logic.execute(Namespace(resource='variable', action='get',
+                                                    identifier=['foo'], version='2', output=None))
+
+        self.assertEqual(result, 'secret')
+        self.client.get.assert_called_once_with('foo', '2')
+
+    def test_batch_logic_gets_many_variables(self):
+        self.client.get_many.return_value = {'foo': 'a', 'bar': 'b'}
+
+        result = self.batch_logic.execute(Namespace(resource='variable', action='get',
+                                                    identifier=['foo', 'bar'], version=None, output=None))
+
+        self.assertEqual(result, {'foo': 'a', 'bar': 'b'})
+
+    def test_batch_logic_writes_variable_to_output_file(self):
+        result = self.batch_logic.execute(Namespace(resource='variable', action='get',
+                                                    identifier=['foo'], version=None,
+                                                    output='/tmp/foo'))
+
+        self.assertEqual(result, '/tmp/foo')
+        self.client.stream_variable.assert_called_once_with('foo', '/tmp/foo', None)
+
+    def test_batch_logic_does_not_write_variables_to_stdout(self):
+        for identifier, output in [(['foo'], '-'), (['foo', 'bar'], '/tmp/foo')]:
+            with self.subTest(identifier=identifier, output=output):
+                with self.assertRaises(InvalidOperationException):
+                    self.batch_logic.execute(Namespace(resource='variable', action='get',
+                                                       identifier=identifier, version=None,
+                                                       output=output))
+
+    def test_batch_logic_sets_variable(self):
+        result = self.batch_logic.execute(Namespace(resource='variable', action='set',
+                                                    identifier='foo', value='bar'))
+
+        self.assertEqual(result, 'foo')
+        self.client.set.assert_called_once_with('foo', 'bar')
+
+    def test_batch_logic_lists_resources(self):
+        self.client.stream_resources.return_value = iter(['one', 'two'])
+
+        result = self.batch_logic.execute(Namespace(resource='list', kind='user', inspect=False,
+                                                    search=None, limit=None, offset=None, role=None))
+
+        self.assertEqual(result, ['one', 'two'])
+        self.client.stream_resources.assert_called_once_with({'kind': 'user'})
+
+    def test_batch_logic_applies_policies(self):
+        for action, method in [('load', self.client.load_policy_file),
+                               ('replace', self.client.replace_policy_file),
+                               ('update', self.client.update_policy_file)]:
+            with self.subTest(action=action):
+                self.batch_logic.execute(Namespace(resource='policy', action=action,
+                                                   branch='root', file='policy.yml'))
+
+                method.assert_called_once_with('root', 'policy.yml')
+
+    def test_batch_logic_rotates_api_keys_of_other_roles(self):
+        self.client.rotate_other_api_key.return_value = 'newkey'
+
+        for resource in ['host', 'user']:
+            with self.subTest(resource=resource):
+                result = self.batch_logic.execute(Namespace(resource=resource, action='rotate-api-key',
+                                                            id='myrole'))
+
+                self.assertEqual(result, 'newkey')
+                resource_arg = self.client.rotate_other_api_key.call_args[0][0]
+                self.assertEqual(resource_arg.full_id(), Resource(type_=resource, name='myrole').full_id())
+
+    def test_batch_logic_requires_id_to_rotate_api_keys(self):
+        with self.assertRaises(MissingRequiredParameterException):
+            self.batch_logic.execute(Namespace(resource='user', action='rotate-api-key', id=None))
+
+    def test_batch_logic_rejects_unsupported_operations(self):
+        for args in [Namespace(resource='init'), Namespace(resource='user', action='change-password'),
+                     Namespace(resource='batch')]:
+            with self.subTest(args=args):
+                with self.assertRaises(InvalidOperationException):
+                    self.batch_logic.execute(args)
+
+
+class BatchControllerTest(unittest.TestCase):
+    def run_batch(self, operations, execute):
+        batch_logic = MagicMock()
+        batch_logic.execute.side_effect = execute
+        controller = BatchController(batch_logic=batch_logic,
+                                     operations=io.StringIO(operations),
+                                     parse_operation=lambda argv: argv)
+        output = io.StringIO()
+        errors = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(errors):
+            failed_count = controller.load()
+
+        return failed_count, [json.loads(line) for line in output.getvalue().splitlines()], errors.getvalue()
+
+    def test_batch_controller_writes_one_result_per_operation(self):
+        failed_count, results, errors = self.run_batch('variable get -i "my var"\nwhoami\n',
+                                                       lambda argv: argv)
+
+        self.assertEqual(failed_count, 0)
+        self.assertEqual(results, [{'line': 1, 'result': ['variable', 'get', '-i', 'my var']},
+                                   {'line': 2, 'result': ['whoami']}])
+        self.assertEqual(errors, '')
+
+    def test_batch_controller_skips_empty_lines_and_comments(self):
+        _, results, _ = self.run_batch('\n# comment\n   \nwhoami\n', lambda argv: 'ok')
+
+        self.assertEqual(results, [{'line': 4, 'result': 'ok'}])
+
+    def test_batch_controller_continues_after_failed_operations(self):
+        def execute(argv):
+            if argv == ['bad']:
+                raise RuntimeError("Error: bad operation")
+            return 'ok'
+
+        failed_count, results, errors = self.run_batch('bad\ngood\n', execute)
+
+        self.assertEqual(failed_count, 1)
+        self.assertEqual(results, [{'line': 1, 'error': 'Error: bad operation'},
+                                   {'line': 2, 'result': 'ok'}])
+        self.assertEqual(errors, 'Error: 1 of 2 batch operations failed\n')
+
+    def test_batch_controller_does_not_echo_operations(self):
+        _, results, _ = self.run_batch('variable set -i foo -v mysecret\n', lambda argv: 'foo')
+
+        self.assertNotIn('mysecret', json.dumps(results))
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import patch
+
+from conjur.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from conjur.errors import CircuitOpenException
+
+URL = 'https://conjur/secrets/myaccount/variable/foo'
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        monotonic_patcher = patch('conjur.circuit_breaker.time.monotonic',
+                                  side_effect=lambda: self.now)
+        monotonic_patcher.start()
+        self.addCleanup(monotonic_patcher.stop)
+
+    def call(self, breaker, failed=False, latency=0.1, url=URL):
+        probe = breaker.acquire(url)
+        breaker.record(url, latency, failed, probe)
+        return probe
+
+    def open_circuit(self, breaker):
+        for _ in range(breaker.min_calls):
+            self.call(breaker, failed=True)
+        self.assertEqual(breaker.state(URL), OPEN)
+
+    def test_circuit_breaker_starts_closed(self):
+        breaker = CircuitBreaker()
+
+        self.assertEqual(breaker.state(URL), CLOSED)
+        self.assertFalse(breaker.acquire(URL))
+
+    def test_circuit_breaker_opens_when_failure_rate_crosses_threshold(self):
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4)
+
+        for failed in [True, False, True]:
+            self.call(breaker, failed)
+        self.assertEqual(breaker.state(URL), CLOSED)
+
+        self.call(breaker, failed=False)
+        self.assertEqual(breaker.state(URL), OPEN)
+        with self.assertRaises(CircuitOpenException) as context:
+            breaker.acquire(URL)
+        self.assertEqual(context.exception.url, 'https://conjur')
+
+    def test_circuit_breaker_only_measures_latest_calls(self):
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4)
+
+        for failed in [False, False, False, True]:
+            self.call(breaker, failed)
+        self.assertEqual(breaker.state(URL), CLOSED)
+
+        # 2 of the 5 calls failed but so did 2 of the latest 4
+        self.call(breaker, failed=True)
+        self.assertEqual(breaker.state(URL), OPEN)
+
+    def test_circuit_breaker_opens_when_slow_call_rate_crosses_threshold(self):
+        breaker = CircuitBreaker(slow_call_threshold=1, slow_call_rate_threshold=0.5,
+                                 window_size=2, min_calls=2)
+
+        self.call(breaker, latency=0.5)
+        self.call(breaker, latency=2)
+
+        self.assertEqual(breaker.state(URL), OPEN)
+
+    def test_circuit_breaker_ignores_latency_without_slow_call_threshold(self):
+        breaker = CircuitBreaker(window_size=2, min_calls=2)
+
+        self.call(breaker, latency=100)
+        self.call(breaker, latency=100)
+
+        self.assertEqual(breaker.state(URL), CLOSED)
+
+    def test_circuit_breaker_keeps_a_circuit_per_base_url(self):
+        breaker = CircuitBreaker(window_size=2, min_calls=2)
+        self.open_circuit(breaker)
+
+        self.assertEqual(breaker.state('https://conjur/whoami'), OPEN)
+        self.assertEqual(breaker.state('https://follower/whoami'), CLOSED)
+        self.assertFalse(breaker.acquire('https://follower/whoami'))
+
+    def test_circuit_breaker_lets_probes_through_after_open_time(self):
+        breaker = CircuitBreaker(window_size=2, min_calls=2, open_time=30, half_open_probes=2)
+        self.open_circuit(breaker)
+
+        self.now += 30
+        self.assertEqual(breaker.state(URL), HALF_OPEN)
+        self.assertTrue(breaker.acquire(URL))
+        self.assertTrue(breaker.acquire(URL))
+        with self.assertRaises(CircuitOpenException):
+            breaker.acquire(URL)
+
+    def test_circuit_breaker_closes_when_probes_succeed(self):
+        breaker = CircuitBreaker(window_size=2, min_calls=2, open_time=30, half_open_probes=2)
+        self.open_circuit(breaker)
+        self.now += 30
+
+        self.assertTrue(self.call(breaker))
+        self.assertEqual(breaker.state(URL), HALF_OPEN)
+        self.assertTrue(self.call(breaker))
+
+        self.assertEqual(breaker.state(URL), CLOSED)
+        # The failures from before the circuit opened are forgotten
+        self.call(breaker, failed=True)
+        self.assertEqual(breaker.state(URL), CLOSED)
+
+    def test_circuit_breaker_opens_again_when_probe_fails(self):
+        breaker = CircuitBreaker(window_size=2, min_calls=2, open_time=30)
+        self.open_circuit(breaker)
+        self.now += 30
+
+        self.call(breaker, failed=True)
+
+        self.assertEqual(breaker.state(URL), OPEN)
+        self.now += 29
+        with self.assertRaises(CircuitOpenException):
+            breaker.acquire(URL)
+
+    def test_circuit_breaker_ignores_calls_that_were_let_through_before_it_opened(self):
+        breaker = CircuitBreaker(window_size=2, min_calls=2, open_time=30, half_open_probes=1)
+        late_call = breaker.acquire(URL)
+        self.open_circuit(breaker)
+        self.now += 30
+        probe = breaker.acquire(URL)
+
+        breaker.record(URL, 0.1, True, late_call)
+        self.assertEqual(breaker.state(URL), HALF_OPEN)
+        breaker.record(URL, 0.1, False, probe)
+        self.assertEqual(breaker.state(URL), CLOSED)
+
+    def test_circuit_breaker_rejects_min_calls_larger_than_window(self):
+        with self.assertRaises(ValueError):
+            CircuitBreaker(window_size=5, min_calls=10)
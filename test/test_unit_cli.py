@@ -1,9 +1,17 @@
+import io
+import json
+import os
+import sys
+import tempfile
 import unittest
-from unittest.mock import patch
+from contextlib import redirect_stdout, redirect_stderr
+from unittest.mock import patch, MagicMock
 
 from test.util.test_infrastructure import cli_test, cli_arg_test
 from conjur.version import __version__
 from conjur.cli import Cli
+from conjur.constants import DEFAULT_TOKEN_CACHE_FILE
+from conjur.errors import AgentRequestException, PartialBatchFailureException
 
 RESOURCE_LIST = [
     'some_id1',
@@ -12,6 +20,12 @@ RESOURCE_LIST = [
 WHOAMI_RESPONSE = {
     "account": "myaccount"
 }
+AGENT_IDENTITY = {
+    'url': 'https://conjur',
+    'account': 'myaccount',
+    'login_id': 'admin',
+    'ssl_verify': True,
+}
 
 class CliTest(unittest.TestCase):
     @cli_test()
@@ -24,6 +38,137 @@ class CliTest(unittest.TestCase):
 
         cli_instance.return_value.run.assert_called_once_with()
 
+    def test_cli_only_builds_parser_of_invoked_command(self):
+        self.assertEqual(Cli._commands_to_build(['variable', 'get', '-i', 'foo']), ('variable',))
+        self.assertEqual(Cli._commands_to_build(['-d', '--insecure', 'list', '-k', 'user']), ('list',))
+
+    def test_cli_builds_all_parsers_for_main_help_and_unknown_commands(self):
+        for argv in [[], ['-h'], ['--help'], ['-d', '-h', 'variable'], ['bogus'], ['-d']]:
+            with self.subTest(argv=argv):
+                self.assertEqual(Cli._commands_to_build(argv), Cli.COMMANDS)
+
+    @patch.object(Cli, '_add_policy_parser', new=MagicMock(side_effect=AssertionError("Built policy parser")))
+    @cli_test(["variable", "get", "-i", "foo"], get_output=b'A')
+    def test_cli_does_not_build_parsers_of_other_commands(self, cli_invocation, output, client):
+        client.get.assert_called_once_with('foo', None)
+
+    @cli_test(["variable"])
+    def test_cli_command_without_subcommand_lists_all_commands(self, cli_invocation, output, client):
+        for command in Cli.COMMANDS:
+            self.assertIn(command, output)
+
+    @patch('conjur.cli.Cli._load_agent_identity', return_value=AGENT_IDENTITY)
+    @patch('conjur.client.Client')
+    @patch('conjur.agent.AgentClient.connect')
+    def test_cli_forwards_variable_get_to_running_agent(self, mock_connect, mock_client,
+                                                        mock_load_identity):
+        mock_connect.return_value.ping.return_value = AGENT_IDENTITY
+        mock_connect.return_value.get.return_value = b'secret'
+        capture_stream = io.StringIO()
+
+        with self.assertRaises(SystemExit) as sys_exit, redirect_stdout(capture_stream), \
+                patch.object(sys, 'argv', ["cli", "variable", "get", "-i", "foo"]):
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 0)
+        self.assertEqual(capture_stream.getvalue(), 'secret\n')
+        mock_client.assert_not_called()
+
+    @patch('conjur.cli.Cli._load_agent_identity', return_value=AGENT_IDENTITY)
+    @patch('conjur.client.Client')
+    @patch('conjur.agent.AgentClient.connect')
+    def test_cli_reports_http_errors_returned_by_agent(self, mock_connect, mock_client,
+                                                       mock_load_identity):
+        mock_connect.return_value.ping.return_value = AGENT_IDENTITY
+        mock_connect.return_value.get.side_effect = AgentRequestException("404 Client Error", True)
+        capture_stream = io.StringIO()
+
+        with self.assertRaises(SystemExit) as sys_exit, redirect_stdout(capture_stream), \
+                patch.object(sys, 'argv', ["cli", "variable", "get", "-i", "foo"]):
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 1)
+        self.assertEqual(capture_stream.getvalue(), 'Failed to execute command. Reason: 404 Client Error\n')
+
+    def assert_agent_not_used(self, argv, agent_identity):
+        capture_stream = io.StringIO()
+
+        with patch('conjur.client.Client') as mock_client, \
+                patch('conjur.agent.AgentClient.connect') as mock_connect, \
+                patch('conjur.cli.Cli._load_agent_identity',
+                      side_effect=lambda ssl_verify: dict(AGENT_IDENTITY, ssl_verify=ssl_verify)), \
+                self.assertRaises(SystemExit) as sys_exit, redirect_stdout(capture_stream), \
+                patch.object(sys, 'argv', ["cli", *argv]):
+            mock_connect.return_value.ping.return_value = agent_identity
+            mock_client.return_value.get.return_value = b'secret'
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 0)
+        self.assertTrue(capture_stream.getvalue().endswith('secret\n'))
+        mock_client.assert_called_once()
+        mock_connect.return_value.get.assert_not_called()
+        return mock_connect
+
+    def test_cli_does_not_forward_to_agent_of_another_login(self):
+        mock_connect = self.assert_agent_not_used(["variable", "get", "-i", "foo"],
+                                                  dict(AGENT_IDENTITY, login_id='alice'))
+
+        mock_connect.return_value.close.assert_called_once_with()
+
+    def test_cli_does_not_forward_to_agent_of_another_server(self):
+        self.assert_agent_not_used(["variable", "get", "-i", "foo"],
+                                   dict(AGENT_IDENTITY, url='https://other-conjur'))
+
+    def test_cli_does_not_forward_insecure_requests_to_agent_that_verifies_certificates(self):
+        self.assert_agent_not_used(["--insecure", "variable", "get", "-i", "foo"], AGENT_IDENTITY)
+
+    def test_cli_does_not_forward_to_agent_that_does_not_report_its_identity(self):
+        self.assert_agent_not_used(["variable", "get", "-i", "foo"], 'pong')
+
+    def test_cli_does_not_forward_to_agent_when_debugging(self):
+        mock_connect = self.assert_agent_not_used(["-d", "variable", "get", "-i", "foo"],
+                                                  AGENT_IDENTITY)
+
+        mock_connect.assert_not_called()
+
+    @patch('conjur.cli.Cli.handle_agent_logic')
+    @cli_test(["agent", "--cache-ttl", "30"])
+    def test_cli_agent_serves_client(self, cli_invocation, output, client):
+        Cli.handle_agent_logic.assert_called_once_with(client, True)
+
+    @patch('conjur.logout.LogoutController.remove_credentials')
+    @patch('conjur.agent.AgentClient.connect')
+    def test_cli_logout_stops_agent(self, mock_connect, mock_remove_credentials):
+        with self.assertRaises(SystemExit) as sys_exit, redirect_stdout(io.StringIO()), \
+                patch.object(sys, 'argv', ["cli", "logout"]):
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 0)
+        mock_remove_credentials.assert_called_once_with()
+        mock_connect.return_value.stop.assert_called_once_with()
+        mock_connect.return_value.close.assert_called_once_with()
+
+    @patch.object(sys, 'stdin', io.StringIO('variable get -i foo\nvariable set -i foo -v "new value"\n'))
+    @cli_test(["batch"], get_output=b'A')
+    def test_cli_batch_executes_operations_from_stdin_with_one_client(self, cli_invocation, output, client):
+        self.assertEqual(output, '{"line": 1, "result": "A"}\n{"line": 2, "result": "foo"}\n')
+        client.set.assert_called_once_with('foo', 'new value')
+
+    @patch.object(sys, 'stdin', io.StringIO('variable get\nbogus\n'))
+    @patch('conjur.client.Client')
+    def test_cli_batch_reports_invalid_operations(self, mock_client):
+        capture_stream = io.StringIO()
+
+        with self.assertRaises(SystemExit) as sys_exit, redirect_stdout(capture_stream), \
+                redirect_stderr(io.StringIO()), patch.object(sys, 'argv', ["cli", "batch"]):
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 1)
+        results = [json.loads(line) for line in capture_stream.getvalue().splitlines()]
+        self.assertEqual([result['line'] for result in results], [1, 2])
+        self.assertIn('-i/--id', results[0]['error'])
+        self.assertIn("invalid choice: 'bogus'", results[1]['error'])
+
     @cli_test(["-h"])
     def test_cli_shows_help_with_short_help_flag(self, cli_invocation, output, client):
         self.assertIn("Usage:", output)
@@ -52,11 +197,75 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
     @cli_arg_test(["--insecure"], ssl_verify=False)
     def test_cli_passes_insecure_flag_to_client(self): pass
 
+    # API token cache
+    @patch.dict(os.environ, {'CONJUR_TOKEN_CACHE': 'true'})
+    @cli_arg_test(ssl_verify=True, token_cache_file=DEFAULT_TOKEN_CACHE_FILE)
+    def test_cli_enables_token_cache_from_environment(self): pass
+
+    @patch.dict(os.environ, {'CONJUR_TOKEN_CACHE': 'false'})
+    @cli_arg_test(ssl_verify=True)
+    def test_cli_token_cache_is_disabled_by_default(self): pass
+
     # Main method invocations
     @cli_test(["variable", "set", "-i", "foo", "-v", "bar"])
     def test_cli_invokes_variable_set_correctly(self, cli_invocation, output, client):
         client.set.assert_called_once_with('foo', 'bar')
 
+    @patch.object(sys, 'stdin', io.StringIO('{"foo": "a", "bar": "b"}'))
+    @cli_test(["variable", "set-many", "--workers", "16"], set_many_output=['foo', 'bar'])
+    def test_cli_invokes_variable_set_many_correctly(self, cli_invocation, output, client):
+        client.set_many.assert_called_once_with({'foo': 'a', 'bar': 'b'}, max_workers=16)
+        self.assertEqual(json.loads(output), {'set': ['foo', 'bar'], 'unchanged': [], 'failed': {}})
+
+    @patch.object(sys, 'stdin', io.StringIO('{"foo": "a", "bar": "b"}'))
+    @cli_test(["variable", "set-many", "--skip-unchanged"], set_many_output=['foo'])
+    def test_cli_variable_set_many_reports_unchanged_variables(self, cli_invocation, output, client):
+        client.set_many.assert_called_once_with({'foo': 'a', 'bar': 'b'}, skip_unchanged=True)
+        self.assertEqual(json.loads(output), {'set': ['foo'], 'unchanged': ['bar'], 'failed': {}})
+
+    def test_cli_variable_set_many_reads_variables_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as variables_file:
+            variables_file.write('{"foo": "a"}')
+            variables_file.flush()
+
+            @cli_test(["variable", "set-many", "-f", variables_file.name], set_many_output=['foo'])
+            def run_set_many(self, cli_invocation, output, client):
+                client.set_many.assert_called_once_with({'foo': 'a'})
+
+            run_set_many(self)
+
+    @patch.object(sys, 'stdin', io.StringIO('{"foo": "a", "bar": "b"}'))
+    @patch('conjur.client.Client')
+    def test_cli_variable_set_many_reports_failed_variables(self, mock_client):
+        mock_client.return_value.set_many.side_effect = PartialBatchFailureException(
+            ['foo'], {'bar': RuntimeError('403 Client Error')})
+        capture_stream = io.StringIO()
+        error_stream = io.StringIO()
+
+        with self.assertRaises(SystemExit) as sys_exit, redirect_stdout(capture_stream), \
+                redirect_stderr(error_stream), patch.object(sys, 'argv', ["cli", "variable", "set-many"]), \
+                patch('conjur.agent.AgentClient.connect', return_value=None):
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 1)
+        self.assertEqual(json.loads(capture_stream.getvalue()),
+                         {'set': ['foo'], 'unchanged': [], 'failed': {'bar': '403 Client Error'}})
+        self.assertEqual(error_stream.getvalue(), 'Error: Failed to set 1 of 2 variables\n')
+
+    @patch.object(sys, 'stdin', io.StringIO('["foo", "a"]'))
+    @patch('conjur.client.Client')
+    def test_cli_variable_set_many_rejects_invalid_variables(self, mock_client):
+        capture_stream = io.StringIO()
+
+        with self.assertRaises(SystemExit) as sys_exit, redirect_stdout(capture_stream), \
+                patch.object(sys, 'argv', ["cli", "variable", "set-many"]), \
+                patch('conjur.agent.AgentClient.connect', return_value=None):
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 1)
+        self.assertIn("must be a JSON object", capture_stream.getvalue())
+        mock_client.return_value.set_many.assert_not_called()
+
     @cli_test(["variable"])
     def test_cli_variable_parser_doesnt_break_without_action(self, cli_invocation, output, client):
         self.assertIn("Usage", output)
@@ -65,6 +274,40 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
     def test_cli_invokes_variable_get_correctly(self, cli_invocation, output, client):
         client.get.assert_called_once_with("foo", None)
 
+    @cli_test(["variable", "get", "-i", "foo", "--output", "/tmp/foo.p12", "--version", "2"])
+    def test_cli_invokes_variable_get_with_output_file_correctly(self, cli_invocation, output, client):
+        client.stream_variable.assert_called_once_with('foo', '/tmp/foo.p12', '2')
+        client.get.assert_not_called()
+        self.assertEqual(output, "Successfully wrote value of variable 'foo' to '/tmp/foo.p12'\n")
+
+    @patch('conjur.client.Client')
+    def test_cli_variable_get_writes_raw_value_to_stdout(self, mock_client):
+        mock_client.return_value.stream_variable.side_effect = \
+            lambda variable_id, output_file, version: output_file.write(b'\x00\xff')
+        capture_buffer = io.BytesIO()
+        capture_stream = io.TextIOWrapper(capture_buffer)
+
+        with self.assertRaises(SystemExit) as sys_exit, patch.object(sys, 'stdout', capture_stream), \
+                patch.object(sys, 'argv', ["cli", "variable", "get", "-i", "foo", "--output", "-"]), \
+                patch('conjur.agent.AgentClient.connect', return_value=None):
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 0)
+        self.assertEqual(capture_buffer.getvalue(), b'\x00\xff')
+
+    @patch('conjur.client.Client')
+    def test_cli_variable_get_writes_only_one_variable_to_output(self, mock_client):
+        capture_stream = io.StringIO()
+
+        with self.assertRaises(SystemExit) as sys_exit, redirect_stdout(capture_stream), \
+                patch.object(sys, 'argv', ["cli", "variable", "get", "-i", "foo", "bar", "--output", "out"]), \
+                patch('conjur.agent.AgentClient.connect', return_value=None):
+            Cli().run()
+
+        self.assertEqual(sys_exit.exception.code, 1)
+        self.assertIn("Only the value of a single variable", capture_stream.getvalue())
+        mock_client.return_value.stream_variable.assert_not_called()
+
     @cli_test(["variable", "get", "-i", "foo", "bar"], get_many_output={"foo": "A", "bar": "B"})
     def test_cli_invokes_variable_get_correctly_with_multiple_vars(self, cli_invocation, output, client):
         client.get_many.assert_called_once_with('foo', 'bar')
@@ -151,12 +394,30 @@ Copyright (c) 2020 CyberArk Software Ltd. All rights reserved.
 
     @cli_test(["list"], list_output=RESOURCE_LIST)
     def test_cli_invokes_resource_listing_correctly(self, cli_invocation, output, client):
-        client.list.assert_called_once_with({})
+        client.stream_resources.assert_called_once_with({})
+        client.iter_resources.assert_not_called()
+
+    @cli_test(["list", "--prefetch", "3"], list_output=RESOURCE_LIST)
+    def test_cli_resource_listing_prefetches_pages_if_requested(self, cli_invocation, output, client):
+        client.iter_resources.assert_called_once_with({}, page_size=1000, prefetch=3)
+        self.assertEquals('[\n    "some_id1",\n    "some_id2"\n]\n', output)
 
     @cli_test(["list"], list_output=RESOURCE_LIST)
     def test_cli_resource_listing_outputs_formatted_json(self, cli_invocation, output, client):
         self.assertEquals('[\n    "some_id1",\n    "some_id2"\n]\n', output)
 
+    @cli_test(["list", "--format", "ndjson"], list_output=RESOURCE_LIST)
+    def test_cli_resource_listing_outputs_ndjson(self, cli_invocation, output, client):
+        self.assertEquals('"some_id1"\n"some_id2"\n', output)
+
+    @cli_test(["list", "--format", "json", "--inspect"], list_output=[{"id": "a", "owner": "b"}])
+    def test_cli_resource_listing_outputs_compact_json(self, cli_invocation, output, client):
+        self.assertEquals('[{"id":"a","owner":"b"}]\n', output)
+
+    @cli_test(["list", "--format", "json"], list_output=[])
+    def test_cli_resource_listing_outputs_compact_json_for_empty_listing(self, cli_invocation, output, client):
+        self.assertEquals('[]\n', output)
+
     @cli_test(["user"])
     def test_cli_user_retuns_main_help(self, cli_invocation, output, client):
         self.assertIn("Usage:\n", output)
@@ -1,9 +1,17 @@
+import io
 import logging
+import os
+import tempfile
+import threading
 import unittest
 import uuid
 from unittest.mock import patch, MagicMock
 
 from conjur.client import ConfigException, Client
+from conjur.circuit_breaker import CircuitBreaker
+from conjur.errors import CircuitOpenException, PartialBatchFailureException
+from conjur.hedge_policy import HedgePolicy
+from conjur.retry_policy import RetryPolicy
 
 # CredentialsFromFile mocked class
 MockCredentials = {
@@ -117,6 +125,96 @@ class ClientTest(unittest.TestCase):
             url='http://myurl',
         )
 
+    @patch('conjur.client.Api')
+    def test_client_passes_pool_settings_to_api_initializer(self, mock_api_instance):
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', pool_connections=2, pool_maxsize=20, keep_alive=False)
+
+        mock_api_instance.assert_called_with(
+            account='myacct',
+            api_key='someapikey',
+            ca_bundle=None,
+            http_debug=False,
+            login_id='mylogin',
+            ssl_verify=True,
+            url='http://foo',
+            pool_connections=2,
+            pool_maxsize=20,
+            keep_alive=False,
+        )
+
+    @patch('conjur.client.Api')
+    def test_client_passes_read_urls_to_api_initializer(self, mock_api_instance):
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', read_urls=['http://follower'])
+
+        self.assertEqual(mock_api_instance.call_args[1]['url'], 'http://foo')
+        self.assertEqual(mock_api_instance.call_args[1]['read_urls'], ['http://follower'])
+
+    @patch('conjur.client.Api')
+    def test_client_passes_timeout_and_retry_policy_to_api_initializer(self, mock_api_instance):
+        retry_policy = RetryPolicy()
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', timeout=10, retry_policy=retry_policy)
+
+        self.assertEqual(mock_api_instance.call_args[1]['timeout'], 10)
+        self.assertIs(mock_api_instance.call_args[1]['retry_policy'], retry_policy)
+
+    @patch('conjur.client.Api')
+    def test_client_passes_hedge_policy_to_api_initializer(self, mock_api_instance):
+        hedge_policy = HedgePolicy()
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', read_urls=['http://follower1', 'http://follower2'],
+               hedge_policy=hedge_policy)
+
+        self.assertIs(mock_api_instance.call_args[1]['hedge_policy'], hedge_policy)
+
+    @patch('conjur.client.Api')
+    def test_client_does_not_pass_empty_read_urls_to_api_initializer(self, mock_api_instance):
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', read_urls=[])
+
+        self.assertNotIn('read_urls', mock_api_instance.call_args[1])
+
+    @patch('conjur.client.Api')
+    def test_client_starts_token_refresher_if_lead_time_is_provided(self, mock_api_instance):
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', token_refresh_lead_time=45)
+
+        mock_api_instance.return_value.start_token_refresher.assert_called_once_with(lead_time=45)
+
+    @patch('conjur.client.Api')
+    def test_client_does_not_start_token_refresher_by_default(self, mock_api_instance):
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey')
+
+        mock_api_instance.return_value.start_token_refresher.assert_not_called()
+
+    @patch('conjur.client.Api')
+    def test_client_returns_api_token_refresh_stats(self, mock_api_instance):
+        mock_api_instance.return_value.token_refresh_stats = {'refreshes': 1, 'coalesced_waiters': 3}
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey')
+
+        self.assertEqual(client.token_refresh_stats(), {'refreshes': 1, 'coalesced_waiters': 3})
+
+    @patch('conjur.client.Api')
+    def test_client_passes_batch_settings_to_api_initializer(self, mock_api_instance):
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', batch_max_url_length=2000, batch_max_workers=8)
+
+        self.assertEqual(mock_api_instance.call_args[1]['batch_max_url_length'], 2000)
+        self.assertEqual(mock_api_instance.call_args[1]['batch_max_workers'], 8)
+
+    @patch('conjur.client.Api')
+    def test_client_close_releases_api_connections(self, mock_api_instance):
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey')
+
+        client.close()
+
+        mock_api_instance.return_value.close.assert_called_once_with()
+
     @patch('conjur.client.Api')
     def test_client_performs_password_api_login_if_password_is_provided(self, mock_api_instance):
         Client(url='http://foo', account='myacct', login_id='mylogin',
@@ -334,6 +432,33 @@ class ClientTest(unittest.TestCase):
             'variable_value',
         )
 
+    @patch('conjur.client.ApiConfig', return_value=MockApiConfig())
+    @patch('conjur.credentials_from_file.CredentialsFromFile.load', return_value=MockCredentials)
+    @patch('conjur.client.Api')
+    def test_client_passes_through_api_set_variables_params(self, mock_api_instance, mock_creds,
+            mock_api_config):
+        mock_api_instance.return_value.set_variables.return_value = ['foo', 'bar']
+
+        return_value = Client().set_many({'foo': 'a', 'bar': 'b'}, max_workers=2)
+
+        self.assertEqual(return_value, ['foo', 'bar'])
+        mock_api_instance.return_value.set_variables.assert_called_once_with(
+            [('foo', 'a'), ('bar', 'b')],
+            max_workers=2,
+        )
+
+    @patch('conjur.client.ApiConfig', return_value=MockApiConfig())
+    @patch('conjur.credentials_from_file.CredentialsFromFile.load', return_value=MockCredentials)
+    @patch('conjur.client.Api')
+    def test_client_passes_through_api_set_variables_skip_unchanged(self, mock_api_instance, mock_creds,
+            mock_api_config):
+        Client().set_many({'foo': 'a'}, skip_unchanged=True)
+
+        mock_api_instance.return_value.set_variables.assert_called_once_with(
+            [('foo', 'a')],
+            skip_unchanged=True,
+        )
+
     @patch('conjur.client.ApiConfig', return_value=MockApiConfig())
     @patch('conjur.credentials_from_file.CredentialsFromFile.load', return_value=MockCredentials)
     @patch('conjur.client.Api')
@@ -420,3 +545,362 @@ class ClientTest(unittest.TestCase):
         Client().whoami()
 
         mock_api_instance.return_value.whoami.assert_called_once_with()
+
+    @patch('conjur.client.Api')
+    def test_client_passes_timeout_to_api_methods(self, mock_api_instance):
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey')
+
+        client.get('variable_id', timeout=5)
+        client.get_many('foo', 'bar', timeout=5)
+        client.set('variable_id', 'value', timeout=5)
+        client.list({'kind': 'variable'}, timeout=5)
+
+        api = mock_api_instance.return_value
+        api.get_variable.assert_called_once_with('variable_id', None, timeout=5)
+        api.get_variables.assert_called_once_with('foo', 'bar', timeout=5)
+        api.set_variable.assert_called_once_with('variable_id', 'value', timeout=5)
+        api.resources_list.assert_called_once_with({'kind': 'variable'}, timeout=5)
+
+    ### Secret cache tests ###
+
+    def _cached_client(self, **kwargs):
+        return Client(url='http://foo', account='myacct', login_id='mylogin',
+                      api_key='someapikey', cache_ttl=60, **kwargs)
+
+    @patch('conjur.client.Api')
+    def test_client_get_is_not_cached_by_default(self, mock_api_instance):
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey')
+
+        client.get('variable_id')
+        client.get('variable_id')
+
+        self.assertEqual(mock_api_instance.return_value.get_variable.call_count, 2)
+
+    @patch('conjur.client.Api')
+    def test_client_get_serves_repeated_reads_from_cache(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.return_value = b'value'
+        client = self._cached_client()
+
+        self.assertEqual(client.get('variable_id'), b'value')
+        self.assertEqual(client.get('variable_id'), b'value')
+
+        mock_api_instance.return_value.get_variable.assert_called_once_with('variable_id', None)
+
+    @patch('conjur.client.Api')
+    def test_client_get_caches_each_version_separately(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.side_effect = [b'latest', b'first']
+        client = self._cached_client()
+
+        self.assertEqual(client.get('variable_id'), b'latest')
+        self.assertEqual(client.get('variable_id', '1'), b'first')
+        self.assertEqual(client.get('variable_id', '1'), b'first')
+
+        self.assertEqual(mock_api_instance.return_value.get_variable.call_count, 2)
+
+    @patch('conjur.client.Api')
+    def test_client_get_many_only_fetches_cache_misses(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.return_value = b'a'
+        mock_api_instance.return_value.get_variables.return_value = {'bar': 'b'}
+        client = self._cached_client()
+        client.get('foo')
+
+        result = client.get_many('foo', 'bar')
+
+        self.assertEqual(result, {'foo': 'a', 'bar': 'b'})
+        mock_api_instance.return_value.get_variables.assert_called_once_with('bar')
+
+    @patch('conjur.client.Api')
+    def test_client_get_many_populates_cache_for_get(self, mock_api_instance):
+        mock_api_instance.return_value.get_variables.return_value = {'foo': 'a', 'bar': 'b'}
+        client = self._cached_client()
+
+        client.get_many('foo', 'bar')
+
+        self.assertEqual(client.get('foo'), b'a')
+        self.assertEqual(client.get_many('foo', 'bar'), {'foo': 'a', 'bar': 'b'})
+        mock_api_instance.return_value.get_variable.assert_not_called()
+        mock_api_instance.return_value.get_variables.assert_called_once_with('foo', 'bar')
+
+    @patch('conjur.client.Api')
+    def test_client_set_invalidates_cached_value(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.side_effect = [b'old', b'new']
+        client = self._cached_client()
+        client.get('variable_id')
+
+        client.set('variable_id', 'new')
+
+        self.assertEqual(client.get('variable_id'), b'new')
+
+    @patch('conjur.client.Api')
+    def test_client_set_many_invalidates_cached_values_even_on_failure(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.side_effect = [b'old', b'new']
+        mock_api_instance.return_value.set_variables.side_effect = \
+            PartialBatchFailureException([], {'variable_id': RuntimeError('failed')})
+        client = self._cached_client()
+        client.get('variable_id')
+
+        with self.assertRaises(PartialBatchFailureException):
+            client.set_many([('variable_id', 'new')])
+
+        self.assertEqual(client.get('variable_id'), b'new')
+
+    @patch('conjur.client.Api')
+    def test_client_stream_variable_bypasses_cache(self, mock_api_instance):
+        mock_api_instance.return_value.stream_variable.return_value = 3
+        client = self._cached_client()
+        output_file = io.BytesIO()
+
+        self.assertEqual(client.stream_variable('variable_id', output_file, '2'), 3)
+
+        mock_api_instance.return_value.stream_variable.assert_called_once_with('variable_id',
+                                                                                output_file, '2')
+        self.assertEqual(len(client._cache), 0)
+
+    @patch('conjur.client.Api')
+    def test_client_stream_variable_writes_to_path(self, mock_api_instance):
+        mock_api_instance.return_value.stream_variable.side_effect = \
+            lambda variable_id, output_file, version: output_file.write(b'\x00\xff')
+        client = self._cached_client()
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_path = os.path.join(output_dir, 'secret')
+            client.stream_variable('variable_id', output_path)
+
+            with open(output_path, 'rb') as output_file:
+                self.assertEqual(output_file.read(), b'\x00\xff')
+
+    ### Stale-while-revalidate tests ###
+
+    def _stale_client(self):
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey', cache_ttl=60, cache_hard_ttl=600)
+        # Cache with an already elapsed TTL so every entry is stored as stale
+        client._cache.ttl = -1
+        return client
+
+    @patch('conjur.client.Api')
+    def test_client_get_returns_stale_value_and_refreshes_in_background(self, mock_api_instance):
+        refreshed = threading.Event()
+        def get_variable(variable_id, version=None):
+            if mock_api_instance.return_value.get_variable.call_count > 1:
+                refreshed.set()
+                return b'new'
+            return b'old'
+        mock_api_instance.return_value.get_variable.side_effect = get_variable
+        client = self._stale_client()
+        client.get('variable_id')
+
+        self.assertEqual(client.get('variable_id'), b'old')
+
+        self.assertTrue(refreshed.wait(5))
+        mock_api_instance.return_value.get_variable.assert_called_with('variable_id')
+
+    @patch('conjur.client.Api')
+    def test_client_get_does_not_start_duplicate_refreshes(self, mock_api_instance):
+        started = threading.Event()
+        release = threading.Event()
+        def get_variable(variable_id, version=None):
+            if mock_api_instance.return_value.get_variable.call_count > 1:
+                started.set()
+                release.wait(5)
+            return b'value'
+        mock_api_instance.return_value.get_variable.side_effect = get_variable
+        client = self._stale_client()
+        client.get('variable_id')
+
+        client.get('variable_id')
+        self.assertTrue(started.wait(5))
+        client.get('variable_id')
+        release.set()
+
+        self.assertEqual(mock_api_instance.return_value.get_variable.call_count, 2)
+
+    @patch('conjur.client.Api')
+    def test_client_get_many_refreshes_stale_values_in_one_batch(self, mock_api_instance):
+        refreshed = threading.Event()
+        def get_variables(*variable_ids):
+            if mock_api_instance.return_value.get_variables.call_count > 1:
+                refreshed.set()
+            return {'foo': 'a', 'bar': 'b'}
+        mock_api_instance.return_value.get_variables.side_effect = get_variables
+        client = self._stale_client()
+        client.get_many('foo', 'bar')
+
+        self.assertEqual(client.get_many('foo', 'bar'), {'foo': 'a', 'bar': 'b'})
+
+        self.assertTrue(refreshed.wait(5))
+        mock_api_instance.return_value.get_variables.assert_called_with('foo', 'bar')
+
+    @patch('conjur.client.Api')
+    def test_client_get_blocks_on_fetch_after_hard_ttl(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.side_effect = [b'old', b'new']
+        client = self._stale_client()
+        client._cache.hard_ttl = -1
+        client.get('variable_id')
+
+        self.assertEqual(client.get('variable_id'), b'new')
+
+    ### Circuit breaker tests ###
+
+    def _expired_client(self):
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey', cache_ttl=60, circuit_breaker=CircuitBreaker())
+        # Cache with an already elapsed TTL so every entry is stored as expired
+        client._cache.ttl = client._cache.hard_ttl = -1
+        return client
+
+    @patch('conjur.client.Api')
+    def test_client_passes_circuit_breaker_to_api(self, mock_api_instance):
+        circuit_breaker = CircuitBreaker()
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', circuit_breaker=circuit_breaker)
+
+        self.assertIs(mock_api_instance.call_args[1]['circuit_breaker'], circuit_breaker)
+
+    @patch('conjur.client.Api')
+    def test_client_get_serves_expired_value_while_circuit_is_open(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.side_effect = [
+            b'value', CircuitOpenException('http://foo')]
+        client = self._expired_client()
+        client.get('variable_id')
+
+        self.assertEqual(client.get('variable_id'), b'value')
+
+    @patch('conjur.client.Api')
+    def test_client_get_raises_if_circuit_is_open_and_value_is_not_cached(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.side_effect = CircuitOpenException('http://foo')
+        client = self._expired_client()
+
+        with self.assertRaises(CircuitOpenException):
+            client.get('variable_id')
+
+    @patch('conjur.client.Api')
+    def test_client_get_does_not_serve_expired_value_on_other_errors(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.side_effect = [b'value', RuntimeError()]
+        client = self._expired_client()
+        client.get('variable_id')
+
+        with self.assertRaises(RuntimeError):
+            client.get('variable_id')
+
+    @patch('conjur.client.Api')
+    def test_client_does_not_keep_expired_values_without_circuit_breaker(self, mock_api_instance):
+        mock_api_instance.return_value.get_variable.side_effect = [
+            b'value', CircuitOpenException('http://foo')]
+        client = self._cached_client()
+        client._cache.ttl = client._cache.hard_ttl = -1
+        client.get('variable_id')
+
+        with self.assertRaises(CircuitOpenException):
+            client.get('variable_id')
+
+    @patch('conjur.client.Api')
+    def test_client_get_many_serves_expired_values_while_circuit_is_open(self, mock_api_instance):
+        mock_api_instance.return_value.get_variables.side_effect = [
+            {'foo': 'a', 'bar': 'b'}, CircuitOpenException('http://foo')]
+        client = self._expired_client()
+        client.get_many('foo', 'bar')
+
+        self.assertEqual(client.get_many('foo', 'bar'), {'foo': 'a', 'bar': 'b'})
+
+    @patch('conjur.client.Api')
+    def test_client_get_many_serves_expired_values_of_chunks_rejected_by_circuit(self,
+            mock_api_instance):
+        mock_api_instance.return_value.get_variables.side_effect = [
+            {'foo': 'a'},
+            PartialBatchFailureException({'bar': 'b'}, {'foo': CircuitOpenException('http://foo')})]
+        client = self._expired_client()
+        client.get_many('foo')
+
+        self.assertEqual(client.get_many('foo', 'bar'), {'foo': 'a', 'bar': 'b'})
+
+    @patch('conjur.client.Api')
+    def test_client_get_many_raises_if_circuit_is_open_and_a_value_is_not_cached(self,
+            mock_api_instance):
+        mock_api_instance.return_value.get_variables.side_effect = [
+            {'foo': 'a'}, CircuitOpenException('http://foo')]
+        client = self._expired_client()
+        client.get_many('foo')
+
+        with self.assertRaises(CircuitOpenException):
+            client.get_many('foo', 'bar')
+
+    @patch('conjur.client.Api')
+    def test_client_get_many_raises_partial_failure_not_caused_by_circuit(self,
+            mock_api_instance):
+        mock_api_instance.return_value.get_variables.side_effect = [
+            {'foo': 'a'},
+            PartialBatchFailureException({}, {'foo': CircuitOpenException('http://foo'),
+                                              'bar': RuntimeError()})]
+        client = self._expired_client()
+        client.get_many('foo')
+
+        with self.assertRaises(PartialBatchFailureException):
+            client.get_many('foo', 'bar')
+
+    ### Request coalescing tests ###
+
+    @patch('conjur.client.Api')
+    def test_client_get_is_coalesced_into_batch_read(self, mock_api_instance):
+        mock_api_instance.return_value.get_variables.return_value = {'variable_id': 'value'}
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey', coalesce_window=0)
+
+        self.assertEqual(client.get('variable_id'), b'value')
+
+        mock_api_instance.return_value.get_variables.assert_called_once_with('variable_id')
+        mock_api_instance.return_value.get_variable.assert_not_called()
+
+    @patch('conjur.client.Api')
+    def test_client_get_with_version_is_not_coalesced(self, mock_api_instance):
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey', coalesce_window=0)
+
+        client.get('variable_id', '2')
+
+        mock_api_instance.return_value.get_variable.assert_called_once_with('variable_id', '2')
+        mock_api_instance.return_value.get_variables.assert_not_called()
+
+    @patch('conjur.client.Api')
+    def test_client_get_with_timeout_is_not_coalesced(self, mock_api_instance):
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey', coalesce_window=0)
+
+        client.get('variable_id', timeout=5)
+
+        mock_api_instance.return_value.get_variable.assert_called_once_with('variable_id', None,
+                                                                            timeout=5)
+        mock_api_instance.return_value.get_variables.assert_not_called()
+
+    @patch('conjur.client.TokenCache')
+    @patch('conjur.client.Api')
+    def test_client_passes_token_cache_to_api(self, mock_api_instance, mock_token_cache):
+        Client(url='http://foo', account='myacct', login_id='mylogin',
+               api_key='someapikey', token_cache_file='/tmp/token-cache')
+
+        mock_token_cache.assert_called_once_with('/tmp/token-cache')
+        self.assertEqual(mock_api_instance.call_args[1]['token_cache'],
+                         mock_token_cache.return_value)
+
+    ### Resource iteration tests ###
+
+    @patch('conjur.client.Api')
+    def test_client_passes_through_api_iter_resources_params(self, mock_api_instance):
+        mock_api_instance.return_value.iter_resources.return_value = iter(['first', 'second'])
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey')
+
+        self.assertEqual(list(client.iter_resources({'kind': 'user'}, page_size=50, prefetch=2)),
+                         ['first', 'second'])
+        mock_api_instance.return_value.iter_resources.assert_called_once_with({'kind': 'user'}, 50, 2)
+
+    @patch('conjur.client.Api')
+    def test_client_passes_through_api_stream_resources_params(self, mock_api_instance):
+        mock_api_instance.return_value.stream_resources.return_value = iter(['first'])
+        client = Client(url='http://foo', account='myacct', login_id='mylogin',
+                        api_key='someapikey')
+
+        self.assertEqual(list(client.stream_resources({'kind': 'user'})), ['first'])
+        mock_api_instance.return_value.stream_resources.assert_called_once_with({'kind': 'user'})
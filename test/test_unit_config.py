@@ -9,6 +9,8 @@ class ConfigTest(unittest.TestCase):
 
     GOOD_CONJURRC = os.path.join(CURRENT_DIR, 'test_config', 'good_conjurrc')
 
+    READ_URLS_CONJURRC = os.path.join(CURRENT_DIR, 'test_config', 'read_urls_conjurrc')
+
     MISSING_ACCOUNT_CONJURRC = os.path.join(CURRENT_DIR, 'test_config', 'missing_account_conjurrc')
     MISSING_URL_CONJURRC = os.path.join(CURRENT_DIR, 'test_config', 'missing_url_conjurrc')
 
@@ -52,6 +54,17 @@ class ConfigTest(unittest.TestCase):
                 re.MULTILINE | re.DOTALL,
             ))
 
+    def test_config_loads_read_urls(self):
+        test_data = Config(config_file=self.READ_URLS_CONJURRC)
+
+        self.assertEqual(test_data.url, 'https://leader')
+        self.assertEqual(test_data.read_urls, ['https://follower1', 'https://follower2'])
+
+    def test_config_read_urls_are_optional(self):
+        test_data = Config(config_file=self.GOOD_CONJURRC)
+
+        self.assertIsNone(test_data.read_urls)
+
     def test_config_with_no_conjurrc_raises_error(self):
         with self.assertRaises(FileNotFoundError):
             Config(config_file='/tmp/foo')
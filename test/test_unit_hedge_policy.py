@@ -0,0 +1,40 @@
+import unittest
+
+from conjur.hedge_policy import HedgePolicy
+
+
+class HedgePolicyTest(unittest.TestCase):
+    def test_hedge_delay_is_max_delay_until_enough_latencies_are_measured(self):
+        policy = HedgePolicy(max_delay=2, min_samples=3)
+        policy.record(0.1)
+        policy.record(0.1)
+
+        self.assertEqual(policy.delay(), 2)
+
+    def test_hedge_delay_is_percentile_of_latest_latencies(self):
+        policy = HedgePolicy(percentile=90, min_delay=0, min_samples=10)
+        for latency in range(1, 11):
+            policy.record(latency / 100)
+
+        self.assertEqual(policy.delay(), 0.09)
+
+    def test_hedge_delay_only_measures_latest_latencies(self):
+        policy = HedgePolicy(percentile=100, min_delay=0, window_size=2, min_samples=2)
+        for latency in [0.5, 0.1, 0.2]:
+            policy.record(latency)
+
+        self.assertEqual(policy.delay(), 0.2)
+
+    def test_hedge_delay_is_bounded(self):
+        policy = HedgePolicy(percentile=50, min_delay=0.05, max_delay=0.5, min_samples=1)
+        policy.record(0.01)
+        self.assertEqual(policy.delay(), 0.05)
+
+        policy = HedgePolicy(percentile=50, min_delay=0.05, max_delay=0.5, min_samples=1)
+        policy.record(3)
+        self.assertEqual(policy.delay(), 0.5)
+
+    def test_hedge_policy_rejects_invalid_percentile(self):
+        for percentile in [0, 101]:
+            with self.assertRaises(ValueError):
+                HedgePolicy(percentile=percentile)
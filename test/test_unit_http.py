@@ -1,12 +1,24 @@
+import http.server
+import threading
 import unittest
 
 from enum import Enum
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 import requests
 
 from conjur.endpoints import ConjurEndpoint
-from conjur.http_wrapper import HttpVerb, invoke_endpoint
+from conjur.http_wrapper import HttpVerb, invoke_endpoint, create_session, is_server_failure, \
+    is_unauthorized
+from conjur.circuit_breaker import CircuitBreaker, CLOSED, OPEN
+from conjur.errors import CircuitOpenException
+from conjur.retry_policy import RetryPolicy, RetryBudget
+
+
+def _ok_response():
+    response = requests.models.Response()
+    response.status_code = 200
+    return response
 
 
 class HttpVerbTest(unittest.TestCase):
@@ -145,3 +157,222 @@ class HttpInvokeEndpointTest(unittest.TestCase):
         response = invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None)
 
         self.assertEquals(response, mock_get.return_value)
+
+    @patch.object(requests, 'get')
+    def test_invoke_endpoint_uses_session_if_provided(self, mock_get):
+        session = MagicMock()
+
+        invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None, session=session)
+
+        session.get.assert_called_once_with('no/params', auth=None, headers={}, verify=True, params=None)
+        mock_get.assert_not_called()
+
+    @patch.object(requests, 'get')
+    def test_invoke_endpoint_can_stream_response(self, mock_get):
+        invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None, stream=True)
+
+        mock_get.assert_called_once_with('no/params', auth=None, headers={}, verify=True,
+                                         params=None, stream=True)
+
+    @patch.object(requests, 'get')
+    def test_invoke_endpoint_passes_timeout_only_when_set(self, mock_get):
+        invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None, timeout=(1, 5))
+
+        mock_get.assert_called_once_with('no/params', auth=None, headers={}, verify=True,
+                                         params=None, timeout=(1, 5))
+
+
+class HttpCreateSessionTest(unittest.TestCase):
+    def test_create_session_mounts_pooled_adapter_for_both_schemes(self):
+        session = create_session(pool_connections=3, pool_maxsize=7)
+
+        for scheme in ['https://', 'http://']:
+            adapter = session.get_adapter(scheme + 'conjur')
+            self.assertEqual(adapter._pool_connections, 3)
+            self.assertEqual(adapter._pool_maxsize, 7)
+
+    def test_create_session_keeps_connections_alive_by_default(self):
+        session = create_session()
+
+        self.assertNotEqual(session.headers.get('Connection'), 'close')
+
+    def test_create_session_closes_connections_if_keep_alive_is_disabled(self):
+        session = create_session(keep_alive=False)
+
+        self.assertEqual(session.headers['Connection'], 'close')
+
+    def test_is_server_failure_detects_unreachable_servers_and_server_errors(self):
+        server_error = requests.models.Response()
+        server_error.status_code = 503
+        not_found = requests.models.Response()
+        not_found.status_code = 404
+
+        self.assertTrue(is_server_failure(requests.exceptions.ConnectionError()))
+        self.assertTrue(is_server_failure(requests.exceptions.ReadTimeout()))
+        self.assertTrue(is_server_failure(requests.exceptions.HTTPError(response=server_error)))
+        self.assertFalse(is_server_failure(requests.exceptions.HTTPError(response=not_found)))
+        self.assertTrue(is_server_failure(CircuitOpenException('https://conjur')))
+        self.assertFalse(is_server_failure(RuntimeError()))
+
+    def test_is_unauthorized_only_detects_rejected_credentials(self):
+        unauthorized = requests.models.Response()
+        unauthorized.status_code = 401
+        forbidden = requests.models.Response()
+        forbidden.status_code = 403
+
+        self.assertTrue(is_unauthorized(requests.exceptions.HTTPError(response=unauthorized)))
+        self.assertFalse(is_unauthorized(requests.exceptions.HTTPError(response=forbidden)))
+        self.assertFalse(is_unauthorized(requests.exceptions.ConnectionError()))
+
+    @patch.object(requests.adapters.HTTPAdapter, 'send', return_value=_ok_response())
+    def test_create_session_applies_default_timeout(self, mock_send):
+        session = create_session(timeout=(1, 5))
+
+        session.get('https://conjur/one')
+        session.get('https://conjur/two', timeout=30)
+
+        self.assertEqual([sent_call[1]['timeout'] for sent_call in mock_send.call_args_list],
+                         [(1, 5), 30])
+
+    @patch.object(requests.adapters.HTTPAdapter, 'send', return_value=_ok_response())
+    def test_create_session_does_not_time_out_by_default(self, mock_send):
+        session = create_session()
+
+        session.get('https://conjur/one')
+
+        self.assertIsNone(mock_send.call_args[1]['timeout'])
+
+    def test_create_session_does_not_retry_by_default(self):
+        session = create_session()
+
+        self.assertEqual(session.get_adapter('https://conjur').max_retries.total, 0)
+
+    @patch.object(requests.adapters.HTTPAdapter, 'send', return_value=_ok_response())
+    def test_create_session_retries_with_the_retry_policy(self, mock_send):
+        budget = RetryBudget()
+        session = create_session(retry_policy=RetryPolicy(max_retries=2, budget=budget))
+
+        retry = session.get_adapter('https://conjur').max_retries
+        self.assertEqual(retry.total, 2)
+        self.assertIs(retry.budget, budget)
+
+        with patch.object(budget, 'deposit') as mock_deposit:
+            session.get('https://conjur/one')
+        mock_deposit.assert_called_once_with()
+
+
+class _FlakyHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Fails the requests with the queued statuses, then answers 200
+    """
+    statuses = []
+
+    # pylint: disable=invalid-name
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def _respond(self):
+        type(self).requests_received += 1
+        status = self.statuses.pop(0) if self.statuses else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args): # pylint: disable=arguments-differ
+        pass
+
+
+class HttpRetryTest(unittest.TestCase):
+    def setUp(self):
+        _FlakyHandler.requests_received = 0
+        self.server = http.server.HTTPServer(('127.0.0.1', 0), _FlakyHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_idempotent_requests_are_retried_on_transient_statuses(self):
+        _FlakyHandler.statuses = [503, 429]
+        session = create_session(retry_policy=RetryPolicy(backoff_factor=0))
+
+        response = session.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_FlakyHandler.requests_received, 3)
+
+    def test_non_idempotent_requests_are_not_retried_on_transient_statuses(self):
+        _FlakyHandler.statuses = [503]
+        session = create_session(retry_policy=RetryPolicy(backoff_factor=0))
+
+        response = session.post(self.url)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(_FlakyHandler.requests_received, 1)
+
+    def test_last_response_is_returned_when_retries_run_out(self):
+        _FlakyHandler.statuses = [502, 502, 502]
+        session = create_session(retry_policy=RetryPolicy(max_retries=2, backoff_factor=0))
+
+        response = session.get(self.url)
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(_FlakyHandler.requests_received, 3)
+
+    def test_retries_stop_when_the_budget_is_spent(self):
+        _FlakyHandler.statuses = [503, 503]
+        budget = RetryBudget(ratio=0, min_retries_per_second=0, max_balance=1)
+        session = create_session(retry_policy=RetryPolicy(backoff_factor=0, budget=budget))
+
+        response = session.get(self.url)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(_FlakyHandler.requests_received, 2)
+
+    def test_circuit_breaker_fails_requests_fast_once_open(self):
+        _FlakyHandler.statuses = [503, 503]
+        circuit_breaker = CircuitBreaker(window_size=2, min_calls=2)
+        session = create_session(circuit_breaker=circuit_breaker)
+
+        self.assertEqual([session.get(self.url).status_code for _ in range(2)], [503, 503])
+        self.assertEqual(circuit_breaker.state(self.url), OPEN)
+        with self.assertRaises(CircuitOpenException):
+            session.get(self.url)
+
+        self.assertEqual(_FlakyHandler.requests_received, 2)
+
+    def test_circuit_breaker_counts_unreachable_servers_as_failures(self):
+        circuit_breaker = CircuitBreaker(window_size=1, min_calls=1)
+        session = create_session(circuit_breaker=circuit_breaker)
+        self.server.shutdown()
+        self.server.server_close()
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get(self.url)
+
+        self.assertEqual(circuit_breaker.state(self.url), OPEN)
+
+    def test_circuit_breaker_does_not_count_client_errors_as_failures(self):
+        _FlakyHandler.statuses = [404, 404]
+        circuit_breaker = CircuitBreaker(window_size=2, min_calls=2)
+        session = create_session(circuit_breaker=circuit_breaker)
+
+        for _ in range(2):
+            session.get(self.url)
+
+        self.assertEqual(circuit_breaker.state(self.url), CLOSED)
+
+    def test_circuit_breaker_sees_requests_once_their_retries_are_done(self):
+        _FlakyHandler.statuses = [503, 503]
+        circuit_breaker = CircuitBreaker(window_size=1, min_calls=1)
+        session = create_session(retry_policy=RetryPolicy(backoff_factor=0),
+                                 circuit_breaker=circuit_breaker)
+
+        self.assertEqual(session.get(self.url).status_code, 200)
+
+        self.assertEqual(circuit_breaker.state(self.url), CLOSED)
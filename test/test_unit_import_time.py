@@ -0,0 +1,104 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Third-party modules that are slow to import and that only some commands need
+HEAVY_MODULES = ['requests', 'OpenSSL', 'yaml']
+
+# Cumulative time (in seconds) that importing the CLI entrypoint may take.
+# Loading the SDK dependencies eagerly takes several times longer than this.
+CLI_IMPORT_TIME_BUDGET = 0.15
+
+
+def run_python(code, *options, env=None):
+    return subprocess.run([sys.executable, *options, '-c', code],
+                          cwd=ROOT_DIR,
+                          env=env,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE,
+                          universal_newlines=True,
+                          check=True)
+
+
+def loaded_modules_after(code, env=None):
+    output = run_python(code + '\nimport sys\nprint(",".join(sys.modules))', env=env).stdout
+    return output.strip().splitlines()[-1].split(',')
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_importing_cli_does_not_load_heavy_modules(self):
+        loaded_modules = loaded_modules_after('import conjur.cli')
+
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, loaded_modules)
+
+    def test_cli_help_does_not_load_heavy_modules(self):
+        loaded_modules = loaded_modules_after(
+            'import sys\n'
+            'sys.argv = ["conjur", "--help"]\n'
+            'from conjur import Cli\n'
+            'try:\n'
+            '    Cli.launch()\n'
+            'except SystemExit:\n'
+            '    pass')
+
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, loaded_modules)
+
+    def test_forwarding_to_agent_does_not_load_client(self):
+        home_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home_dir)
+        with open(os.path.join(home_dir, '.conjurrc'), 'w') as conjurrc:
+            conjurrc.write('account: myaccount\nappliance_url: https://conjur\n')
+        with open(os.path.join(home_dir, '.netrc'), 'w') as netrc_file:
+            netrc_file.write('machine https://conjur/authn\nlogin admin\npassword apikey\n')
+        os.chmod(os.path.join(home_dir, '.netrc'), 0o600)
+
+        loaded_modules = loaded_modules_after(
+            'import sys\n'
+            'from unittest.mock import MagicMock, patch\n'
+            'sys.argv = ["conjur", "variable", "get", "-i", "foo"]\n'
+            'from conjur import Cli\n'
+            'agent_client = MagicMock()\n'
+            'agent_client.ping.return_value = {"url": "https://conjur", "account": "myaccount",\n'
+            '                                  "login_id": "admin", "ssl_verify": True}\n'
+            'agent_client.get.return_value = b"secret"\n'
+            'with patch("conjur.agent.AgentClient.connect", return_value=agent_client):\n'
+            '    try:\n'
+            '        Cli.launch()\n'
+            '    except SystemExit:\n'
+            '        pass\n'
+            'assert agent_client.get.called, "Not forwarded to the agent"',
+            env=dict(os.environ, HOME=home_dir))
+
+        for module in ['requests', 'OpenSSL', 'conjur.client', 'conjur.api']:
+            self.assertNotIn(module, loaded_modules)
+
+    def test_importing_client_does_not_load_pyopenssl(self):
+        self.assertNotIn('OpenSSL', loaded_modules_after('import conjur.client'))
+
+    def test_package_exposes_client_and_cli_lazily(self):
+        loaded_modules = loaded_modules_after(
+            'import sys\n'
+            'import conjur\n'
+            'assert "conjur.client" not in sys.modules\n'
+            'from conjur import Client, Cli')
+
+        self.assertIn('conjur.client', loaded_modules)
+        self.assertIn('conjur.cli', loaded_modules)
+
+    def test_importing_cli_is_within_budget(self):
+        stderr = run_python('import conjur.cli', '-X', 'importtime').stderr
+
+        # Each line is formatted as 'import time: <self> | <cumulative> | <module>'
+        cumulative_times = {line.split('|')[2].strip(): int(line.split('|')[1]) / 1e6
+                            for line in stderr.splitlines()
+                            if line.startswith('import time:') and line.count('|') == 2
+                            and line.split('|')[1].strip().isdigit()}
+
+        self.assertLess(cumulative_times['conjur.cli'], CLI_IMPORT_TIME_BUDGET)
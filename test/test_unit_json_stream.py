@@ -0,0 +1,70 @@
+import json
+import unittest
+
+from conjur.json_stream import iter_json_array
+
+
+def split_into_chunks(text, size):
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class JsonStreamTest(unittest.TestCase):
+    RESOURCES = [
+        {'id': 'default:variable:one', 'annotations': [{'name': 'a', 'value': 'x, y]'}]},
+        {'id': 'default:variable:two', 'owner': 'default:user:ünïcødé'},
+        {'id': 'default:variable:three', 'permissions': []},
+    ]
+
+    def test_iter_json_array_yields_all_elements_for_any_chunk_size(self):
+        text = json.dumps(self.RESOURCES, indent=2)
+
+        for size in [1, 2, 7, 64, len(text) * 2]:
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(iter_json_array(split_into_chunks(text, size))),
+                                 self.RESOURCES)
+
+    def test_iter_json_array_yields_elements_before_stream_ends(self):
+        def chunks():
+            yield b'[{"id": "first"}, '
+            raise AssertionError("Read past the first element")
+
+        self.assertEqual(next(iter_json_array(chunks())), {'id': 'first'})
+
+    def test_iter_json_array_does_not_cut_numbers_at_chunk_boundaries(self):
+        self.assertEqual(list(iter_json_array([b'[12', b'34, 5', b'6]'])), [1234, 56])
+
+    def test_iter_json_array_yields_all_elements_when_split_at_any_byte(self):
+        elements = [1, 2.5, -300.0, 1e5, 2E-3, -0.25e+10, True, None, 'x', {'a': 1.5}, []]
+        data = json.dumps(elements).encode('utf-8')
+
+        for split_at in range(len(data) + 1):
+            with self.subTest(split_at=split_at):
+                self.assertEqual(list(iter_json_array([data[:split_at], data[split_at:]])),
+                                 elements)
+
+    def test_iter_json_array_does_not_cut_fractions_and_exponents_at_chunk_boundaries(self):
+        text = '[1, 2.5, -300.0, 6e-2]'
+
+        for size in range(1, len(text) + 1):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(iter_json_array(split_into_chunks(text, size))),
+                                 [1, 2.5, -300.0, 6e-2])
+
+    def test_iter_json_array_handles_empty_arrays(self):
+        self.assertEqual(list(iter_json_array([b' [ ', b' ] '])), [])
+
+    def test_iter_json_array_skips_empty_chunks(self):
+        self.assertEqual(list(iter_json_array([b'', b'[1,', b'', b'2]'])), [1, 2])
+
+    def test_iter_json_array_raises_if_input_is_not_an_array(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array([b'{"id": "first"}']))
+
+    def test_iter_json_array_raises_if_array_is_truncated(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array([b'[{"id": "first"}, {"id": "sec']))
+
+    def test_iter_json_array_raises_on_missing_separator(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array([b'[1 2]']))
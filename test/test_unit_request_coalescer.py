@@ -0,0 +1,84 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from conjur.errors import PartialBatchFailureException
+from conjur.request_coalescer import RequestCoalescer
+
+
+class RequestCoalescerTest(unittest.TestCase):
+    def run_concurrently(self, coalescer, variable_ids):
+        results = {}
+        def read(variable_id):
+            try:
+                results[variable_id] = coalescer.get(variable_id)
+            except Exception as error:
+                results[variable_id] = error
+        threads = [threading.Thread(target=read, args=(variable_id,)) for variable_id in variable_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_single_read_is_fetched_through_batch_request(self):
+        fetch_many = MagicMock(return_value={'foo': 'a'})
+        coalescer = RequestCoalescer(fetch_many, MagicMock(), window=0)
+
+        self.assertEqual(coalescer.get('foo'), b'a')
+        fetch_many.assert_called_once_with('foo')
+
+    def test_concurrent_reads_are_coalesced_into_one_request(self):
+        fetch_many = MagicMock(side_effect=lambda *ids: {variable_id: variable_id.upper() for variable_id in ids})
+        coalescer = RequestCoalescer(fetch_many, MagicMock(), window=0.2)
+
+        results = self.run_concurrently(coalescer, ['foo', 'bar', 'baz', 'foo'])
+
+        self.assertEqual(results, {'foo': b'FOO', 'bar': b'BAR', 'baz': b'BAZ'})
+        fetch_many.assert_called_once()
+        self.assertCountEqual(fetch_many.call_args[0], ['foo', 'bar', 'baz'])
+
+    def test_reads_after_a_window_start_a_new_batch(self):
+        fetch_many = MagicMock(side_effect=lambda *ids: {variable_id: 'value' for variable_id in ids})
+        coalescer = RequestCoalescer(fetch_many, MagicMock(), window=0)
+
+        coalescer.get('foo')
+        coalescer.get('bar')
+
+        self.assertEqual(fetch_many.call_count, 2)
+
+    def test_failed_batch_falls_back_to_single_reads(self):
+        fetch_many = MagicMock(side_effect=RuntimeError('404 Not Found'))
+        missing_error = RuntimeError('missing')
+        def fetch_one(variable_id):
+            if variable_id == 'missing':
+                raise missing_error
+            return b'value'
+        coalescer = RequestCoalescer(fetch_many, MagicMock(side_effect=fetch_one), window=0.2)
+
+        results = self.run_concurrently(coalescer, ['foo', 'missing'])
+
+        self.assertEqual(results, {'foo': b'value', 'missing': missing_error})
+
+    def test_failed_single_read_batch_raises_error(self):
+        fetch_one = MagicMock()
+        coalescer = RequestCoalescer(MagicMock(side_effect=RuntimeError('oops')), fetch_one, window=0)
+
+        with self.assertRaises(RuntimeError):
+            coalescer.get('foo')
+        fetch_one.assert_not_called()
+
+    def test_partial_batch_failure_is_reported_per_variable(self):
+        error = RuntimeError('chunk failed')
+        fetch_many = MagicMock(side_effect=PartialBatchFailureException({'foo': 'a'}, {'bar': error}))
+        coalescer = RequestCoalescer(fetch_many, MagicMock(), window=0.2)
+
+        results = self.run_concurrently(coalescer, ['foo', 'bar'])
+
+        self.assertEqual(results, {'foo': b'a', 'bar': error})
+
+    def test_variable_missing_from_batch_response_raises_error(self):
+        coalescer = RequestCoalescer(MagicMock(return_value={}), MagicMock(), window=0)
+
+        with self.assertRaises(RuntimeError):
+            coalescer.get('foo')
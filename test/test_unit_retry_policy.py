@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import patch
+
+from urllib3.exceptions import MaxRetryError
+
+from conjur.retry_policy import RetryPolicy, RetryBudget, DEFAULT_MAX_RETRIES, RETRY_STATUSES
+
+
+class RetryBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        monotonic_patcher = patch('conjur.retry_policy.time.monotonic',
+                                  side_effect=lambda: self.now)
+        monotonic_patcher.start()
+        self.addCleanup(monotonic_patcher.stop)
+
+    def test_retry_budget_starts_full(self):
+        budget = RetryBudget(min_retries_per_second=0, max_balance=2)
+
+        self.assertEqual([budget.withdraw() for _ in range(3)], [True, True, False])
+
+    def test_retry_budget_earns_a_ratio_of_the_requests(self):
+        budget = RetryBudget(ratio=0.5, min_retries_per_second=0, max_balance=1)
+        budget.withdraw()
+
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+    def test_retry_budget_refills_over_time(self):
+        budget = RetryBudget(ratio=0, min_retries_per_second=2, max_balance=1)
+        budget.withdraw()
+
+        self.now += 0.25
+        self.assertFalse(budget.withdraw())
+        self.now += 0.25
+        self.assertTrue(budget.withdraw())
+
+    def test_retry_budget_does_not_exceed_max_balance(self):
+        budget = RetryBudget(ratio=1, min_retries_per_second=1, max_balance=1)
+
+        self.now += 100
+        for _ in range(10):
+            budget.deposit()
+
+        self.assertEqual([budget.withdraw() for _ in range(2)], [True, False])
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_retry_policy_builds_retry_of_transient_failures(self):
+        retry = RetryPolicy().build_retry()
+
+        self.assertEqual(retry.total, DEFAULT_MAX_RETRIES)
+        self.assertEqual(retry.status_forcelist, RETRY_STATUSES)
+        self.assertFalse(retry.raise_on_status)
+        self.assertTrue(retry.is_retry('GET', 503))
+        self.assertFalse(retry.is_retry('POST', 503))
+        self.assertFalse(retry.is_retry('GET', 500))
+
+    def test_retry_policy_shares_its_budget_with_every_retry(self):
+        budget = RetryBudget()
+        retry = RetryPolicy(budget=budget, max_backoff=3).build_retry()
+
+        retry = retry.increment('GET', '/', error=ConnectionResetError())
+
+        self.assertIs(retry.budget, budget)
+        self.assertEqual(retry.max_backoff, 3)
+
+    def test_retry_takes_every_retry_from_the_budget(self):
+        budget = RetryBudget(ratio=0, min_retries_per_second=0, max_balance=1)
+        retry = RetryPolicy(budget=budget).build_retry()
+
+        retry = retry.increment('GET', '/', error=ConnectionResetError())
+        with self.assertRaises(MaxRetryError):
+            retry.increment('GET', '/', error=ConnectionResetError())
+
+    @patch('conjur.retry_policy.random.uniform', side_effect=lambda low, high: high)
+    def test_retry_backoff_is_exponential_up_to_max_backoff(self, mock_uniform):
+        retry = RetryPolicy(max_retries=10, backoff_factor=1, max_backoff=5).build_retry()
+
+        backoffs = []
+        for _ in range(5):
+            retry = retry.increment('GET', '/', error=ConnectionResetError())
+            backoffs.append(retry.get_backoff_time())
+
+        self.assertEqual(backoffs, [0, 2, 4, 5, 5])
+
+    @patch('conjur.retry_policy.random.uniform', return_value=0.7)
+    def test_retry_backoff_is_jittered(self, mock_uniform):
+        retry = RetryPolicy(backoff_factor=1).build_retry()
+        for _ in range(2):
+            retry = retry.increment('GET', '/', error=ConnectionResetError())
+
+        self.assertEqual(retry.get_backoff_time(), 0.7)
+        mock_uniform.assert_called_once_with(0, 2)
@@ -0,0 +1,127 @@
+import unittest
+from unittest.mock import patch
+
+from conjur.secret_cache import SecretCache
+
+
+class SecretCacheTest(unittest.TestCase):
+    def test_missing_key_returns_none(self):
+        cache = SecretCache()
+
+        self.assertIsNone(cache.get(('default', 'foo', None)))
+
+    def test_stored_value_is_returned(self):
+        cache = SecretCache()
+
+        cache.set(('default', 'foo', None), b'bar')
+
+        self.assertEqual(cache.get(('default', 'foo', None)), b'bar')
+
+    def test_zero_max_entries_raises_error(self):
+        with self.assertRaises(ValueError):
+            SecretCache(max_entries=0)
+
+    @patch('conjur.secret_cache.time.monotonic')
+    def test_entry_expires_after_ttl(self, mock_monotonic):
+        cache = SecretCache(ttl=10)
+        mock_monotonic.return_value = 100
+        cache.set('key', 'value')
+
+        mock_monotonic.return_value = 109
+        self.assertEqual(cache.get('key'), 'value')
+
+        mock_monotonic.return_value = 110
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(len(cache), 0)
+
+    @patch('conjur.secret_cache.time.monotonic')
+    def test_expired_entry_is_kept_with_keep_expired(self, mock_monotonic):
+        cache = SecretCache(ttl=10, keep_expired=True)
+        mock_monotonic.return_value = 100
+        cache.set('key', 'value')
+
+        mock_monotonic.return_value = 110
+        self.assertIsNone(cache.get_entry('key'))
+        self.assertEqual(cache.get_last_known('key'), 'value')
+        self.assertEqual(len(cache), 1)
+
+    @patch('conjur.secret_cache.time.monotonic')
+    def test_last_known_value_is_gone_once_expired_entry_is_removed(self, mock_monotonic):
+        cache = SecretCache(ttl=10)
+        mock_monotonic.return_value = 100
+        cache.set('key', 'value')
+        self.assertEqual(cache.get_last_known('key'), 'value')
+
+        mock_monotonic.return_value = 110
+        cache.get_entry('key')
+        self.assertIsNone(cache.get_last_known('key'))
+
+    @patch('conjur.secret_cache.time.monotonic')
+    def test_immutable_entry_never_expires(self, mock_monotonic):
+        cache = SecretCache(ttl=10)
+        mock_monotonic.return_value = 100
+        cache.set('key', 'value', immutable=True)
+
+        mock_monotonic.return_value = 100000
+        self.assertEqual(cache.get('key'), 'value')
+
+    def test_hard_ttl_shorter_than_ttl_raises_error(self):
+        with self.assertRaises(ValueError):
+            SecretCache(ttl=10, hard_ttl=5)
+
+    @patch('conjur.secret_cache.time.monotonic')
+    def test_entry_is_stale_between_ttl_and_hard_ttl(self, mock_monotonic):
+        cache = SecretCache(ttl=10, hard_ttl=30)
+        mock_monotonic.return_value = 100
+        cache.set('key', 'value')
+
+        mock_monotonic.return_value = 105
+        self.assertEqual(cache.get_entry('key'), ('value', False))
+
+        mock_monotonic.return_value = 115
+        self.assertEqual(cache.get_entry('key'), ('value', True))
+        self.assertIsNone(cache.get('key'))
+
+        mock_monotonic.return_value = 130
+        self.assertIsNone(cache.get_entry('key'))
+
+    @patch('conjur.secret_cache.time.monotonic')
+    def test_immutable_entry_is_never_stale(self, mock_monotonic):
+        cache = SecretCache(ttl=10, hard_ttl=30)
+        mock_monotonic.return_value = 100
+        cache.set('key', 'value', immutable=True)
+
+        mock_monotonic.return_value = 100000
+        self.assertEqual(cache.get_entry('key'), ('value', False))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SecretCache(max_entries=2)
+        cache.set('one', 1)
+        cache.set('two', 2)
+
+        # Reading 'one' makes 'two' the least recently used entry
+        cache.get('one')
+        cache.set('three', 3)
+
+        self.assertEqual(cache.get('one'), 1)
+        self.assertIsNone(cache.get('two'))
+        self.assertEqual(cache.get('three'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_invalidate_removes_entry(self):
+        cache = SecretCache()
+        cache.set('key', 'value')
+
+        cache.invalidate('key')
+        cache.invalidate('missing')
+
+        self.assertIsNone(cache.get('key'))
+
+    def test_clear_removes_all_entries(self):
+        cache = SecretCache()
+        cache.set('one', 1)
+        cache.set('two', 2)
+
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
@@ -0,0 +1,55 @@
+import io
+import os
+import stat
+import tempfile
+import unittest
+
+from conjur.secret_file import open_secret_output
+
+
+class SecretFileTest(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output_dir.cleanup)
+        self.output_path = os.path.join(self.output_dir.name, 'secret')
+
+    def test_open_secret_output_uses_file_objects_as_is(self):
+        output_file = io.BytesIO()
+
+        with open_secret_output(output_file) as secret_file:
+            secret_file.write(b'value')
+
+        self.assertIs(secret_file, output_file)
+        self.assertEqual(output_file.getvalue(), b'value')
+
+    def test_open_secret_output_writes_owner_only_file(self):
+        with open_secret_output(self.output_path) as secret_file:
+            secret_file.write(b'\x00\xffvalue')
+
+        with open(self.output_path, 'rb') as output_file:
+            self.assertEqual(output_file.read(), b'\x00\xffvalue')
+        self.assertEqual(stat.S_IMODE(os.stat(self.output_path).st_mode), 0o600)
+        self.assertEqual(os.listdir(self.output_dir.name), ['secret'])
+
+    def test_open_secret_output_replaces_existing_file(self):
+        with open(self.output_path, 'wb') as output_file:
+            output_file.write(b'old value that is longer')
+
+        with open_secret_output(self.output_path) as secret_file:
+            secret_file.write(b'new')
+
+        with open(self.output_path, 'rb') as output_file:
+            self.assertEqual(output_file.read(), b'new')
+
+    def test_open_secret_output_keeps_existing_file_if_writing_fails(self):
+        with open(self.output_path, 'wb') as output_file:
+            output_file.write(b'old')
+
+        with self.assertRaises(RuntimeError):
+            with open_secret_output(self.output_path) as secret_file:
+                secret_file.write(b'partial')
+                raise RuntimeError("Connection reset")
+
+        with open(self.output_path, 'rb') as output_file:
+            self.assertEqual(output_file.read(), b'old')
+        self.assertEqual(os.listdir(self.output_dir.name), ['secret'])
@@ -0,0 +1,109 @@
+import json
+import multiprocessing
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from conjur.token_cache import TokenCache, is_token_cache_supported
+
+
+def set_token_under_lock(cache_path, key, token):
+    cache = TokenCache(cache_path)
+    with cache.lock():
+        if cache.get(key) is None:
+            # Slow enough that the other processes wait on the lock
+            time.sleep(0.1)
+            cache.set(key, token, datetime.now() + timedelta(minutes=5))
+            open(f"{cache_path}.{token}.authenticated", 'w').close()
+
+
+@unittest.skipUnless(is_token_cache_supported(), "File locks are not supported")
+class TokenCacheTest(unittest.TestCase):
+    KEY = TokenCache.key('https://conjur', 'myaccount', 'mylogin')
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.cache_dir, 'token-cache')
+        self.cache = TokenCache(self.cache_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_token_cache_returns_stored_token_and_expiration(self):
+        expiration = datetime.now().replace(microsecond=0) + timedelta(minutes=5)
+        self.cache.set(self.KEY, 'mytoken', expiration)
+
+        self.assertEqual(self.cache.get(self.KEY), ('mytoken', expiration))
+
+    def test_token_cache_is_keyed_by_url_account_and_login(self):
+        self.cache.set(self.KEY, 'mytoken', datetime.now() + timedelta(minutes=5))
+
+        for key in [TokenCache.key('https://other', 'myaccount', 'mylogin'),
+                    TokenCache.key('https://conjur', 'other', 'mylogin'),
+                    TokenCache.key('https://conjur', 'myaccount', 'other')]:
+            with self.subTest(key=key):
+                self.assertIsNone(TokenCache(self.cache_path).get(key))
+
+    def test_token_cache_does_not_return_expired_tokens(self):
+        self.cache.set(self.KEY, 'mytoken', datetime.now() - timedelta(seconds=1))
+
+        self.assertIsNone(self.cache.get(self.KEY))
+
+    def test_token_cache_drops_expired_tokens_of_other_keys(self):
+        self.cache.set('other', 'oldtoken', datetime.now() - timedelta(seconds=1))
+        self.cache.set(self.KEY, 'mytoken', datetime.now() + timedelta(minutes=5))
+
+        with open(self.cache_path) as cache_file:
+            self.assertEqual(list(json.load(cache_file)), [self.KEY])
+
+    def test_token_cache_file_is_owner_only(self):
+        self.cache.set(self.KEY, 'mytoken', datetime.now() + timedelta(minutes=5))
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.cache_path).st_mode), 0o600)
+
+    def test_token_cache_ignores_file_readable_by_others(self):
+        self.cache.set(self.KEY, 'mytoken', datetime.now() + timedelta(minutes=5))
+        os.chmod(self.cache_path, 0o644)
+
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(self.cache.get(self.KEY))
+
+    def test_token_cache_ignores_corrupted_file(self):
+        with open(self.cache_path, 'w') as cache_file:
+            cache_file.write('{not json')
+        os.chmod(self.cache_path, 0o600)
+
+        self.assertIsNone(self.cache.get(self.KEY))
+
+    def test_token_cache_invalidate_removes_token(self):
+        self.cache.set(self.KEY, 'mytoken', datetime.now() + timedelta(minutes=5))
+
+        self.cache.invalidate(self.KEY)
+
+        self.assertIsNone(self.cache.get(self.KEY))
+
+    def test_token_cache_clear_removes_files(self):
+        with self.cache.lock():
+            self.cache.set(self.KEY, 'mytoken', datetime.now() + timedelta(minutes=5))
+
+        self.cache.clear()
+
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_token_cache_lock_serializes_processes(self):
+        processes = [multiprocessing.Process(target=set_token_under_lock,
+                                             args=(self.cache_path, self.KEY, f'token{i}'))
+                     for i in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        # Only the first process to take the lock found the cache empty
+        token, _ = self.cache.get(self.KEY)
+        authenticated = [name for name in os.listdir(self.cache_dir) if name.endswith('.authenticated')]
+        self.assertEqual(authenticated, [f"token-cache.{token}.authenticated"])
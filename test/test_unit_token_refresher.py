@@ -0,0 +1,85 @@
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+from conjur.api import Api
+from conjur.token_refresher import TokenRefresher
+
+
+class TokenRefresherTest(unittest.TestCase):
+    def setUp(self):
+        self.api = Api(url='http://localhost')
+
+    def test_lead_time_longer_than_token_duration_raises_error(self):
+        with self.assertRaises(ValueError):
+            TokenRefresher(self.api, lead_time=Api.API_TOKEN_DURATION * 60)
+
+    def test_negative_lead_time_raises_error(self):
+        with self.assertRaises(ValueError):
+            TokenRefresher(self.api, lead_time=-1)
+
+    def test_missing_token_is_refreshed_immediately(self):
+        refresher = TokenRefresher(self.api, lead_time=30, jitter=0)
+
+        self.assertEqual(refresher.next_refresh_delay(), 0)
+
+    def test_refresh_is_scheduled_lead_time_before_expiration(self):
+        self.api.api_token_expiration = datetime.now() + timedelta(seconds=100)
+        refresher = TokenRefresher(self.api, lead_time=30, jitter=0)
+
+        self.assertAlmostEqual(refresher.next_refresh_delay(), 70, delta=1)
+
+    @patch('conjur.token_refresher.random.uniform', return_value=5)
+    def test_refresh_is_scheduled_earlier_by_jitter(self, mock_uniform):
+        self.api.api_token_expiration = datetime.now() + timedelta(seconds=100)
+        refresher = TokenRefresher(self.api, lead_time=30, jitter=10)
+
+        self.assertAlmostEqual(refresher.next_refresh_delay(), 65, delta=1)
+        mock_uniform.assert_called_once_with(0, 10)
+
+    def test_refresh_delay_is_never_negative(self):
+        self.api.api_token_expiration = datetime.now() + timedelta(seconds=10)
+        refresher = TokenRefresher(self.api, lead_time=30, jitter=0)
+
+        self.assertEqual(refresher.next_refresh_delay(), 0)
+
+    def test_refresher_renews_token_in_background(self):
+        refreshed = threading.Event()
+        def refresh():
+            self.api.api_token_expiration = datetime.now() + timedelta(minutes=5)
+            refreshed.set()
+        self.api.refresh_api_token = MagicMock(side_effect=refresh)
+        refresher = TokenRefresher(self.api, lead_time=30, jitter=0)
+
+        refresher.start()
+        self.assertTrue(refreshed.wait(5))
+        refresher.stop()
+
+        self.api.refresh_api_token.assert_called_once_with()
+
+    def test_failed_refresh_is_retried_with_backoff(self):
+        refreshed = threading.Event()
+        def refresh():
+            if self.api.refresh_api_token.call_count < 3:
+                raise RuntimeError("server unavailable")
+            self.api.api_token_expiration = datetime.now() + timedelta(minutes=5)
+            refreshed.set()
+        self.api.refresh_api_token = MagicMock(side_effect=refresh)
+        refresher = TokenRefresher(self.api, lead_time=30, jitter=0)
+        refresher.INITIAL_BACKOFF = 0.01
+
+        refresher.start()
+        self.assertTrue(refreshed.wait(5))
+        refresher.stop()
+
+        self.assertEqual(self.api.refresh_api_token.call_count, 3)
+
+    def test_stop_ends_background_thread(self):
+        self.api.api_token_expiration = datetime.now() + timedelta(minutes=5)
+        refresher = TokenRefresher(self.api, lead_time=30, jitter=0)
+
+        refresher.start()
+        refresher.stop()
+
+        self.assertFalse(refresher._thread.is_alive())
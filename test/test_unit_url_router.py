@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import patch
+
+from conjur.url_router import UrlRouter
+
+
+class UrlRouterTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        monotonic_patcher = patch('conjur.url_router.time.monotonic', side_effect=lambda: self.now)
+        monotonic_patcher.start()
+        self.addCleanup(monotonic_patcher.stop)
+
+    def read(self, router, latency=0.1, failed=False):
+        url = router.read_url()
+        router.report(url, latency, failed)
+        return url
+
+    def test_url_router_reads_from_leader_without_read_urls(self):
+        router = UrlRouter('https://leader')
+
+        self.assertEqual([self.read(router) for _ in range(3)], ['https://leader'] * 3)
+
+    def test_url_router_accepts_single_read_url(self):
+        router = UrlRouter('https://leader', 'https://follower')
+
+        self.assertEqual(router.read_urls, ['https://follower'])
+
+    def test_url_router_tries_nodes_without_latency_first(self):
+        router = UrlRouter('https://leader', ['https://follower1', 'https://follower2'])
+
+        self.assertEqual(self.read(router), 'https://follower1')
+        self.assertEqual(self.read(router), 'https://follower2')
+
+    def test_url_router_prefers_node_with_lower_latency(self):
+        router = UrlRouter('https://leader', ['https://slow', 'https://fast'])
+        router.report(router.read_url(), 0.5)
+        router.report(router.read_url(), 0.01)
+
+        self.assertEqual({self.read(router, 0.5 if url == 'https://slow' else 0.01)
+                          for url in range(10)}, {'https://fast'})
+
+    def test_url_router_accounts_for_reads_in_flight(self):
+        router = UrlRouter('https://leader', ['https://follower1', 'https://follower2'])
+        router.report(router.read_url(), 0.1)
+        router.report(router.read_url(), 0.25)
+
+        # follower1 is faster but already has two reads in flight
+        self.assertEqual(router.read_url(), 'https://follower1')
+        self.assertEqual(router.read_url(), 'https://follower1')
+        self.assertEqual(router.read_url(), 'https://follower2')
+
+    def test_url_router_averages_latencies(self):
+        router = UrlRouter('https://leader', 'https://follower', ewma_alpha=0.5)
+
+        router.report(router.read_url(), 1.0)
+        router.report(router.read_url(), 0.0)
+
+        self.assertEqual(router._nodes[0].latency, 0.5)
+
+    def test_url_router_compares_two_random_nodes(self):
+        router = UrlRouter('https://leader', ['https://a', 'https://b', 'https://c'])
+        for node, latency in zip(router._nodes, (0.3, 0.2, 0.1)):
+            node.latency = latency
+
+        with patch('conjur.url_router.random.sample', side_effect=lambda nodes, k: nodes[:k]) as sample:
+            self.assertEqual(router.read_url(), 'https://b')
+
+        sample.assert_called_once()
+
+    def test_url_router_ejects_failed_nodes_and_probes_them_later(self):
+        router = UrlRouter('https://leader', ['https://follower1', 'https://follower2'],
+                           ejection_time=5)
+        self.assertEqual(self.read(router, failed=True), 'https://follower1')
+
+        self.assertEqual({self.read(router) for _ in range(5)}, {'https://follower2'})
+
+        self.now += 5
+        self.assertEqual(self.read(router, 0.01), 'https://follower1')
+
+    def test_url_router_doubles_ejection_time_of_failing_nodes(self):
+        router = UrlRouter('https://leader', ['https://follower1', 'https://follower2'],
+                           ejection_time=5, max_ejection_time=15)
+        node = router._nodes[0]
+
+        for expected_ejection_time in (5, 10, 15, 15):
+            router.read_url()
+            router.report('https://follower1', 0.1, failed=True)
+            self.assertEqual(node.ejected_until, self.now + expected_ejection_time)
+
+        router.report(router.read_url(), 0.1)
+        router.read_url()
+        router.report('https://follower1', 0.1)
+        self.assertEqual(node.failures, 0)
+
+    def test_url_router_probes_first_node_to_recover_when_all_are_ejected(self):
+        router = UrlRouter('https://leader', ['https://follower1', 'https://follower2'])
+        self.read(router, failed=True)
+        self.now += 1
+        self.read(router, failed=True)
+
+        self.assertEqual(self.read(router), 'https://follower1')
+
+    def test_url_router_ignores_reports_of_unknown_urls(self):
+        router = UrlRouter('https://leader', 'https://follower')
+
+        router.report('https://leader', 0.1, failed=True)
+
+        self.assertEqual(router.read_url(), 'https://follower')
+
+    def test_url_router_picks_another_node_than_the_excluded_one(self):
+        router = UrlRouter('https://leader', ['https://follower1', 'https://follower2'])
+        router.report('https://follower2', 0.5)
+
+        self.assertEqual({router.read_url(exclude='https://follower1') for _ in range(5)},
+                         {'https://follower2'})
+
+    def test_url_router_picks_excluded_node_if_it_is_the_only_one(self):
+        router = UrlRouter('https://leader', ['https://follower'])
+
+        self.assertEqual(router.read_url(exclude='https://follower'), 'https://follower')
@@ -22,7 +22,7 @@ def integration_test(original_function):
 
 
 def cli_test(cli_args=[], integration=False, get_many_output=None, get_output=None, list_output=None,
-             policy_change_output={}, whoami_output={}, rotate_api_key_output={}):
+             policy_change_output={}, whoami_output={}, rotate_api_key_output={}, set_many_output=None):
     cli_command = 'cli {}'.format(' '.join(cli_args))
     def test_cli_decorator(original_function):
         @wraps(original_function)
@@ -31,8 +31,11 @@ def cli_test(cli_args=[], integration=False, get_many_output=None, get_output=No
             client_instance_mock = MagicMock()
             client_instance_mock.get.return_value = get_output
             client_instance_mock.get_many.return_value = get_many_output
+            client_instance_mock.set_many.return_value = set_many_output
             client_instance_mock.rotate_api_key.return_value = rotate_api_key_output
             client_instance_mock.list.return_value = list_output
+            client_instance_mock.iter_resources.side_effect = lambda *args, **kwargs: iter(list_output or [])
+            client_instance_mock.stream_resources.side_effect = lambda *args, **kwargs: iter(list_output or [])
             client_instance_mock.load_policy_file.return_value = policy_change_output
             client_instance_mock.replace_policy_file.return_value = policy_change_output
             client_instance_mock.update_policy_file.return_value = policy_change_output
@@ -40,7 +43,8 @@ def cli_test(cli_args=[], integration=False, get_many_output=None, get_output=No
             with self.assertRaises(SystemExit) as sys_exit:
                 with redirect_stdout(capture_stream):
                     with patch.object(sys, 'argv', ["cli"] + cli_args), \
-                         patch('conjur.cli.Client') as mock_client:
+                         patch('conjur.client.Client') as mock_client, \
+                         patch('conjur.agent.AgentClient.connect', return_value=None):
                         mock_client.return_value = client_instance_mock
                         Cli().run()
 
@@ -75,7 +79,8 @@ def cli_arg_test(cli_args=None, **kwargs):
             with self.assertRaises(SystemExit) as sys_exit:
                 with redirect_stdout(capture_stream):
                     with patch.object(sys, 'argv', ["cli"] + cli_args), \
-                         patch('conjur.cli.Client') as mock_client:
+                         patch('conjur.client.Client') as mock_client, \
+                         patch('conjur.agent.AgentClient.connect', return_value=None):
                         mock_client.return_value = client_instance_mock
                         client = mock_client
 